@@ -0,0 +1,207 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+
+# DynamoDB rejects batch_write_item calls with more than 25 requests
+MAX_BATCH_SIZE = 25
+
+THROTTLING_ERRORS = (
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'InternalServerError'
+)
+
+
+class BulkWriter:
+    """Writes PutRequest items to (or DeleteRequests from) one table with concurrent batch_write_item calls.
+
+    Batches run on a bounded thread pool sharing a single client. Unprocessed
+    items and throttled calls are retried with exponential backoff and full
+    jitter; anything still unwritten after max_attempts is counted as failed.
+    on_batch, if given, is called from the writing thread after every batch as
+    on_batch(seconds, retries, throttles), seconds covering all its attempts
+    and the backoff between them.
+    """
+
+    def __init__(self, dynamodb, table_name, max_workers=8, max_attempts=8,
+                 base_delay=0.05, max_delay=5.0, sleep=time.sleep, on_batch=None):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.on_batch = on_batch
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def write(self, items, position=None, on_checkpoint=None, checkpoint_seconds=5.0):
+        """Write every item from an iterable of DynamoDB items and return the write stats.
+
+        items may be a generator; at most 2 * max_workers batches are held in
+        memory at once. When position is given it is called as each batch is
+        handed over and should return where a reader would resume after that
+        batch. Once every batch up to that point has been written,
+        on_checkpoint(position) is called, at most every checkpoint_seconds
+        and once more at the end. A failed batch holds the checkpoint back.
+        """
+        return self._run(({'PutRequest': {'Item': item}} for item in items), position, on_checkpoint, checkpoint_seconds)
+
+    def delete(self, keys):
+        """Delete every item from an iterable of DynamoDB keys and return the stats; written counts deletions."""
+        return self._run(({'DeleteRequest': {'Key': key}} for key in keys))
+
+    def _run(self, requests, position=None, on_checkpoint=None, checkpoint_seconds=5.0):
+        self._reset_stats()
+        started = time.perf_counter()
+        tracker = _CheckpointTracker(on_checkpoint, checkpoint_seconds)
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for sequence, batch in enumerate(_batches(requests, MAX_BATCH_SIZE)):
+                if len(in_flight) >= 2 * self.max_workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    tracker.completed(done)
+                self._record(batches=1)
+                tracker.submitted(sequence, position() if position else None)
+                future = executor.submit(self._write_batch, batch)
+                future.sequence = sequence
+                in_flight.add(future)
+            done, _ = wait(in_flight)
+            tracker.completed(done)
+        tracker.flush()
+        self.stats['checkpoint'] = tracker.position
+
+        self.stats['seconds'] = round(time.perf_counter() - started, 3)
+        self.stats['call_seconds'] = round(self.stats['call_seconds'], 3)
+        self.stats['items_per_second'] = round(self.stats['written'] / self.stats['seconds'], 1) if self.stats['seconds'] else 0.0
+        return dict(self.stats)
+
+    def _write_batch(self, requests):
+        started = time.perf_counter()
+        succeeded, retries, throttles = self._attempt_batch(requests)
+        if self.on_batch:
+            self.on_batch(time.perf_counter() - started, retries, throttles)
+        return succeeded
+
+    def _attempt_batch(self, requests):
+        """Return (succeeded, retries, throttles) for one batch."""
+        retries = throttles = 0
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.sleep(self._backoff(attempt))
+            call_started = time.perf_counter()
+            try:
+                response = self.dynamodb.batch_write_item(RequestItems={self.table_name: requests})
+            except ClientError as e:
+                if e.response['Error']['Code'] not in THROTTLING_ERRORS:
+                    logger.error(f"Batch of {len(requests)} items failed: {str(e)}")
+                    self._record(failed=len(requests))
+                    return False, retries, throttles
+                retries += 1
+                throttles += 1
+                self._record(throttles=1, retries=1)
+                continue
+            finally:
+                self._record(calls=1, call_seconds=time.perf_counter() - call_started)
+
+            unprocessed = response.get('UnprocessedItems', {}).get(self.table_name, [])
+            self._record(written=len(requests) - len(unprocessed))
+            if not unprocessed:
+                return True, retries, throttles
+            retries += 1
+            self._record(retries=1, unprocessed=len(unprocessed))
+            requests = unprocessed
+
+        logger.error(f"Gave up on {len(requests)} items after {self.max_attempts} attempts")
+        self._record(failed=len(requests))
+        return False, retries, throttles
+
+    def _backoff(self, attempt):
+        # Full jitter: anywhere between zero and the capped exponential delay
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _record(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+
+    def _reset_stats(self):
+        self.stats = {
+            'written': 0,
+            'failed': 0,
+            'batches': 0,
+            'calls': 0,
+            'retries': 0,
+            'throttles': 0,
+            'unprocessed': 0,
+            'call_seconds': 0.0,
+            'seconds': 0.0,
+            'items_per_second': 0.0,
+            'checkpoint': None
+        }
+
+
+class _CheckpointTracker:
+    """Tracks the last position before which every batch has been written."""
+
+    def __init__(self, on_checkpoint, interval_seconds):
+        self.on_checkpoint = on_checkpoint
+        self.interval_seconds = interval_seconds
+        self.position = None
+        self._positions = {}
+        self._succeeded = {}
+        self._next_sequence = 0
+        self._blocked = False
+        self._reported = None
+        self._reported_at = time.monotonic()
+
+    def submitted(self, sequence, position):
+        if not self._blocked:
+            self._positions[sequence] = position
+
+    def completed(self, futures):
+        for future in futures:
+            # Re-raises anything unexpected from the writer thread
+            succeeded = future.result()
+            if not self._blocked:
+                self._succeeded[future.sequence] = succeeded
+
+        while not self._blocked and self._next_sequence in self._succeeded:
+            if not self._succeeded.pop(self._next_sequence):
+                # Nothing after a failed batch is safe to resume from
+                self._blocked = True
+                self._positions.clear()
+                self._succeeded.clear()
+                break
+            self.position = self._positions.pop(self._next_sequence)
+            self._next_sequence += 1
+
+        if time.monotonic() - self._reported_at >= self.interval_seconds:
+            self.flush()
+
+    def flush(self):
+        if self.on_checkpoint and self.position is not None and self.position != self._reported:
+            self.on_checkpoint(self.position)
+            self._reported = self.position
+        self._reported_at = time.monotonic()
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
@@ -0,0 +1,51 @@
+import json
+import time
+
+from botocore.exceptions import ClientError
+
+CHECKPOINT_PREFIX = 'ingestion-checkpoints/'
+
+
+class CheckpointStore:
+    """Resume positions for partially loaded files, kept as small JSON objects in S3.
+
+    A checkpoint only applies to the exact object version (ETag) it was taken
+    from, so uploading a new file always starts a fresh load.
+    """
+
+    def __init__(self, s3, bucket_name):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+
+    def load(self, file_key, etag):
+        """Return the byte offset to resume file_key from, or 0 to start at the top."""
+        if not self.bucket_name:
+            return 0
+        try:
+            response = self.s3.get_object(Bucket=self.bucket_name, Key=self._key(file_key))
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return 0
+            raise
+        checkpoint = json.loads(response['Body'].read())
+        if checkpoint.get('etag') != etag:
+            return 0
+        return checkpoint['offset']
+
+    def save(self, file_key, etag, offset):
+        if not self.bucket_name:
+            return
+        self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=self._key(file_key),
+            Body=json.dumps({'file': file_key, 'etag': etag, 'offset': offset, 'saved_at': int(time.time())}),
+            ContentType='application/json'
+        )
+
+    def clear(self, file_key):
+        if not self.bucket_name:
+            return
+        self.s3.delete_object(Bucket=self.bucket_name, Key=self._key(file_key))
+
+    def _key(self, file_key):
+        return f'{CHECKPOINT_PREFIX}{file_key}.json'
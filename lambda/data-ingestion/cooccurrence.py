@@ -0,0 +1,164 @@
+import logging
+import time
+from array import array
+
+import numpy as np
+from neighbours import NEIGHBOURS_PER_HOTEL, neighbours_item
+from popularity import INTERACTION_WEIGHTS
+from s3_stream import S3CsvReader
+
+logger = logging.getLogger()
+
+# Sessions touching more distinct hotels than this only count their most
+# engaged ones; pairs grow with the square of the session size, and very long
+# sessions are mostly crawlers
+MAX_SESSION_HOTELS = 50
+
+
+class NeighbourIndex:
+    """Top-N most similar hotels per hotel, as CSR arrays over hotel positions.
+
+    Neighbours of hotel_ids[i] are neighbours[offsets[i]:offsets[i + 1]], with
+    their similarities in the same slice of similarities, most similar first.
+    """
+
+    def __init__(self, hotel_ids, offsets, neighbours, similarities):
+        self.hotel_ids = hotel_ids
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.similarities = similarities
+
+    def __len__(self):
+        return int(np.count_nonzero(np.diff(self.offsets)))
+
+    def neighbours_of(self, position):
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return [(self.hotel_ids[j], float(s))
+                for j, s in zip(self.neighbours[start:end].tolist(), self.similarities[start:end].tolist())]
+
+    def items(self, hotel_cities, generation):
+        """DynamoDB items for every hotel with at least one neighbour."""
+        for position in np.flatnonzero(np.diff(self.offsets)).tolist():
+            neighbours = [(hotel_id, hotel_cities.get(hotel_id, ''), similarity)
+                          for hotel_id, similarity in self.neighbours_of(position)]
+            yield neighbours_item(self.hotel_ids[position], neighbours, generation)
+
+
+def build_neighbour_index(sessions, hotels, weights, hotel_ids, per_hotel=NEIGHBOURS_PER_HOTEL,
+                          max_session_hotels=MAX_SESSION_HOTELS):
+    """Build the item-item index from interactions given as parallel arrays.
+
+    sessions and hotels are integer codes (hotels index hotel_ids) and weights
+    the engagement of each interaction. A hotel's weight in a session is its
+    strongest interaction there; two hotels' similarity is the cosine of
+    their per-session weight vectors, so a co-visit counts for the product of
+    the two weights and hotels seen in every session do not dominate.
+    """
+    n_hotels = len(hotel_ids)
+    sessions = np.asarray(sessions, dtype=np.int64)
+    hotels = np.asarray(hotels, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+
+    # One entry per (session, hotel) with its strongest weight, each session's hotels strongest first
+    order = np.lexsort((hotels, -weights, sessions))
+    sessions, hotels, weights = sessions[order], hotels[order], weights[order]
+    keep = np.ones(len(sessions), dtype=bool)
+    if len(sessions):
+        pair_key = sessions * n_hotels + hotels
+        first_seen = np.unique(pair_key, return_index=True)[1]
+        keep[:] = False
+        keep[first_seen] = True
+    sessions, hotels, weights = sessions[keep], hotels[keep], weights[keep]
+
+    # Position of each entry in its session, and how many entries the session has
+    starts = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]]) if len(sessions) else np.zeros(0, np.int64)
+    lengths = np.diff(np.r_[starts, len(sessions)])
+    group = np.repeat(np.arange(len(starts)), lengths)
+    position = np.arange(len(sessions)) - starts[group]
+    kept = position < max_session_hotels
+    sessions, hotels, weights, position = sessions[kept], hotels[kept], weights[kept], position[kept]
+    remaining = np.minimum(lengths, max_session_hotels)[group[kept]] - position - 1
+
+    norms = np.sqrt(np.bincount(hotels, weights=weights * weights, minlength=n_hotels))
+
+    # Every pair within a session, entry i with entry i + d for each d the session still has room for,
+    # written straight into one array of pair keys (lower hotel * n_hotels + higher hotel)
+    total = int(remaining.sum())
+    if not total:
+        return NeighbourIndex(hotel_ids, np.zeros(n_hotels + 1, np.int64), np.zeros(0, np.int32), np.zeros(0, np.float32))
+    key = np.empty(total, dtype=np.int64)
+    covisits = np.empty(total, dtype=np.float64)
+    filled = 0
+    candidates = np.flatnonzero(remaining > 0)
+    distance = 1
+    while len(candidates):
+        a, b = hotels[candidates], hotels[candidates + distance]
+        end = filled + len(candidates)
+        key[filled:end] = np.minimum(a, b) * n_hotels + np.maximum(a, b)
+        covisits[filled:end] = weights[candidates] * weights[candidates + distance]
+        filled = end
+        distance += 1
+        candidates = candidates[remaining[candidates] >= distance]
+    del sessions, hotels, weights, position, remaining, group
+
+    # Sum co-visits per unordered pair
+    order = np.argsort(key)
+    key, covisits = key[order], covisits[order]
+    del order
+    boundaries = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    covisits = np.add.reduceat(covisits, boundaries)
+    low, high = np.divmod(key[boundaries], n_hotels)
+    del key
+    similarity = covisits / (norms[low] * norms[high])
+
+    # Both directions, then the per_hotel most similar for each hotel (ties by hotel position)
+    source = np.concatenate([low, high])
+    target = np.concatenate([high, low])
+    similarity = np.concatenate([similarity, similarity])
+    order = np.lexsort((target, -similarity, source))
+    source, target, similarity = source[order], target[order], similarity[order]
+    counts = np.bincount(source, minlength=n_hotels)
+    first = np.r_[0, np.cumsum(counts)[:-1]]
+    keep = np.arange(len(source)) - first[source] < per_hotel
+    source, target, similarity = source[keep], target[keep], similarity[keep]
+
+    offsets = np.r_[0, np.cumsum(np.bincount(source, minlength=n_hotels))]
+    return NeighbourIndex(hotel_ids, offsets, target.astype(np.int32), similarity.astype(np.float32))
+
+
+def neighbour_index_from_rows(rows, per_hotel=NEIGHBOURS_PER_HOTEL, max_session_hotels=MAX_SESSION_HOTELS):
+    """Build the index from user_interactions rows (dicts with session_id, hotel_id and interaction_type)."""
+    session_codes, hotel_codes = {}, {}
+    # Typed arrays rather than lists: tens of millions of rows would otherwise be one Python object per value
+    sessions, hotels, weights = array('q'), array('q'), array('d')
+    for row in rows:
+        weight = INTERACTION_WEIGHTS.get(row['interaction_type'])
+        if not weight or not row.get('session_id'):
+            continue
+        sessions.append(session_codes.setdefault(row['session_id'], len(session_codes)))
+        hotels.append(hotel_codes.setdefault(row['hotel_id'], len(hotel_codes)))
+        weights.append(weight)
+    return build_neighbour_index(sessions, hotels, weights, list(hotel_codes), per_hotel, max_session_hotels)
+
+
+def publish_neighbour_index(s3, bucket_name, file_key, writer, hotels_key='hotels.csv'):
+    """Rebuild the co-visit index from an interactions CSV and write it with a BulkWriter.
+
+    Neighbours carry their city from hotels_key so reco_v2 can filter by city
+    without reading hotel items. Hotels that drop out of the index keep their
+    previous entry until it is overwritten; items record the generation (the
+    build time) they came from. Returns the write stats.
+    """
+    started = time.perf_counter()
+    index = neighbour_index_from_rows(S3CsvReader(s3, bucket_name, file_key).rows())
+    built = time.perf_counter()
+    try:
+        hotel_cities = {row['hotel_id']: row['city_id'] for row in S3CsvReader(s3, bucket_name, hotels_key).rows()}
+    except Exception as e:
+        logger.warning(f"Could not read hotel cities from {hotels_key}: {str(e)}")
+        hotel_cities = {}
+    stats = writer.write(index.items(hotel_cities, int(time.time())))
+    stats['hotels'] = len(index)
+    stats['build_seconds'] = round(built - started, 3)
+    logger.info(f"Published neighbour lists for {stats['hotels']} hotels: {stats}")
+    return stats
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import time
+import zlib
+from array import array
+
+from botocore.exceptions import ClientError
+
+ROW_HASHES_PREFIX = 'ingestion-row-hashes/'
+
+DIGEST_BYTES = 8
+
+# Stands in for rows whose content in the table is not known: every row read
+# against it counts as changed and is written again
+UNKNOWN = bytes(DIGEST_BYTES)
+
+
+def row_digest(values):
+    """Content hash of one CSV row's values, in column order."""
+    return hashlib.blake2b('\x1f'.join(values).encode('utf-8'), digest_size=DIGEST_BYTES).digest()
+
+
+class RowHashStore:
+    """The key and content hash of every row last loaded from a file, kept as one object in S3.
+
+    The object is zlib-compressed: a JSON line naming the file, table and
+    columns, then every row's 8-byte digest, then the keys joined by
+    newlines, about 11 MB for a million rows. Hashes only describe a table
+    the file was loaded into with the same columns; against another header
+    the keys are still returned, so rows that disappeared can be deleted,
+    but every digest is UNKNOWN.
+    """
+
+    def __init__(self, s3, bucket_name):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+
+    def load(self, file_key, table_name, columns):
+        """Return {key: digest} from the last load of file_key into table_name, or None if there is none."""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket_name, Key=self._key(file_key))
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+        data = zlib.decompress(response['Body'].read())
+        header_end = data.index(b'\n') + 1
+        header = json.loads(data[:header_end])
+        if header['table'] != table_name:
+            return None
+        rows = header['rows']
+        digests_end = header_end + rows * DIGEST_BYTES
+        keys = data[digests_end:].decode('utf-8').split('\n') if rows else []
+        if header['columns'] != list(columns):
+            return dict.fromkeys(keys, UNKNOWN)
+        digests = data[header_end:digests_end]
+        return dict(zip(keys, (digests[i:i + DIGEST_BYTES] for i in range(0, len(digests), DIGEST_BYTES))))
+
+    def save(self, file_key, table_name, columns, keys, digests):
+        """Store keys and their digests, concatenated in the same order."""
+        header = {'file': file_key, 'table': table_name, 'columns': list(columns), 'rows': len(keys), 'saved_at': int(time.time())}
+        data = b''.join([json.dumps(header).encode('utf-8'), b'\n', digests, '\n'.join(keys).encode('utf-8')])
+        self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=self._key(file_key),
+            Body=zlib.compress(data, 6),
+            ContentType='application/octet-stream'
+        )
+
+    def clear(self, file_key):
+        if not self.bucket_name:
+            return
+        self.s3.delete_object(Bucket=self.bucket_name, Key=self._key(file_key))
+
+    def _key(self, file_key):
+        return f'{ROW_HASHES_PREFIX}{file_key}.bin'
+
+
+class RowDiff:
+    """Sorts the rows of a reload into inserted, changed and unchanged against the previous hashes.
+
+    Rows are added in file order with the reader offset just past them.
+    Whatever is left in previous once the file has been read in full are
+    the rows that disappeared from it.
+    """
+
+    def __init__(self, previous):
+        self.previous = previous
+        self.keys = []
+        self.digests = bytearray()
+        self.inserted = 0
+        self.changed = 0
+        self.unchanged = 0
+        # Offset and index of every row to be written, as arrays: a first load writes them all
+        self._pending_offsets = array('q')
+        self._pending_indexes = array('q')
+
+    def add(self, key, digest, offset):
+        """Record one row; returns True when it has to be written."""
+        before = self.previous.pop(key, None)
+        if before == digest:
+            self.unchanged += 1
+        else:
+            self._pending_offsets.append(offset)
+            self._pending_indexes.append(len(self.keys))
+            if before is None:
+                self.inserted += 1
+            else:
+                self.changed += 1
+        self.keys.append(key)
+        self.digests += digest
+        return before != digest
+
+    def written_up_to(self, position):
+        """Forget the digests of rows to be written past position, which may not be in the table yet."""
+        for offset, index in zip(self._pending_offsets, self._pending_indexes):
+            if position is None or offset > position:
+                start = index * DIGEST_BYTES
+                self.digests[start:start + DIGEST_BYTES] = UNKNOWN
+
+    def removed(self):
+        return list(self.previous)
+
+    def entries(self, keep_unread=False):
+        """Return (keys, digests) of every row read and, with keep_unread, of the previous rows not read."""
+        if not keep_unread or not self.previous:
+            return self.keys, bytes(self.digests)
+        return self.keys + list(self.previous), bytes(self.digests) + b''.join(self.previous.values())
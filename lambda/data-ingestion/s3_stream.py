@@ -0,0 +1,96 @@
+import csv
+
+# Bytes requested from the S3 body per read
+CHUNK_SIZE = 1024 * 1024
+
+# Enough to hold the header line of any of our CSVs
+HEADER_RANGE_BYTES = 64 * 1024
+
+
+class S3CsvReader:
+    """Streams dict rows from a CSV object in S3 without holding the file in memory.
+
+    The body is read in CHUNK_SIZE pieces and split on newline bytes, which
+    never occur inside a multi-byte UTF-8 character, so each line is decoded on
+    its own. After every row, offset is the byte position just past it; passing
+    that back as start_byte resumes with the following row. end_byte, when
+    given, must fall on a line boundary; reading stops just before it.
+    """
+
+    def __init__(self, s3, bucket_name, file_key, start_byte=0, etag=None, end_byte=None):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.file_key = file_key
+        self.start_byte = start_byte
+        self.end_byte = end_byte
+        self.etag = etag
+        self.offset = start_byte
+        self.rows_read = 0
+        self.stopped = False
+        self._line_end = start_byte
+
+    def rows(self, should_stop=None):
+        """Yield rows from start_byte to end_byte (or the end of the object), or until should_stop() is true."""
+        if self.end_byte is not None and self.start_byte >= self.end_byte:
+            return
+        last_byte = None if self.end_byte is None else self.end_byte - 1
+        if self.start_byte == 0:
+            lines = self._decoded_lines(self._open(0, last_byte))
+            header = next(csv.reader(lines), None)
+        else:
+            header = self.read_header()
+            lines = self._decoded_lines(self._open(self.start_byte, last_byte))
+        if header is None:
+            return
+
+        for values in csv.reader(lines):
+            if not values:
+                continue
+            self.offset = self._line_end
+            self.rows_read += 1
+            yield dict(zip(header, values))
+            if should_stop is not None and should_stop():
+                self.stopped = True
+                return
+
+    def read_header(self):
+        """Parse the header line with a small range GET."""
+        lines = self._decoded_lines(self._open(0, HEADER_RANGE_BYTES - 1), track_offset=False)
+        return next(csv.reader(lines), None)
+
+    def _open(self, first_byte, last_byte=None):
+        kwargs = {'Bucket': self.bucket_name, 'Key': self.file_key}
+        if first_byte or last_byte is not None:
+            kwargs['Range'] = f"bytes={first_byte}-{'' if last_byte is None else last_byte}"
+        if self.etag:
+            # Fail rather than mix rows from two versions of the file
+            kwargs['IfMatch'] = self.etag
+        return self.s3.get_object(**kwargs)['Body']
+
+    def _decoded_lines(self, body, track_offset=True):
+        first = True
+        for line, end in iter_lines(body, self._line_end):
+            if track_offset:
+                self._line_end = end
+            # utf-8-sig drops a byte order mark at the very start of the file
+            yield line.decode('utf-8-sig' if first and end == len(line) else 'utf-8')
+            first = False
+
+
+def iter_lines(body, start_offset=0, chunk_size=CHUNK_SIZE):
+    """Yield (line, end_offset) for each line of a streaming body, newline included."""
+    pending = b''
+    offset = start_offset
+    for chunk in body.iter_chunks(chunk_size):
+        data = pending + chunk if pending else chunk
+        start = 0
+        while True:
+            newline = data.find(b'\n', start)
+            if newline == -1:
+                break
+            offset += newline + 1 - start
+            yield data[start:newline + 1], offset
+            start = newline + 1
+        pending = data[start:]
+    if pending:
+        yield pending, offset + len(pending)
@@ -0,0 +1,87 @@
+import json
+import time
+
+# Size of the range GET used to find the next line break after a nominal shard boundary
+BOUNDARY_PROBE_BYTES = 64 * 1024
+
+MANIFEST_PREFIX = 'ingestion-manifests/'
+
+
+def plan_shards(s3, bucket_name, file_key, etag, size, shard_bytes):
+    """Split an object into shard descriptors of roughly shard_bytes each.
+
+    Every boundary is moved forward to the start of the next line, found with a
+    small range GET, so each shard holds whole rows only. Shard 0 starts at byte
+    0 and carries the header; later shards read it separately.
+    """
+    boundaries = [0]
+    for nominal in range(shard_bytes, size, shard_bytes):
+        if nominal <= boundaries[-1]:
+            continue
+        boundary = _next_line_start(s3, bucket_name, file_key, etag, nominal, size)
+        if boundary < size:
+            boundaries.append(boundary)
+    boundaries.append(size)
+
+    count = len(boundaries) - 1
+    return [
+        {
+            'file': file_key,
+            'etag': etag,
+            'shard': index,
+            'shards': count,
+            'start_byte': boundaries[index],
+            'end_byte': boundaries[index + 1]
+        }
+        for index in range(count)
+    ]
+
+
+def shard_name(shard):
+    return f"{shard['file']}.shard-{shard['shard']:05d}"
+
+
+def _next_line_start(s3, bucket_name, file_key, etag, position, size):
+    # Start one byte early: if the previous byte ends a line, position itself is a line start
+    probe_start = position - 1
+    while probe_start < size:
+        probe_end = min(size, probe_start + BOUNDARY_PROBE_BYTES) - 1
+        response = s3.get_object(Bucket=bucket_name, Key=file_key, Range=f'bytes={probe_start}-{probe_end}', IfMatch=etag)
+        newline = response['Body'].read().find(b'\n')
+        if newline != -1:
+            return probe_start + newline + 1
+        probe_start = probe_end + 1
+    return size
+
+
+class ShardManifest:
+    """Tracks which shards of one object version have been loaded, as JSON objects in S3.
+
+    The coordinator writes manifest.json with every shard descriptor; each
+    worker then writes its own done marker, so no two invocations ever update
+    the same object.
+    """
+
+    def __init__(self, s3, bucket_name, file_key, etag):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        version = etag.strip('"')
+        self.prefix = f'{MANIFEST_PREFIX}{file_key}/{version}/'
+
+    def create(self, shards):
+        self._put('manifest.json', {'shards': shards, 'created_at': int(time.time())})
+
+    def mark_done(self, shard, stats):
+        self._put(f"done/{shard['shard']:05d}.json", {'shard': shard, 'stats': stats, 'done_at': int(time.time())})
+
+    def done_count(self):
+        paginator = self.s3.get_paginator('list_objects_v2')
+        return sum(page.get('KeyCount', 0) for page in paginator.paginate(Bucket=self.bucket_name, Prefix=f'{self.prefix}done/'))
+
+    def _put(self, name, body):
+        self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=f'{self.prefix}{name}',
+            Body=json.dumps(body),
+            ContentType='application/json'
+        )
@@ -0,0 +1,34 @@
+import logging
+import os
+from collections import defaultdict
+
+from catalog_snapshot import build_snapshot, snapshot_key
+from s3_stream import S3CsvReader
+
+logger = logging.getLogger()
+
+
+def publish_city_snapshots(s3, bucket_name, file_key, generation, snapshot_bucket=None, snapshot_dir=None):
+    """Write one binary catalog snapshot per city in hotels.csv for a catalog generation.
+
+    Snapshots go to snapshot_bucket, or under snapshot_dir on local disk when
+    that is given instead. Returns {city_id: snapshot size in bytes}.
+    """
+    cities = defaultdict(list)
+    for row in S3CsvReader(s3, bucket_name, file_key).rows():
+        cities[row['city_id']].append(row)
+
+    sizes = {}
+    for city_id, hotels in cities.items():
+        snapshot = build_snapshot(hotels, generation)
+        key = snapshot_key(generation, city_id)
+        if snapshot_dir:
+            path = os.path.join(snapshot_dir, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(snapshot)
+        else:
+            s3.put_object(Bucket=snapshot_bucket, Key=key, Body=snapshot, ContentType='application/octet-stream')
+        sizes[city_id] = len(snapshot)
+    logger.info(f"Published {len(sizes)} catalog snapshots for generation {generation}, {sum(sizes.values())} bytes")
+    return sizes
@@ -0,0 +1,146 @@
+import base64
+import json
+import os
+
+from hotel_records import parse_fields
+
+# Most queries accepted in one batch invocation
+MAX_BATCH_QUERIES = int(os.environ.get('RECO_BATCH_MAX_QUERIES', 10000))
+
+
+class BatchError(Exception):
+    """The batch as a whole is unusable (malformed body, too many queries)."""
+
+
+def parse_batch_event(event):
+    """Return the queries of a batch invocation, or None for a single GET request.
+
+    Accepted shapes are a direct invocation {'queries': [...]}, an API Gateway
+    POST whose JSON body is {'queries': [...]}, and SQS or Kinesis records
+    whose payload is one query or {'queries': [...]}.
+    """
+    if 'queries' in event:
+        queries = event['queries']
+    elif event.get('httpMethod') == 'POST':
+        body = event.get('body') or ''
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body).decode('utf-8')
+        queries = _payload_queries(body)
+    elif 'Records' in event:
+        queries = []
+        for record in event['Records']:
+            if 'kinesis' in record:
+                queries.extend(_payload_queries(base64.b64decode(record['kinesis']['data']).decode('utf-8')))
+            else:
+                queries.extend(_payload_queries(record.get('body') or ''))
+    else:
+        return None
+
+    if not isinstance(queries, list):
+        raise BatchError('queries must be a list')
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise BatchError(f'at most {MAX_BATCH_QUERIES} queries per batch')
+    return queries
+
+
+def run_batch(queries, resolve_city, get_catalog):
+    """Answer every query, loading each city once and ranking its distinct tag profiles together.
+
+    resolve_city(city) returns (city_id, city_name), with city_id None for an
+    unknown city; get_catalog(city_id) returns the city's CityCatalog. Returns
+    one result dict per query, in order; a query that cannot be answered gets
+    {'error': ...} and does not affect the others.
+    """
+    results = [None] * len(queries)
+    by_city = {}
+    for position, query in enumerate(queries):
+        try:
+            city_input, user_tags, limit, offset, fields = _parse_query(query)
+        except ValueError as e:
+            results[position] = _with_id(query, {'error': str(e)})
+            continue
+        city_id, city_name = resolve_city(city_input)
+        if not city_id:
+            results[position] = _with_id(query, {'city': city_input, 'hotels': [], 'count': 0,
+                                                 'message': f'No hotels available in {city_input}'})
+            continue
+        by_city.setdefault(city_id, []).append((position, city_name, user_tags, limit, offset, fields))
+
+    for city_id, city_queries in by_city.items():
+        try:
+            catalog = get_catalog(city_id)
+        except Exception as e:
+            for position, *_ in city_queries:
+                results[position] = _with_id(queries[position], {'city_id': city_id, 'error': str(e)})
+            continue
+
+        # Identical tag profiles are ranked once, as deep as the deepest page asked for
+        depths = {}
+        for _, _, user_tags, limit, offset, _ in city_queries:
+            profile = tuple(user_tags)
+            depths[profile] = max(depths.get(profile, 0), offset + limit)
+        profiles = list(depths)
+        ranked = dict(zip(profiles, catalog.top_k_many([list(p) for p in profiles], [depths[p] for p in profiles])))
+
+        for position, city_name, user_tags, limit, offset, fields in city_queries:
+            order, scores = ranked[tuple(user_tags)]
+            hotels = [
+                catalog.record(i, score, fields)
+                for i, score in zip(order[offset:offset + limit].tolist(), scores[offset:offset + limit].tolist())
+            ]
+            results[position] = _with_id(queries[position], {
+                'city': city_name,
+                'city_id': city_id,
+                'hotels': hotels,
+                'count': len(hotels),
+                'offset': offset
+            })
+    return results
+
+
+def _payload_queries(payload):
+    try:
+        body = json.loads(payload)
+    except ValueError:
+        raise BatchError('batch payload must be JSON')
+    if isinstance(body, dict) and 'queries' in body:
+        return body['queries']
+    return [body]
+
+
+def _parse_query(query):
+    """Validate one query the way the GET endpoint validates its parameters."""
+    if not isinstance(query, dict):
+        raise ValueError('query must be an object')
+    city_input = query.get('city_id') or query.get('city')
+    if not city_input:
+        raise ValueError('city or city_id is required')
+
+    try:
+        limit = int(query.get('limit', 10))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be a valid number')
+    if limit <= 0:
+        raise ValueError('limit must be a positive number')
+
+    try:
+        offset = int(query.get('offset', 0))
+    except (TypeError, ValueError):
+        raise ValueError('offset must be a valid number')
+    if offset < 0:
+        raise ValueError('offset must not be negative')
+
+    user_tags = query.get('user_tags', '')
+    if isinstance(user_tags, str):
+        user_tags = user_tags.split(',')
+    user_tags = [t.strip() for t in user_tags if isinstance(t, str) and t.strip()]
+    if not isinstance(query.get('fields', ''), (str, list)):
+        raise ValueError('fields must be a string or a list')
+    return city_input, user_tags, limit, offset, parse_fields(query.get('fields'))
+
+
+def _with_id(query, result):
+    # Callers may tag queries with an id to match results without relying on order
+    if isinstance(query, dict) and 'id' in query:
+        return {'id': query['id'], **result}
+    return result
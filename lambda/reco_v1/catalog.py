@@ -0,0 +1,50 @@
+import os
+
+from hotel_records import HOTEL_ATTRIBUTES, HotelColumns, decode_item
+
+# GSI on the hotels table: partition on city_id, sorted by popularity_score
+CITY_INDEX_NAME = os.environ.get('HOTELS_CITY_INDEX', 'city-popularity-index')
+
+
+def query_city_hotels(dynamodb, table_name, city_id, index_name=CITY_INDEX_NAME):
+    """Return every hotel item for a city, following LastEvaluatedKey until the last page."""
+    names = {f'#a{i}': attr for i, attr in enumerate(HOTEL_ATTRIBUTES)}
+    query_kwargs = {
+        'TableName': table_name,
+        'IndexName': index_name,
+        'KeyConditionExpression': '#city_id = :city_value',
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': {**names, '#city_id': 'city_id'},
+        'ExpressionAttributeValues': {':city_value': {'S': city_id}},
+        # Most popular hotels first
+        'ScanIndexForward': False,
+    }
+
+    items = []
+    while True:
+        response = dynamodb.query(**query_kwargs)
+        items.extend(response.get('Items', []))
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return items
+        query_kwargs['ExclusiveStartKey'] = last_key
+
+
+def catalog_order(item):
+    """Sort key putting hotel items in catalog order: most popular first, ties by hotel_id, as in snapshots.
+
+    The city index returns equally popular hotels in no set order, and a
+    catalog ranks tied hotels in its own order.
+    """
+    popularity = item.get('popularity_score')
+    return -float(popularity['N']) if popularity and 'N' in popularity else 0.0, item['hotel_id']['S']
+
+
+def decode_hotels(items):
+    """Decode hotel items from DynamoDB's wire format straight into HotelColumns, through hotel_records.decode_item."""
+    hotels = HotelColumns()
+    for item in items:
+        hotels.append(decode_item(item))
+    hotels.compact()
+    return hotels
@@ -0,0 +1,117 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CatalogCache:
+    """Per-city hotel catalog kept across warm invocations.
+
+    Cities are evicted least-recently-used once max_cities is reached, and each
+    entry expires after ttl_seconds. The catalog version is polled at most once
+    every version_check_seconds; a new version drops every cached city.
+    read_version may return None when the version is unavailable, in which
+    case the cached cities are kept until the next check.
+    """
+
+    def __init__(self, max_cities, ttl_seconds, version_check_seconds, clock=time.monotonic):
+        self.max_cities = max_cities
+        self.ttl_seconds = ttl_seconds
+        self.version_check_seconds = version_check_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._version_checked_at = None
+
+    def get(self, city_id, load_city, read_version):
+        """Return (hotels, hit) for a city, calling load_city(city_id) on a miss."""
+        now = self.clock()
+        self._check_version(now, read_version)
+
+        entry = self._entries.get(city_id)
+        if entry is not None and now - entry[1] < self.ttl_seconds:
+            self._entries.move_to_end(city_id)
+            self.hits += 1
+            return entry[0], True
+
+        self.misses += 1
+        hotels = load_city(city_id)
+        self._store(city_id, hotels, now)
+        return hotels, False
+
+    def get_many(self, city_ids, load_city, read_version, max_workers):
+        """Return {city_id: (hotels, hit)}, loading the missing cities side by side.
+
+        load_city runs on up to max_workers threads, so a request for several
+        cold cities waits about as long as the slowest one; the cache itself
+        is only touched from the calling thread. The first load to fail
+        raises once the others have finished.
+        """
+        now = self.clock()
+        self._check_version(now, read_version)
+
+        found = {}
+        missing = []
+        for city_id in city_ids:
+            entry = self._entries.get(city_id)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(city_id)
+                self.hits += 1
+                found[city_id] = (entry[0], True)
+            else:
+                missing.append(city_id)
+        if not missing:
+            return found
+
+        self.misses += len(missing)
+        if len(missing) == 1:
+            loaded = [load_city(missing[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+                loaded = list(executor.map(load_city, missing))
+        for city_id, hotels in zip(missing, loaded):
+            self._store(city_id, hotels, now)
+            found[city_id] = (hotels, False)
+        return found
+
+    @property
+    def version(self):
+        """The catalog version the cached cities belong to, or None before the first check."""
+        return self._version
+
+    def clear(self):
+        self._entries.clear()
+        self._version = None
+        self._version_checked_at = None
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'cities': len(self._entries),
+            'version': self._version
+        }
+
+    def _store(self, city_id, hotels, now):
+        self._entries[city_id] = (hotels, now)
+        self._entries.move_to_end(city_id)
+        while len(self._entries) > self.max_cities:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _check_version(self, now, read_version):
+        if self._version_checked_at is not None and now - self._version_checked_at < self.version_check_seconds:
+            return
+        version = read_version()
+        self._version_checked_at = now
+        # None means the version could not be read; keep serving what we have
+        if version is not None and version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
@@ -1,60 +1,377 @@
-import boto3
 import os
 import json
 import logging
-from decimal import Decimal
-from boto3.dynamodb.types import TypeDeserializer
+import re
+import orjson
+import aws_clients
+from batch import BatchError, parse_batch_event, run_batch
+from catalog import catalog_order, decode_hotels, query_city_hotels
+from catalog_cache import CatalogCache
+from catalog_snapshot import snapshot_key
+from catalog_version import read_catalog_version
+from city_index import MAX_COMPLETIONS, CityIndexCache, normalise, read_city_index
+from hotel_records import parse_fields
+from metrics import Metrics, PhaseTimer
+from multi_city import merge_ranked
+from popularity import read_popularity
+from response_cache import ResponseCache, cache_key, etag_matches, make_etag
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Custom JSON encoder for Decimal objects
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# Created once per container so warm invocations reuse them. AWS clients come
+# from aws_clients on first use, and scoring (numpy) is imported with the first
+# catalog, so requests rejected on their parameters load neither.
+catalog_cache = CatalogCache(
+    max_cities=int(os.environ.get('CATALOG_CACHE_MAX_CITIES', 64)),
+    ttl_seconds=float(os.environ.get('CATALOG_CACHE_TTL_SECONDS', 300)),
+    version_check_seconds=float(os.environ.get('CATALOG_VERSION_CHECK_SECONDS', 30))
+)
+# Ranked pages of the hottest (city, tags, depth) keys, for the catalogs currently cached
+response_cache = ResponseCache(max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024)))
+# Every city, read from the cities table once per container and again after the TTL;
+# while the table is empty or unreadable, read again after the shorter retry interval
+city_cache = CityIndexCache(ttl_seconds=float(os.environ.get('CITY_INDEX_TTL_SECONDS', 3600)),
+                            retry_seconds=float(os.environ.get('CITY_INDEX_RETRY_SECONDS', 30)))
+# Per-phase request timings as CloudWatch metrics, each document carrying the caches' stats
+metrics = Metrics('reco_v1', properties=lambda: {'catalog_cache': catalog_cache.stats(),
+                                                 'response_cache': response_cache.stats()})
 
-def lambda_handler(event, context):
-    # City ID to name mapping
-    CITY_NAMES = {
-        'CITY_001': 'London',
-        'CITY_002': 'Paris', 
-        'CITY_003': 'New York',
-        'CITY_004': 'Tokyo',
-        'CITY_005': 'Barcelona',
-        'CITY_006': 'Amsterdam',
-        'CITY_007': 'Rome',
-        'CITY_008': 'Berlin',
-        'CITY_009': 'Prague',
-        'CITY_010': 'Vienna',
-        'CITY_011': 'Wellington'
+# How tagged requests pick their top hotels; see CityCatalog.top_k
+TOP_K_METHOD = os.environ.get('TOP_K_METHOD', 'index')
+if TOP_K_METHOD != 'index':
+    from scoring import TOP_K_METHODS
+    if TOP_K_METHOD not in TOP_K_METHODS:
+        logger.warning(f'Unknown TOP_K_METHOD {TOP_K_METHOD}, using index')
+        TOP_K_METHOD = 'index'
+
+# 'interactions' ranks on decayed engagement from the popularity aggregate table
+# instead of the static popularity_score loaded from hotels.csv
+POPULARITY_SOURCE = os.environ.get('POPULARITY_SOURCE', 'catalog')
+HOTEL_POPULARITY_TABLE = os.environ.get('HOTEL_POPULARITY_TABLE')
+
+# Binary per-city catalog snapshots published by data-ingestion, read from S3
+# (downloaded once to /tmp) or from a local directory; without either, cities
+# are always queried from DynamoDB
+CATALOG_SNAPSHOT_BUCKET = os.environ.get('CATALOG_SNAPSHOT_BUCKET')
+CATALOG_SNAPSHOT_DIR = os.environ.get('CATALOG_SNAPSHOT_DIR')
+
+# How long clients, CloudFront and the API Gateway cache may reuse a recommendation page
+RESPONSE_MAX_AGE_SECONDS = int(os.environ.get('RESPONSE_MAX_AGE_SECONDS', 60))
+
+# Most cities one city_ids request may rank together, and how many of them load from DynamoDB at once
+MULTI_CITY_MAX_CITIES = int(os.environ.get('MULTI_CITY_MAX_CITIES', 10))
+MULTI_CITY_WORKERS = int(os.environ.get('MULTI_CITY_WORKERS', 8))
+
+def to_json(obj):
+    # Any Decimal left in a hotel (there should be none) is written as a float
+    return orjson.dumps(obj, default=float).decode()
+
+def load_city_catalog(table_name, city_id, timer):
+    """Build a city's catalog from its snapshot for the current generation, or from the city index."""
+    generation = catalog_cache.version
+    if generation and (CATALOG_SNAPSHOT_DIR or CATALOG_SNAPSHOT_BUCKET):
+        try:
+            catalog = load_snapshot_catalog(generation, city_id)
+            timer.mark('snapshot_load')
+            if catalog is not None:
+                return catalog
+            logger.info(f'No catalog snapshot for {city_id} at generation {generation}')
+        except Exception as e:
+            logger.warning(f'Could not load catalog snapshot for {city_id}: {str(e)}')
+    return query_city_catalog(table_name, city_id, timer)
+
+def load_snapshot_catalog(generation, city_id):
+    from snapshot_loader import fetch_snapshot, open_snapshot
+    if CATALOG_SNAPSHOT_DIR:
+        path = os.path.join(CATALOG_SNAPSHOT_DIR, snapshot_key(generation, city_id))
+        if not os.path.exists(path):
+            return None
+    else:
+        path = fetch_snapshot(aws_clients.client('s3'), CATALOG_SNAPSHOT_BUCKET, generation, city_id)
+        if path is None:
+            return None
+    popularity = None
+    if POPULARITY_SOURCE == 'interactions' and HOTEL_POPULARITY_TABLE:
+        popularity = lambda hotel_ids: read_popularity(aws_clients.client('dynamodb'), HOTEL_POPULARITY_TABLE, hotel_ids)
+    try:
+        catalog, _ = open_snapshot(path, popularity)
+    except FileNotFoundError:
+        # Pruned by a thread fetching a later generation; the Query serves this one
+        return None
+    return catalog
+
+def query_city_catalog(table_name, city_id, timer):
+    """Query a city's hotels and build the columnar catalog used for scoring."""
+    from scoring import CityCatalog
+    dynamodb = aws_clients.client('dynamodb')
+    items = query_city_hotels(dynamodb, table_name, city_id)
+    timer.mark('dynamodb_read')
+    items.sort(key=catalog_order)
+    hotels = decode_hotels(items)
+    timer.mark('deserialize')
+    if POPULARITY_SOURCE == 'interactions' and HOTEL_POPULARITY_TABLE:
+        hotels.set_popularity(read_popularity(dynamodb, HOTEL_POPULARITY_TABLE, hotels.hotel_ids))
+        timer.mark('popularity_read')
+    catalog = CityCatalog(hotels)
+    timer.mark('catalog_build')
+    return catalog
+
+def get_catalog_version(table_name, timer):
+    """Read the catalog generation, returning None if DynamoDB is unavailable."""
+    try:
+        return read_catalog_version(aws_clients.client('dynamodb'), table_name)
+    except Exception as e:
+        logger.warning(f'Could not read catalog version: {str(e)}')
+        return None
+    finally:
+        timer.mark('version_check')
+
+# City IDs as in tools/cities.csv; without the cities table these resolve, and
+# so do the names of FALLBACK_CITIES
+CITY_ID_PATTERN = re.compile(r'CITY_\d+')
+
+# Cities reco_v1 resolved by name before it had a cities table, at their IDs in
+# tools/cities.csv, so they keep working while the table is empty or unreadable
+FALLBACK_CITIES = {
+    normalise(city_name): (city_id, city_name)
+    for city_id, city_name in (
+        ('CITY_001', 'New York'), ('CITY_002', 'London'), ('CITY_003', 'Paris'), ('CITY_004', 'Tokyo'),
+        ('CITY_009', 'Barcelona'), ('CITY_010', 'Rome'), ('CITY_011', 'Amsterdam'), ('CITY_012', 'Berlin'),
+        ('CITY_013', 'Vienna'), ('CITY_014', 'Prague')
+    )
+}
+
+# Cities an unknown-city response suggests
+SUGGESTED_CITIES = 5
+
+def get_city_index():
+    """The container's city index, or None without a cities table, when it cannot be read or while it is empty."""
+    table_name = os.environ.get('CITIES_TABLE')
+    if not table_name:
+        return None
+    try:
+        return city_cache.get(lambda: read_city_index(aws_clients.client('dynamodb'), table_name)) or None
+    except Exception as e:
+        logger.warning(f'Could not read the cities table: {str(e)}')
+        return None
+
+def resolve_city(city_input):
+    """Return (city_id, city_name) for a city ID or name; city_id is None if unknown."""
+    if not city_input:
+        return None, city_input
+    index = get_city_index()
+    if index is not None:
+        return index.resolve(city_input)
+    if CITY_ID_PATTERN.fullmatch(city_input.upper()):
+        return city_input.upper(), city_input.upper()
+    return FALLBACK_CITIES.get(normalise(city_input), (None, city_input))
+
+def suggest_cities(city_input):
+    """Names of cities to offer for an unknown one: those it is a prefix of, else the most popular."""
+    index = get_city_index()
+    if index is None:
+        return [city_name for _, city_name in FALLBACK_CITIES.values()][:SUGGESTED_CITIES]
+    cities = index.complete(city_input, SUGGESTED_CITIES) or index.complete('', SUGGESTED_CITIES)
+    return [city['city_name'] for city in cities]
+
+def cities_response(params):
+    """Autocomplete: the most popular cities matching the prefix parameter."""
+    headers = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Methods': 'GET,OPTIONS'
+    }
+    try:
+        limit = int(params.get('limit', MAX_COMPLETIONS))
+        if not 0 < limit <= MAX_COMPLETIONS:
+            return {'statusCode': 400, 'headers': headers,
+                    'body': json.dumps({'error': f'limit must be between 1 and {MAX_COMPLETIONS}'})}
+    except ValueError:
+        return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'error': 'limit must be a valid number'})}
+    index = get_city_index()
+    if index is None:
+        return {'statusCode': 503, 'headers': headers, 'body': json.dumps({'error': 'City lookup unavailable'})}
+    prefix = params.get('prefix', '')
+    cities = [
+        {'city_id': city['city_id'], 'city_name': city['city_name'], 'country_code': city.get('country_code')}
+        for city in index.complete(prefix, limit)
+    ]
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': json.dumps({'prefix': prefix, 'cities': cities, 'count': len(cities)})
+    }
+
+def rank_page(catalog, user_tags, k):
+    order, scores = catalog.top_k(user_tags, k, method=TOP_K_METHOD)
+    return order.tolist(), scores.tolist()
+
+def cache_headers(etag, cache_hit):
+    return {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Methods': 'GET,OPTIONS',
+        'Cache-Control': f'public, max-age={RESPONSE_MAX_AGE_SECONDS}',
+        'ETag': etag,
+        'X-Catalog-Cache': 'HIT' if cache_hit else 'MISS'
+    }
+
+def get_city_catalog(table_name, city_id, timer):
+    """Return (catalog, cache_hit); a miss marks the load's phases on timer."""
+    return catalog_cache.get(
+        city_id,
+        lambda cid: load_city_catalog(table_name, cid, timer),
+        lambda: get_catalog_version(table_name, timer)
+    )
+
+def load_city_recorded(table_name, city_id):
+    """load_city_catalog on a timer of its own, for loads running side by side."""
+    timer = PhaseTimer()
+    catalog = load_city_catalog(table_name, city_id, timer)
+    metrics.record(timer)
+    return catalog
+
+def multi_city_response(table_name, city_ids, user_tags, limit, offset, fields, request_headers, timer):
+    """One ranking across several cities: each city's top hotels, merged best first."""
+    headers = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type',
+        'Access-Control-Allow-Methods': 'GET,OPTIONS'
     }
-    
-    # Initialise the DynamoDB client connection
-    dynamodb = boto3.client('dynamodb')
+    city_inputs = list(dict.fromkeys(c.strip() for c in city_ids.split(',') if c.strip()))
+    if not city_inputs:
+        return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'error': 'city_ids must name at least one city'})}
+    if len(city_inputs) > MULTI_CITY_MAX_CITIES:
+        return {'statusCode': 400, 'headers': headers,
+                'body': json.dumps({'error': f'city_ids may name at most {MULTI_CITY_MAX_CITIES} cities'})}
+
+    cities = {}
+    unknown_cities = []
+    for city_input in city_inputs:
+        city_id, city_name = resolve_city(city_input)
+        if city_id:
+            cities.setdefault(city_id, city_name)
+        else:
+            unknown_cities.append(city_input)
+    timer.mark('city')
+
+    try:
+        # Cached cities are served as they are; the rest are queried concurrently
+        catalogs = catalog_cache.get_many(
+            list(cities),
+            lambda cid: load_city_recorded(table_name, cid),
+            lambda: get_catalog_version(table_name, timer),
+            MULTI_CITY_WORKERS
+        )
+    except Exception as e:
+        logger.error(f'Error querying DynamoDB: {str(e)}')
+        return {'statusCode': 500, 'headers': headers, 'body': json.dumps({'error': str(e)})}
+    timer.mark('catalog')
+
+    # No city can contribute more than the whole page, so each is ranked that deep (or reused from the response cache)
+    depth = offset + limit
+    pages = []
+    for city_id in cities:
+        catalog = catalogs[city_id][0]
+        if catalog.hotels:
+            key = cache_key(city_id, user_tags, depth)
+            pages.append(response_cache.get(key, catalog, lambda: rank_page(catalog, user_tags, key[-1] or depth))[0])
+    ranked = merge_ranked([page.scores for page in pages], depth)[offset:]
+    timer.mark('rank')
+
+    hotels = [pages[city].fragments(position, position + 1, to_json, fields)[0] for city, position in ranked]
+    body = (f'{{"cities":{to_json([{"city_id": c, "city_name": n} for c, n in cities.items()])},'
+            f'"unknown_cities":{to_json(unknown_cities)},'
+            f'"hotels":[{",".join(hotels)}],"count":{len(hotels)},"offset":{offset}}}')
+    etag = make_etag(body)
+    status = 200
+    if etag_matches(request_headers.get('If-None-Match') or request_headers.get('if-none-match'), etag):
+        status, body = 304, ''
+    timer.mark('serialize')
+    metrics.record(timer, {'multi_city_cities': len(cities)})
+    return {'statusCode': status, 'headers': cache_headers(etag, all(hit for _, hit in catalogs.values())), 'body': body}
+
+def batch_response(event, queries, timer):
+    """Answer a batch of queries; API Gateway POSTs get an HTTP response, other callers the results."""
+    table_name = os.environ.get('HOTELS_TABLE')
+    results = run_batch(queries, resolve_city, lambda city_id: get_city_catalog(table_name, city_id, timer)[0])
+    timer.mark('batch_rank')
+    if event.get('httpMethod') != 'POST':
+        response = {'results': results}
+    else:
+        response = {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+            },
+            'body': to_json({'results': results})
+        }
+        timer.mark('serialize')
+    metrics.record(timer, {'batch_queries': len(queries)})
+    return response
+
+@metrics.sampling
+def lambda_handler(event, context):
+    timer = PhaseTimer()
+    # Batches of queries come as a POST body, a direct invocation or SQS/Kinesis records
+    try:
+        queries = parse_batch_event(event)
+    except BatchError as e:
+        if event.get('httpMethod') == 'POST':
+            return {'statusCode': 400, 'body': json.dumps({'error': str(e)})}
+        raise
+    if queries is not None:
+        timer.mark('parse')
+        return batch_response(event, queries, timer)
 
     # Extract query parameters
     params = event.get("queryStringParameters") or {}
+    if event.get('path') == '/cities':
+        return cities_response(params)
     city_input = params.get('city_id') or params.get('city')
-    
-    # Handle both city names and city IDs
-    if city_input in CITY_NAMES:
-        city_id = city_input
-        city_name = CITY_NAMES[city_id]
-    else:
-        # Try to find city ID by name
-        city_id = None
-        city_name = city_input
-        for cid, cname in CITY_NAMES.items():
-            if cname.lower() == city_input.lower():
-                city_id = cid
-                city_name = cname
-                break
+
     try:
+        # Convert and validate limit; parameters come before the city lookup so malformed requests never reach AWS
+        try:
+            limit = int(params.get('limit', 10))
+            if limit <= 0:
+                return {'statusCode': 400, 'body': json.dumps({'error': 'limit must be a positive number'})}
+        except ValueError:
+            return {'statusCode': 400, 'body': json.dumps({'error': 'limit must be a valid number'})}
+
+        # Convert and validate offset
+        try:
+            offset = int(params.get('offset', 0))
+            if offset < 0:
+                return {'statusCode': 400, 'body': json.dumps({'error': 'offset must not be negative'})}
+        except ValueError:
+            return {'statusCode': 400, 'body': json.dumps({'error': 'offset must be a valid number'})}
+
+        user_tags = [t.strip() for t in params.get('user_tags', '').split(",") if t.strip()]
+
+        # Only these attributes of each hotel go into the response
+        try:
+            fields = parse_fields(params.get('fields'))
+        except ValueError as e:
+            return {'statusCode': 400, 'body': json.dumps({'error': str(e)})}
+        timer.mark('parse')
+
+        # Several comma-separated cities are ranked together, in place of city/city_id
+        city_ids = params.get('city_ids')
+
+        # Handle both city names and city IDs
+        city_id, city_name = resolve_city(city_input)
+        timer.mark('city')
         # Validate city_id
-        if not city_id:
+        if not city_id and city_ids is None:
+            suggestions = suggest_cities(city_input)
+            message = f'No hotels available in {city_input}.'
+            if suggestions:
+                message += f" Try: {', '.join(suggestions)}"
             return {
                 'statusCode': 200,
                 'headers': {
@@ -66,18 +383,10 @@ def lambda_handler(event, context):
                     'city': city_input,
                     'hotels': [],
                     'count': 0,
-                    'message': f'No hotels available in {city_input}. Try: London, Paris, New York, Tokyo, Barcelona, Amsterdam, Rome, Berlin, Prague, Vienna, Wellington'
+                    'message': message,
+                    'suggestions': suggestions
                 })
             }
-        # Convert and validate limit
-        try:
-            limit = int(params.get('limit', 10))
-            if limit <= 0:
-                return {'statusCode': 400, 'body': json.dumps({'error': 'limit must be a positive number'})}
-        except ValueError:
-            return {'statusCode': 400, 'body': json.dumps({'error': 'limit must be a valid number'})}
-        
-        user_tags = [t.strip() for t in params.get('user_tags', '').split(",") if t.strip()]
 
     except Exception as e:
         logger.error(f'Unexpected error in parameter processing: {str(e)}')
@@ -103,14 +412,12 @@ def lambda_handler(event, context):
             },
             'body': json.dumps({'error': 'Service configuration error'})
         }
+    if city_ids is not None:
+        return multi_city_response(table_name, city_ids, user_tags, limit, offset, fields, event.get('headers') or {}, timer)
     try:
-        # Scan DynamoDB table with city filter
-        response = dynamodb.scan(
-            TableName=table_name,
-            FilterExpression='#city_id = :city_value',
-            ExpressionAttributeNames={'#city_id':'city_id'},
-            ExpressionAttributeValues={':city_value': {'S':city_id}}
-        )
+        # Serve the city from the warm-container cache, querying the city index on a miss
+        catalog, cache_hit = get_city_catalog(table_name, city_id, timer)
+        timer.mark('catalog')
     except Exception as e:
         logger.error(f'Error querying DynamoDB: {str(e)}')
         return {
@@ -123,9 +430,7 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': str(e)})
         }  
 
-    # Extract hotels from DynamoDB response
-    items = response.get('Items', [])
-    if not items:
+    if not catalog.hotels:
         return {
             'statusCode': 200,
             'headers': {
@@ -141,60 +446,34 @@ def lambda_handler(event, context):
                 'message': 'No hotels found in this city'
                 })
             }
-    # Convert DynamoDB format to Python Dictionaries
-    deserializer = TypeDeserializer()
-    hotels = []
-    for item in items:
-        hotel = {k: deserializer.deserialize(v) for k, v in item.items()}
-        hotels.append(hotel)
-
-    # Calculate scoring for each hotel
-    for hotel in hotels:
-        # Extract hotel data with safe defaults and convert Decimals to float
-        rating = float(hotel.get('rating', 0))
-        popularity = float(hotel.get('popularity_score', 0))
-        hotel_tags = hotel.get('tags', '')
-        
-        # Convert all Decimal values to float for JSON serialization
-        for key, value in hotel.items():
-            if isinstance(value, Decimal):
-                hotel[key] = float(value)
-        
-        # Calculate each scoring component  
-        normalised_rating = (rating - 1) / 4
-        
-        # Calculate tag overlap
-        if user_tags:
-            hotel_tag_list = [tag.strip() for tag in hotel_tags.split(',') if tag.strip()]
-            matches = sum(1 for tag in user_tags if tag in hotel_tag_list)
-            tag_overlap_percentage = (matches / len(user_tags)) * 100
-        else:
-            tag_overlap_percentage = 100
-        
-        # Apply V1 formula
-        score = 0.5 * popularity + 0.3 * normalised_rating + 0.2 * (tag_overlap_percentage / 100)
-        
-        # Add score to hotel dictionary
-        hotel['recommendation_score'] = round(score, 4)
+    # The page is fixed by the catalog generation and the request, the same in every container:
+    # snapshot and Query-built catalogs hold the same hotels in catalog_order and serialise them
+    # alike. So a client holding it is answered before any ranking; live popularity moves scores
+    # within a generation, so then the ETag is taken from the body
+    request_headers = event.get('headers') or {}
+    if_none_match = request_headers.get('If-None-Match') or request_headers.get('if-none-match')
+    depth = offset + limit
+    key = cache_key(city_id, user_tags, depth)
+    etag = None
+    if POPULARITY_SOURCE == 'catalog' and catalog_cache.version is not None:
+        etag = make_etag(catalog_cache.version, city_id, city_name, key[1], offset, limit, fields)
+        if etag_matches(if_none_match, etag):
+            timer.mark('revalidate')
+            metrics.record(timer)
+            return {'statusCode': 304, 'headers': cache_headers(etag, cache_hit), 'body': ''}
 
-    # Sort hotels by recommendation score (highest first)
-    hotels.sort(key=lambda h: h['recommendation_score'], reverse=True)
-
-    # Apply limit parameter
-    hotels = hotels[:limit]
-
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
-            'Access-Control-Allow-Methods': 'GET,OPTIONS'
-        },
-        'body': json.dumps({
-            'city': city_name,
-            'city_id': city_id,
-            'hotels': hotels,
-            'count': len(hotels)
-        }, cls=DecimalEncoder)
-    }
+    # Rank as deep as the page's bucket, or reuse the ranking of an earlier request with the same key
+    page, page_hit = response_cache.get(key, catalog, lambda: rank_page(catalog, user_tags, key[-1] or depth))
+    timer.mark('rank')
 
+    hotels = page.fragments(offset, depth, to_json, fields)
+    body = (f'{{"city":{to_json(city_name)},"city_id":{to_json(city_id)},'
+            f'"hotels":[{",".join(hotels)}],"count":{len(hotels)},"offset":{offset}}}')
+    status = 200
+    if etag is None:
+        etag = make_etag(body)
+        if etag_matches(if_none_match, etag):
+            status, body = 304, ''
+    timer.mark('serialize')
+    metrics.record(timer, {'catalog_cache_hits': int(cache_hit), 'response_cache_hits': int(page_hit)})
+    return {'statusCode': status, 'headers': cache_headers(etag, cache_hit), 'body': body}
@@ -0,0 +1,20 @@
+import heapq
+from itertools import islice
+
+
+def merge_ranked(score_lists, k):
+    """The k best (city, position) pairs across several cities' rankings, best first.
+
+    score_lists holds each city's recommendation scores in its ranked order,
+    best first, as CityCatalog.top_k returns them. A k-way heap merge walks
+    them together, so only about k + len(score_lists) scores are compared.
+    Equal scores go to the city listed first, then to the hotel that city
+    ranked higher.
+    """
+    streams = [_ranked(scores, city) for city, scores in enumerate(score_lists)]
+    return [(city, position) for _, city, position in islice(heapq.merge(*streams), k)]
+
+
+def _ranked(scores, city):
+    for position, score in enumerate(scores):
+        yield -score, city, position
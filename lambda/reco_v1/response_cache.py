@@ -0,0 +1,103 @@
+import hashlib
+from collections import OrderedDict
+
+# Pages are ranked as deep as the smallest of these that covers offset + limit,
+# so nearby limits share one cache entry
+DEPTH_BUCKETS = (10, 20, 50, 100)
+
+
+def depth_bucket(depth):
+    """Ranking depth for a page ending at depth; None past the last bucket, which is not cached."""
+    for bucket in DEPTH_BUCKETS:
+        if depth <= bucket:
+            return bucket
+    return None
+
+
+def cache_key(city_id, user_tags, depth):
+    """Canonical key of a ranking: the resolved city, the tags in sorted order and the depth bucket.
+
+    Tags are sorted but repeats are kept: a repeated tag counts twice
+    towards the overlap score, so it changes the ranking.
+    """
+    return city_id, tuple(sorted(user_tags)), depth_bucket(depth)
+
+
+def make_etag(*parts):
+    """Strong ETag over the parts a response is fully determined by."""
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value names etag (weak comparison, as RFC 9110 asks for)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class RankedPage:
+    """The top hotels of one ranking, serialised to JSON one hotel at a time as pages ask for them.
+
+    Each fields projection (see hotel_records.parse_fields) keeps JSON of its own.
+    """
+
+    def __init__(self, catalog, order, scores):
+        self.catalog = catalog
+        self.order = order
+        self.scores = scores
+        self._fragments = {}
+
+    def fragments(self, start, stop, encode, fields=None):
+        """JSON of the hotels ranked start to stop, each with its recommendation_score, limited to fields when given."""
+        fragments = self._fragments.get(fields)
+        if fragments is None:
+            fragments = self._fragments[fields] = [None] * len(self.order)
+        for i in range(start, min(stop, len(fragments))):
+            if fragments[i] is None:
+                fragments[i] = encode(self.catalog.record(self.order[i], self.scores[i], fields))
+        return fragments[start:stop]
+
+
+class ResponseCache:
+    """Ranked pages of the most recently requested keys, kept across warm invocations.
+
+    An entry belongs to the catalog it was ranked from and is only served
+    while the catalog cache still holds that same catalog, so a reload or a
+    new catalog version drops it without a TTL of its own. Keys are evicted
+    least-recently-used past max_entries.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, catalog, rank):
+        """Return (page, hit) for key, calling rank() for (order, scores) on a miss."""
+        page = self._entries.get(key)
+        if page is not None and page.catalog is catalog:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return page, True
+
+        self.misses += 1
+        order, scores = rank()
+        page = RankedPage(catalog, order, scores)
+        if key[-1] is not None and self.max_entries > 0:
+            self._entries[key] = page
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return page, False
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
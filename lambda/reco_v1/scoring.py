@@ -0,0 +1,280 @@
+import heapq
+
+import numpy as np
+from hotel_records import HotelColumns
+from tag_index import TagIndex
+
+# Scores within this distance of a rounding midpoint are re-rounded with Python's round()
+ROUNDING_MIDPOINT_TOLERANCE = 1e-6
+
+# Strategies for tagged top-k requests: merge posting lists, the same with
+# early termination, or score every hotel
+TOP_K_METHODS = ('index', 'early_termination', 'scan')
+
+# Hotels examined per step of the early-termination walk
+EARLY_TERMINATION_CHUNK = 256
+
+# Upper bound on hotels x profiles scored in one block by top_k_many
+SCORE_BLOCK_ELEMENTS = 1 << 22
+
+# Largest city top_k_many scores densely. Beyond roughly this size, scoring
+# every hotel for every profile costs more than top_k's index lookups.
+DENSE_SCORING_MAX_HOTELS = 1000
+
+
+class CityCatalog:
+    """One city's hotels held as columns for batched V1 scoring.
+
+    rating and popularity are float64 arrays and each hotel's tags are a row of
+    a uint64 bitset over the city's tag vocabulary, with an inverted TagIndex
+    over the same tags. The tag-independent part of the score is computed once,
+    when the catalog is built, along with the full ranking for requests without
+    user tags, which never changes between loads, and the ranking of hotels that
+    match none of the user's tags. hotels is a HotelColumns, whose vocabulary
+    and number columns are used as they are; a list of hotel dicts is turned
+    into one first, with tag_lists, if given, holding each hotel's tags
+    already split instead of reading the comma-separated tags attribute.
+    """
+
+    def __init__(self, hotels, tag_lists=None):
+        if not isinstance(hotels, HotelColumns):
+            hotels = HotelColumns.from_dicts(hotels, tag_lists)
+        self.hotels = hotels
+        count = len(hotels)
+        self.rating = np.frombuffer(hotels.rating, dtype=np.float64)
+        self.popularity = np.frombuffer(hotels.popularity, dtype=np.float64)
+
+        # Every distinct tag already has an id, its column in the bitset; a tag
+        # listed twice on a hotel still matches once
+        self.tag_ids = hotels.tag_ids
+        num_tags = len(self.tag_ids)
+        width = max(1, num_tags)
+        tag_counts = np.diff(np.frombuffer(hotels.tag_offsets, dtype=np.uint32))
+        hotel_rows = np.repeat(np.arange(count, dtype=np.int64), tag_counts)
+        # Unique (hotel, tag) pairs, in hotel order
+        pairs = np.unique(hotel_rows * width + np.frombuffer(hotels.tags, dtype=np.uint32))
+        rows = pairs // width
+        columns = (pairs % width).astype(np.uint64)
+        self.tag_index = TagIndex(rows, columns, num_tags)
+        self.tag_bits = np.zeros((count, max(1, (num_tags + 63) // 64)), dtype=np.uint64)
+        np.bitwise_or.at(self.tag_bits, (rows, (columns >> np.uint64(6)).astype(np.intp)),
+                         np.left_shift(np.uint64(1), columns & np.uint64(63)))
+        self._precompute()
+
+    @classmethod
+    def from_columns(cls, hotels, rating, popularity, tag_ids, tag_bits, tag_index):
+        """Build a catalog from ready-made columns, e.g. arrays mapped from a snapshot file.
+
+        The arrays are used as given, without copying; hotels needs len(),
+        indexing and project(row, fields) as HotelColumns has them.
+        """
+        catalog = cls.__new__(cls)
+        catalog.hotels = hotels
+        catalog.rating = rating
+        catalog.popularity = popularity
+        catalog.tag_ids = tag_ids
+        catalog.tag_bits = tag_bits
+        catalog.tag_index = tag_index
+        catalog._precompute()
+        return catalog
+
+    def _precompute(self):
+        self._dense_tags = None
+
+        # Same operation order as 0.5 * popularity + 0.3 * normalised_rating + 0.2 * overlap
+        self.base_score = 0.5 * self.popularity + 0.3 * ((self.rating - 1) / 4)
+
+        # Without user tags every hotel gets the full overlap bonus, so this ranking is static
+        self.default_order, default_scores = self.rank([])
+        self.default_scores = default_scores[self.default_order]
+
+        # Hotels matching no user tag score exactly base_score, so their order is static too
+        self.base_rounded = round_scores(self.base_score)
+        self.base_order = np.argsort(-self.base_rounded, kind='stable')
+
+    def __len__(self):
+        return len(self.hotels)
+
+    def record(self, row, score, fields=None):
+        """The hotel at row as a response dict with its recommendation_score, limited to fields when given."""
+        hotel = self.hotels.project(row, fields)
+        if fields is None or 'recommendation_score' in fields:
+            hotel['recommendation_score'] = score
+        return hotel
+
+    def tag_matches(self, user_tags, rows=slice(None)):
+        """Number of user_tags each hotel in rows carries (repeated user tags count each time)."""
+        tag_bits = self.tag_bits[rows]
+        matches = np.zeros(len(tag_bits), dtype=np.uint64)
+        for tag in user_tags:
+            tag_id = self.tag_ids.get(tag)
+            if tag_id is None:
+                continue
+            matches += (tag_bits[:, tag_id >> 6] >> np.uint64(tag_id & 63)) & np.uint64(1)
+        return matches
+
+    def score(self, user_tags):
+        """Rounded V1 score for every hotel, identical to scoring them one at a time."""
+        if user_tags:
+            tag_overlap_percentage = (self.tag_matches(user_tags).astype(np.float64) / len(user_tags)) * 100
+        else:
+            tag_overlap_percentage = 100
+        return round_scores(self.base_score + 0.2 * (tag_overlap_percentage / 100))
+
+    def rank(self, user_tags):
+        """Return (order, scores): hotel positions by descending score, ties in catalog order."""
+        scores = self.score(user_tags)
+        return np.argsort(-scores, kind='stable'), scores
+
+    def top_k(self, user_tags, k, method='index'):
+        """Return (order, scores): the first k positions of rank(user_tags) and their scores.
+
+        Requests without tags are served from the precomputed ranking. Tagged
+        requests use one of TOP_K_METHODS:
+
+        index             merge the posting lists of the user's tags, score only
+                          hotels with a match and fill the rest of the page from
+                          the precomputed ranking of hotels without one
+        early_termination walk hotels in descending base score, scoring them a
+                          chunk at a time from the tag bitset, and stop once no
+                          remaining hotel can beat the current k-th score
+        scan              score every hotel and partition around the k-th score
+        """
+        if not user_tags:
+            return self.default_order[:k], self.default_scores[:k]
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        if method == 'scan' or k >= len(self.hotels):
+            return self._top_k_scan(user_tags, k)
+
+        if method == 'early_termination':
+            return self._top_k_early_termination(user_tags, k)
+
+        tag_ids = [self.tag_ids[tag] for tag in user_tags if tag in self.tag_ids]
+        matched, match_counts = self.tag_index.match_counts(tag_ids)
+        matched_scores = round_scores(self.base_score[matched] + self._overlap_bonus(match_counts, len(user_tags)))
+        return self._top_k_index(matched, matched_scores, k)
+
+    def top_k_many(self, profiles, ks):
+        """top_k for many tag profiles at once, returning one (order, scores) per profile.
+
+        In cities of up to DENSE_SCORING_MAX_HOTELS hotels, tagged profiles are
+        scored together in blocks: one matrix product counts every profile's
+        matches against every hotel, and rounding and selection run over the
+        whole block. Larger cities, where a profile's posting lists touch far
+        fewer hotels than the city holds, use top_k per profile. Results are
+        identical to calling top_k for each profile.
+        """
+        results = [None] * len(profiles)
+        tagged = []
+        for i, (user_tags, k) in enumerate(zip(profiles, ks)):
+            if user_tags and 0 < k < len(self.hotels) and len(self.hotels) <= DENSE_SCORING_MAX_HOTELS:
+                tagged.append(i)
+            else:
+                results[i] = self.top_k(user_tags, k)
+        if not tagged:
+            return results
+
+        tag_matrix = self._tag_matrix()
+        rows = np.arange(len(self.hotels), dtype=np.int64)
+        block_size = max(1, SCORE_BLOCK_ELEMENTS // len(self.hotels))
+        for start in range(0, len(tagged), block_size):
+            block = tagged[start:start + block_size]
+            tag_counts = np.zeros((len(block), len(self.tag_ids)))
+            for row, i in enumerate(block):
+                for tag in profiles[i]:
+                    tag_id = self.tag_ids.get(tag)
+                    if tag_id is not None:
+                        tag_counts[row, tag_id] += 1
+
+            # profiles x hotels, each profile's scores contiguous
+            matches = tag_counts @ tag_matrix
+            num_user_tags = np.array([[len(profiles[i])] for i in block], dtype=np.float64)
+            scores = round_scores(self.base_score + self._overlap_bonus(matches, num_user_tags))
+
+            # Scores have 4 decimals, so (-score * 1e4) * hotels + row is a unique integer
+            # key that orders hotels by score and then catalog position, like rank()
+            keys = np.rint(scores * -1e4).astype(np.int64) * len(self.hotels) + rows
+            block_ks = np.array([ks[i] for i in block])
+            for k in np.unique(block_ks).tolist():
+                group = np.flatnonzero(block_ks == k)
+                group_keys = keys[group]
+                top = np.argpartition(group_keys, k - 1, axis=1)[:, :k]
+                top = np.take_along_axis(top, np.argsort(np.take_along_axis(group_keys, top, axis=1), axis=1), axis=1)
+                for row, order in zip(group.tolist(), top):
+                    results[block[row]] = (order, scores[row, order])
+        return results
+
+    def _tag_matrix(self):
+        """tags x hotels 0/1 matrix, built on first use by top_k_many."""
+        if self._dense_tags is None:
+            self._dense_tags = np.zeros((len(self.tag_ids), len(self.hotels)))
+            for tag_id, posting in enumerate(self.tag_index.postings):
+                self._dense_tags[tag_id, posting] = 1.0
+        return self._dense_tags
+
+    def _overlap_bonus(self, matches, num_user_tags):
+        return 0.2 * (((matches / num_user_tags) * 100) / 100)
+
+    def _top_k_scan(self, user_tags, k):
+        scores = self.score(user_tags)
+        if k >= len(scores):
+            order = np.argsort(-scores, kind='stable')
+            return order, scores[order]
+
+        negated = -scores
+        kth_score = np.partition(negated, k - 1)[k - 1]
+        # Candidates stay in catalog order, so the stable sort breaks ties exactly like rank()
+        candidates = np.flatnonzero(negated <= kth_score)
+        order = candidates[np.argsort(negated[candidates], kind='stable')][:k]
+        return order, scores[order]
+
+    def _top_k_index(self, matched, matched_scores, k):
+        # The best k hotels without a match come first in base_order once matched ones are skipped
+        unmatched = self.base_order[:k + len(matched)]
+        unmatched = unmatched[~np.isin(unmatched, matched, assume_unique=True)][:k]
+
+        rows = np.concatenate([matched, unmatched])
+        scores = np.concatenate([matched_scores, self.base_rounded[unmatched]])
+        # Highest score first, ties in catalog order
+        order = np.lexsort((rows, -scores))[:k]
+        return rows[order], scores[order]
+
+    def _top_k_early_termination(self, user_tags, k):
+        # No hotel can match more than the user tags the city knows about
+        max_matches = sum(1 for tag in user_tags if tag in self.tag_ids)
+        # base_order is sorted on rounded base scores, so allow for rounding on both sides
+        slack = self._overlap_bonus(max_matches, len(user_tags)) + 2e-4
+
+        # Min-heap of (score, -row): the root is the current k-th hotel
+        heap = []
+        for start in range(0, len(self.base_order), EARLY_TERMINATION_CHUNK):
+            chunk = self.base_order[start:start + EARLY_TERMINATION_CHUNK]
+            if len(heap) == k and self.base_rounded[chunk[0]] + slack < heap[0][0]:
+                break
+            bonus = self._overlap_bonus(self.tag_matches(user_tags, chunk).astype(np.float64), len(user_tags))
+            chunk_scores = round_scores(self.base_score[chunk] + bonus)
+            for row, score in zip(chunk.tolist(), chunk_scores.tolist()):
+                entry = (score, -row)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        ranked = sorted(heap, reverse=True)
+        return (np.array([-row for _, row in ranked], dtype=np.intp),
+                np.array([score for score, _ in ranked], dtype=np.float64))
+
+
+def round_scores(scores):
+    """Round to 4 decimals with exactly the results of Python's round().
+
+    np.round scales by 10**4 before rounding, which can land on the other side
+    of a midpoint than round() does; those few values are redone in Python.
+    """
+    rounded = np.round(scores, 4)
+    scaled = scores * 1e4
+    near_midpoint = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < ROUNDING_MIDPOINT_TOLERANCE)
+    for i in near_midpoint:
+        rounded.flat[i] = round(float(scores.flat[i]), 4)
+    return rounded
@@ -0,0 +1,145 @@
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+from catalog_snapshot import STRING_COLUMNS, parse_header, snapshot_key
+from hotel_records import HOTEL_ATTRIBUTES
+from scoring import CityCatalog
+from tag_index import TagIndex
+
+# Downloaded snapshots live under here, at their S3 keys, for the lifetime of the container
+SNAPSHOT_CACHE_DIR = '/tmp'
+
+# Multi-city requests fetch snapshots on several threads; one of them prunes at a time
+_prune_lock = threading.Lock()
+
+# Every column of a snapshot hotel, in the order records list them: the same
+# as a hotel loaded through the city index, so both serialise alike
+HOTEL_FIELDS = tuple(name for name in HOTEL_ATTRIBUTES if name in STRING_COLUMNS or name in ('rating', 'popularity_score'))
+
+
+class SnapshotHotels:
+    """Read-only sequence of hotel dicts backed by a mapped snapshot.
+
+    Records are built on access, so only the hotels a response actually
+    returns are ever turned into Python objects.
+    """
+
+    def __init__(self, columns, popularity, string_offsets, string_data):
+        self._columns = columns
+        self._popularity = popularity
+        self._string_offsets = string_offsets
+        self._string_data = string_data
+
+    def __len__(self):
+        return len(self._popularity)
+
+    def __getitem__(self, row):
+        return self.project(row)
+
+    def project(self, row, fields=None):
+        """The hotel at row as a dict of fields (other names are skipped), or of every column."""
+        if fields is None:
+            fields = HOTEL_FIELDS
+        hotel = {}
+        for name in fields:
+            if name == 'rating':
+                hotel[name] = float(self._columns['rating'][row])
+            elif name == 'popularity_score':
+                hotel[name] = float(self._popularity[row])
+            elif name == 'tags':
+                # Stripped and without empty entries, as HotelColumns returns them
+                tags = self.string(self._columns[name][row]).split(',')
+                hotel[name] = ','.join([tag for tag in map(str.strip, tags) if tag])
+            elif name in STRING_COLUMNS:
+                hotel[name] = self.string(self._columns[name][row])
+        return hotel
+
+    def string(self, index):
+        start = int(self._string_offsets[index])
+        end = int(self._string_offsets[index + 1])
+        return bytes(self._string_data[start:end]).decode('utf-8')
+
+
+def open_snapshot(path, popularity=None):
+    """Map a snapshot file and return (CityCatalog, generation) over its arrays.
+
+    popularity, a callable taking the list of hotel ids and returning
+    {hotel_id: score}, replaces the stored popularity column (hotels it
+    leaves out get 0.0); it is the only column that is copied.
+    """
+    with open(path, 'rb') as f:
+        # The mapping stays valid after the file is closed
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    header, sections = parse_header(buffer)
+    arrays = {
+        name: np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+        for name, (offset, dtype, count) in sections.items()
+    }
+
+    strings = SnapshotHotels(arrays, arrays['popularity'], arrays['string_offsets'], arrays['string_data'])
+    tag_names = [strings.string(index) for index in arrays['tag_names'].tolist()]
+    popularity_column = arrays['popularity']
+    if popularity is not None:
+        hotel_ids = [strings.string(index) for index in arrays['hotel_id'].tolist()]
+        live = popularity(hotel_ids)
+        popularity_column = np.fromiter((live.get(hotel_id, 0.0) for hotel_id in hotel_ids),
+                                        dtype=np.float64, count=len(hotel_ids))
+    hotels = SnapshotHotels(arrays, popularity_column, arrays['string_offsets'], arrays['string_data'])
+
+    catalog = CityCatalog.from_columns(
+        hotels,
+        rating=arrays['rating'],
+        popularity=popularity_column,
+        tag_ids={tag: tag_id for tag_id, tag in enumerate(tag_names)},
+        tag_bits=arrays['tag_bits'].reshape(header['hotels'], header['tag_words']),
+        tag_index=TagIndex.from_postings(arrays['postings'], arrays['posting_offsets'])
+    )
+    return catalog, header['generation']
+
+
+def fetch_snapshot(s3, bucket_name, generation, city_id, cache_dir=SNAPSHOT_CACHE_DIR):
+    """Return the local path of a city's snapshot, downloading it on first use.
+
+    Returns None when no snapshot was published for this generation.
+    """
+    key = snapshot_key(generation, city_id)
+    path = os.path.join(cache_dir, key)
+    if os.path.exists(path):
+        return path
+    generation_dir = os.path.dirname(path)
+    with _prune_lock:
+        if not os.path.isdir(generation_dir):
+            prune_snapshots(os.path.dirname(generation_dir), generation)
+            os.makedirs(generation_dir, exist_ok=True)
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=key)
+    except s3.exceptions.NoSuchKey:
+        return None
+    try:
+        # Written under a name of its own, so a concurrent reader never maps half a
+        # file and threads fetching the same city never write into one file
+        with tempfile.NamedTemporaryFile(dir=generation_dir, suffix='.partial', delete=False) as f:
+            for chunk in response['Body'].iter_chunks(1024 * 1024):
+                f.write(chunk)
+        os.replace(f.name, path)
+    except FileNotFoundError:
+        # A fetch for a later generation pruned this one meanwhile
+        return None
+    return path
+
+
+def prune_snapshots(snapshots_dir, generation):
+    """Delete the downloaded snapshots of generations before generation.
+
+    /tmp is small and they are never read again; later generations, which a
+    thread may still be fetching, are kept.
+    """
+    if not os.path.isdir(snapshots_dir):
+        return
+    for name in os.listdir(snapshots_dir):
+        if name.isdigit() and int(name) < generation:
+            shutil.rmtree(os.path.join(snapshots_dir, name), ignore_errors=True)
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+class TagIndex:
+    """Inverted index from tag id to the sorted positions of the hotels carrying it."""
+
+    def __init__(self, rows, tag_columns, num_tags):
+        # A stable sort by tag keeps each posting list in ascending hotel order
+        tag_columns = np.asarray(tag_columns, dtype=np.intp)
+        by_tag = np.argsort(tag_columns, kind='stable')
+        sorted_rows = np.asarray(rows, dtype=np.intp)[by_tag]
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(tag_columns, minlength=num_tags))))
+        self.postings = _split(sorted_rows, offsets)
+
+    @classmethod
+    def from_postings(cls, postings, offsets):
+        """Wrap concatenated posting lists (tag by tag) and their num_tags + 1 start offsets."""
+        index = cls.__new__(cls)
+        index.postings = _split(postings, offsets)
+        return index
+
+    def posting_length(self, tag_ids):
+        return sum(len(self.postings[tag_id]) for tag_id in tag_ids)
+
+    def match_counts(self, tag_ids):
+        """Merge the posting lists of tag_ids into (hotel positions, match counts).
+
+        Only hotels with at least one match are returned, in ascending position.
+        Repeated tag ids count once per repetition.
+        """
+        lists = [self.postings[tag_id] for tag_id in tag_ids]
+        if not lists:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        if len(lists) == 1:
+            return lists[0], np.ones(len(lists[0]), dtype=np.intp)
+        return np.unique(np.concatenate(lists), return_counts=True)
+
+
+def _split(rows, offsets):
+    offsets = offsets.tolist()
+    return [rows[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
@@ -0,0 +1,31 @@
+import heapq
+import os
+
+# Only this many of the user's most recent hotels seed the candidates, which
+# bounds request-time reads to that many neighbour lists
+MAX_RECENT_HOTELS = int(os.environ.get('RECO_V2_MAX_RECENT_HOTELS', 20))
+
+# Each older hotel in the history counts this much less than the one after it
+RECENCY_DECAY = float(os.environ.get('RECO_V2_RECENCY_DECAY', 0.8))
+
+
+def merge_neighbours(recent_hotels, neighbour_lists, k, city_id=None, decay=RECENCY_DECAY):
+    """Score candidates from the neighbour lists of a user's recent hotels.
+
+    recent_hotels is most recent first; neighbour_lists maps a hotel to its
+    [(hotel_id, city_id, similarity), ...]. A candidate scores the sum of its
+    similarity to each recent hotel, weighted decay ** age. Hotels already in
+    the history are left out, as are other cities when city_id is given.
+    Returns the k best [(hotel_id, score), ...], highest score first and ties
+    by hotel_id.
+    """
+    seen = set(recent_hotels)
+    scores = {}
+    weight = 1.0
+    for hotel_id in recent_hotels:
+        for neighbour_id, neighbour_city, similarity in neighbour_lists.get(hotel_id, ()):
+            if neighbour_id in seen or (city_id and neighbour_city != city_id):
+                continue
+            scores[neighbour_id] = scores.get(neighbour_id, 0.0) + weight * similarity
+        weight *= decay
+    return heapq.nsmallest(k, scores.items(), key=lambda entry: (-entry[1], entry[0]))
@@ -0,0 +1,134 @@
+import os
+import logging
+import orjson
+import aws_clients
+from batch_get import batch_get_items
+from candidates import MAX_RECENT_HOTELS, merge_neighbours
+from hotel_records import HOTEL_ATTRIBUTES, decode_item
+from item_cache import ItemCache
+from metrics import Metrics, PhaseTimer
+from neighbours import read_neighbours
+from user_history import UserHistoryCache, read_user_history, recent_hotels as history_hotels
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# The DynamoDB client comes from aws_clients on first use, so requests
+# rejected on their parameters never import boto3
+
+# Neighbour lists only change when the index is rebuilt, hotel records when hotels.csv is reloaded
+neighbour_cache = ItemCache(
+    max_items=int(os.environ.get('NEIGHBOUR_CACHE_MAX_HOTELS', 50000)),
+    ttl_seconds=float(os.environ.get('NEIGHBOUR_CACHE_TTL_SECONDS', 600))
+)
+hotel_cache = ItemCache(
+    max_items=int(os.environ.get('HOTEL_CACHE_MAX_HOTELS', 50000)),
+    ttl_seconds=float(os.environ.get('HOTEL_CACHE_TTL_SECONDS', 300))
+)
+# Short-lived, so a user's new interactions count within a minute
+history_cache = UserHistoryCache(
+    max_users=int(os.environ.get('HISTORY_CACHE_MAX_USERS', 10000)),
+    ttl_seconds=float(os.environ.get('HISTORY_CACHE_TTL_SECONDS', 60))
+)
+# Request phases as EMF metrics, each document carrying the caches' stats
+metrics = Metrics('reco_v2', properties=lambda: {'neighbour_cache': neighbour_cache.stats(),
+                                                 'hotel_cache': hotel_cache.stats(),
+                                                 'history_cache': history_cache.stats()})
+
+# Interactions read per user; repeat visits to a hotel collapse, so this is more than MAX_RECENT_HOTELS
+HISTORY_LENGTH = int(os.environ.get('RECO_V2_HISTORY_LENGTH', 50))
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type',
+    'Access-Control-Allow-Methods': 'GET,OPTIONS'
+}
+
+def respond(status_code, body):
+    return {'statusCode': status_code, 'headers': CORS_HEADERS, 'body': orjson.dumps(body).decode()}
+
+def read_hotels(table_name, hotel_ids):
+    """Return {hotel_id: hotel dict} for the hotels that exist, numbers as floats."""
+    names = {f'#a{i}': attr for i, attr in enumerate(HOTEL_ATTRIBUTES)}
+    hotels = {}
+    for item in batch_get_items(aws_clients.client('dynamodb'), table_name, [{'hotel_id': {'S': hotel_id}} for hotel_id in hotel_ids],
+                                projection=', '.join(names), attribute_names=names):
+        hotel = decode_item(item)
+        hotels[hotel['hotel_id']] = hotel
+    return hotels
+
+def get_recent_hotels(user_id):
+    """The user's most recent distinct hotels, from the interactions user index."""
+    table_name = os.environ.get('USER_INTERACTIONS_TABLE')
+    history, _ = history_cache.get(
+        user_id, HISTORY_LENGTH, lambda uid, limit: read_user_history(aws_clients.client('dynamodb'), table_name, uid, limit))
+    return history_hotels(history, MAX_RECENT_HOTELS)
+
+@metrics.sampling
+def lambda_handler(event, context):
+    timer = PhaseTimer()
+    params = event.get("queryStringParameters") or {}
+
+    # The user's recently viewed or booked hotels, most recent first; passed in, or read from their history
+    recent_hotels = list(dict.fromkeys(h.strip() for h in params.get('recent_hotels', '').split(',') if h.strip()))
+    recent_hotels = recent_hotels[:MAX_RECENT_HOTELS]
+    user_id = params.get('user_id') or None
+    if not recent_hotels and not user_id:
+        return respond(400, {'error': 'user_id or recent_hotels is required'})
+    city_id = params.get('city_id') or None
+
+    try:
+        limit = int(params.get('limit', 10))
+        if limit <= 0:
+            return respond(400, {'error': 'limit must be a positive number'})
+    except ValueError:
+        return respond(400, {'error': 'limit must be a valid number'})
+    try:
+        offset = int(params.get('offset', 0))
+        if offset < 0:
+            return respond(400, {'error': 'offset must not be negative'})
+    except ValueError:
+        return respond(400, {'error': 'offset must be a valid number'})
+
+    neighbours_table = os.environ.get('HOTEL_NEIGHBOURS_TABLE')
+    hotels_table = os.environ.get('HOTELS_TABLE')
+    if not neighbours_table or not hotels_table:
+        logger.error('HOTEL_NEIGHBOURS_TABLE and HOTELS_TABLE must be set')
+        return respond(500, {'error': 'Service configuration error'})
+
+    timer.mark('parse')
+
+    try:
+        if not recent_hotels:
+            recent_hotels = get_recent_hotels(user_id)
+            timer.mark('history')
+        # Request-time reads are bounded: one neighbour list per recent hotel, one record per returned hotel
+        neighbour_lists = neighbour_cache.get_many(
+            recent_hotels, lambda hotel_ids: read_neighbours(aws_clients.client('dynamodb'), neighbours_table, hotel_ids))
+        ranked = merge_neighbours(recent_hotels, neighbour_lists, offset + limit, city_id)[offset:]
+        timer.mark('neighbours')
+        records = hotel_cache.get_many(
+            [hotel_id for hotel_id, _ in ranked], lambda hotel_ids: read_hotels(hotels_table, hotel_ids))
+        timer.mark('hotels')
+    except Exception as e:
+        logger.error(f'Error reading from DynamoDB: {str(e)}')
+        return respond(500, {'error': str(e)})
+
+    # Cached records are shared, so scores go into copies
+    hotels = [{**records[hotel_id], 'recommendation_score': round(score, 4)}
+              for hotel_id, score in ranked if hotel_id in records]
+    body = {
+        'user_id': user_id,
+        'recent_hotels': recent_hotels,
+        'city_id': city_id,
+        'hotels': hotels,
+        'count': len(hotels),
+        'offset': offset
+    }
+    if not hotels:
+        body['message'] = 'No hotels similar to the recent ones yet'
+    response = respond(200, body)
+    timer.mark('serialize')
+    metrics.record(timer)
+    return response
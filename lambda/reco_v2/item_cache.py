@@ -0,0 +1,54 @@
+import time
+from collections import OrderedDict
+
+
+class ItemCache:
+    """Per-key values (neighbour lists, hotel records) kept across warm invocations.
+
+    Keys are evicted least-recently-used past max_items and expire after
+    ttl_seconds. Misses are loaded together, so one request costs at most one
+    round of batch reads however many of its keys are cold. Keys the loader
+    does not return are cached as missing too, so unknown hotels are not
+    looked up again on every request.
+    """
+
+    def __init__(self, max_items, ttl_seconds, clock=time.monotonic):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get_many(self, keys, load_many):
+        """Return {key: value} for the keys that have a value, calling load_many(missing_keys) once."""
+        now = self.clock()
+        found, missing = {}, []
+        for key in dict.fromkeys(keys):
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if entry[0] is not None:
+                    found[key] = entry[0]
+            else:
+                missing.append(key)
+
+        if missing:
+            self.misses += len(missing)
+            loaded = load_many(missing)
+            for key in missing:
+                value = loaded.get(key)
+                self._entries[key] = (value, now)
+                self._entries.move_to_end(key)
+                if value is not None:
+                    found[key] = value
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+        return found
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'items': len(self._entries)}
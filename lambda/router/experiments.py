@@ -0,0 +1,92 @@
+import bisect
+import hashlib
+import time
+
+# Users are split into this many buckets; a variant's weight is its share of them
+BUCKETS = 10000
+
+
+class Experiment:
+    """Traffic split for one route, from its experiment-config item.
+
+    The item is {'route': S, 'variants': M of variant name to weight (N),
+    'control': S, 'salt': S}. Weights need not add up to anything in
+    particular. Requests without a user go to control (default: the first
+    variant by name); salt (default: the route) reshuffles users when a new
+    experiment starts on the same route.
+    """
+
+    def __init__(self, route, variants, control=None, salt=None):
+        if not variants or any(weight < 0 for weight in variants.values()) or not sum(variants.values()):
+            raise ValueError(f'experiment for {route} needs variants with positive weights')
+        self.route = route
+        self.names = sorted(variants)
+        self.control = control if control in variants else self.names[0]
+        self.salt = salt or route
+        # Upper bucket bound of each variant, so assignment is one bisect
+        total = sum(variants.values())
+        running = 0.0
+        self.bounds = []
+        for name in self.names:
+            running += variants[name]
+            self.bounds.append(round(BUCKETS * running / total))
+
+    @classmethod
+    def from_item(cls, item):
+        variants = {name: float(value['N']) for name, value in item['variants']['M'].items()}
+        return cls(item['route']['S'], variants, item.get('control', {}).get('S'), item.get('salt', {}).get('S'))
+
+    def assign(self, user_id):
+        """Variant for a user; the same user always gets the same one while the split is unchanged."""
+        if not user_id:
+            return self.control
+        return self.names[bisect.bisect_right(self.bounds, bucket(self.salt, user_id))]
+
+
+def bucket(salt, user_id):
+    """Stable bucket in [0, BUCKETS) for a user, the same in every container and runtime."""
+    digest = hashlib.blake2b(f'{salt}:{user_id}'.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % BUCKETS
+
+
+def read_experiment(dynamodb, table_name, route):
+    """Return the route's Experiment, or None when it has no config item."""
+    item = dynamodb.get_item(TableName=table_name, Key={'route': {'S': route}}).get('Item')
+    return Experiment.from_item(item) if item else None
+
+
+class ExperimentCache:
+    """Experiment configs per route, kept across warm invocations and re-read every ttl_seconds.
+
+    A route without a config is cached as None just the same. When a refresh
+    fails the previous config stays in use until the next attempt.
+    """
+
+    def __init__(self, ttl_seconds, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._entries = {}
+
+    def get(self, route, read):
+        now = self.clock()
+        entry = self._entries.get(route)
+        if entry is not None and now - entry[1] < self.ttl_seconds:
+            return entry[0]
+        try:
+            experiment = read(route)
+            self.refreshes += 1
+        except Exception:
+            self.refresh_errors += 1
+            if entry is None:
+                raise
+            experiment = entry[0]
+        self._entries[route] = (experiment, now)
+        return experiment
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {'routes': len(self._entries), 'refreshes': self.refreshes, 'refresh_errors': self.refresh_errors}
@@ -1,12 +1,80 @@
+import os
 import json
+import logging
+import time
+import aws_clients
+from experiments import ExperimentCache, read_experiment
+from metrics import Metrics
+from variants import VariantMetrics, VariantRegistry
 
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Created once per container so warm invocations reuse them; the DynamoDB
+# client comes from aws_clients on the first experiment read, so /health
+# never imports boto3
+experiments = ExperimentCache(ttl_seconds=float(os.environ.get('EXPERIMENT_CONFIG_TTL_SECONDS', 60)))
+variants = VariantRegistry()
+# Requests and latency per variant, as EMF metrics with a Variant dimension
+variant_metrics = VariantMetrics('router')
+# Only used to profile PROFILE_SAMPLE_RATE of requests
+metrics = Metrics('router')
+
+# Variant serving a route that has no experiment config
+DEFAULT_VARIANTS = {
+    '/recommendations': 'reco_v1',
+    '/recommendations/personalised': 'reco_v2'
+}
+
+def get_experiment(route):
+    """The route's experiment, or None without a config or when it cannot be read."""
+    table_name = os.environ.get('EXPERIMENT_CONFIG_TABLE')
+    if not table_name:
+        return None
+    try:
+        return experiments.get(route, lambda r: read_experiment(aws_clients.client('dynamodb'), table_name, r))
+    except Exception as e:
+        logger.warning(f'Could not read experiment config for {route}: {str(e)}')
+        return None
+
+def choose_variant(route, user_id):
+    experiment = get_experiment(route)
+    if experiment is None:
+        return DEFAULT_VARIANTS[route]
+    variant = experiment.assign(user_id)
+    if variant not in variants:
+        logger.warning(f'Experiment on {route} names unknown variant {variant}, using {DEFAULT_VARIANTS[route]}')
+        return DEFAULT_VARIANTS[route]
+    return variant
+
+@metrics.sampling
 def lambda_handler(event, context):
     if event.get('path') == '/health':
         return {
             'statusCode': 200,
             'body': json.dumps({'status': 'healthy'})
         }
-    
+
+    route = event.get('resource') or event.get('path')
+    if route in DEFAULT_VARIANTS:
+        started = time.perf_counter()
+        params = event.get('queryStringParameters') or {}
+        headers = event.get('headers') or {}
+        user_id = params.get('user_id') or headers.get('X-User-Id') or headers.get('x-user-id')
+        variant = choose_variant(route, user_id)
+        routed = time.perf_counter()
+
+        # In-process call: no second Lambda hop, and the variant's warm caches live in this container
+        handler = variants.handler(variant)
+        response = variant_metrics.time(variant, lambda: handler(event, context), routed - started)
+        response['headers'] = {**(response.get('headers') or {}), 'X-Variant': variant}
+        if 'Cache-Control' in response['headers']:
+            # The variant can depend on the X-User-Id header, so shared caches must key on it
+            response['headers']['Vary'] = 'X-User-Id'
+        logger.debug('%s -> %s for %s', route, variant, user_id or 'anonymous')
+        return response
+
     return {
         'statusCode': 404,
         'body': json.dumps({'error': 'Not found'})
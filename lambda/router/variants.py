@@ -0,0 +1,94 @@
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+from metrics import Metrics
+
+# Recommenders the router can dispatch to, by directory. Each is packaged next
+# to the router (see the router archive in terraform) or, in a checkout, is a
+# sibling of lambda/router.
+VARIANT_DIRS = ('reco_v1', 'reco_v2')
+
+
+def variant_dir(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    packaged = os.path.join(here, name)
+    return packaged if os.path.isdir(packaged) else os.path.join(os.path.dirname(here), name)
+
+
+class VariantRegistry:
+    """Loads each variant's lambda_handler into this process on first use.
+
+    Every variant's handler.py is imported under its own module name
+    (variant_<name>), so several handlers coexist; its directory goes on
+    sys.path for its sibling modules, whose names are unique across the
+    variants. Loading happens once per container, so requests that never
+    reach a variant do not pay for its imports.
+    """
+
+    def __init__(self, names=VARIANT_DIRS, locate=variant_dir):
+        self.names = tuple(names)
+        self.locate = locate
+        self._handlers = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def handler(self, name):
+        handler = self._handlers.get(name)
+        if handler is None:
+            with self._lock:
+                handler = self._handlers.get(name) or self._load(name)
+        return handler
+
+    def _load(self, name):
+        if name not in self.names:
+            raise KeyError(f'unknown variant {name}')
+        directory = self.locate(name)
+        if directory not in sys.path:
+            sys.path.append(directory)
+        spec = importlib.util.spec_from_file_location(f'variant_{name}', os.path.join(directory, 'handler.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            del sys.modules[spec.name]
+            raise
+        self._handlers[name] = module.lambda_handler
+        return module.lambda_handler
+
+
+class VariantMetrics:
+    """Per-variant request counts and latency, written as EMF metrics with a Variant dimension.
+
+    Each variant has a Metrics of its own, so a request's share is a few
+    additions; CloudWatch gets the counts and mean and max latency per variant.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.requests = {}
+        self._metrics = {}
+
+    def time(self, name, call, routing_seconds=0.0):
+        """Return call(), recording it against variant name along with the time spent choosing it."""
+        started = time.perf_counter()
+        try:
+            return call()
+        finally:
+            self.record(name, routing_seconds, time.perf_counter() - started)
+
+    def record(self, name, routing_seconds, seconds):
+        metrics = self._metrics.get(name)
+        if metrics is None:
+            metrics = self._metrics[name] = Metrics(self.function, dimensions={'Variant': name})
+        metrics.record({'routing': routing_seconds, 'variant': seconds}, {'requests': 1})
+        self.requests[name] = self.requests.get(name, 0) + 1
+
+    def flush(self):
+        for metrics in self._metrics.values():
+            metrics.flush()
@@ -0,0 +1,49 @@
+import os
+import threading
+
+# Settings every client gets unless the caller overrides them. Timeouts are
+# far below botocore's 60 s so a stuck connection fails inside one request,
+# keep-alive stops idle pooled connections from being dropped between warm
+# invocations, and standard retries back off with jitter on throttling.
+CLIENT_CONFIG = {
+    'max_pool_connections': int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', 10)),
+    'connect_timeout': float(os.environ.get('AWS_CONNECT_TIMEOUT_SECONDS', 2)),
+    'read_timeout': float(os.environ.get('AWS_READ_TIMEOUT_SECONDS', 10)),
+    'tcp_keepalive': True,
+    'retries': {'mode': 'standard', 'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', 3))}
+}
+
+_clients = {}
+_deserializer = None
+_lock = threading.Lock()
+
+
+def client(service, **config):
+    """The container's boto3 client for service, created on first use.
+
+    boto3 itself is only imported here, so a handler whose request never
+    reaches AWS (a health check, a validation error) does not pay for it.
+    config overrides CLIENT_CONFIG; each distinct override gets its own
+    client, created once.
+    """
+    key = (service, tuple(sorted(config.items())))
+    found = _clients.get(key)
+    if found is None:
+        # Creating clients from the default session is not thread-safe
+        with _lock:
+            found = _clients.get(key)
+            if found is None:
+                import boto3
+                from botocore.config import Config
+                found = _clients[key] = boto3.client(service, config=Config(**{**CLIENT_CONFIG, **config}))
+    return found
+
+
+def deserializer():
+    """A shared boto3 TypeDeserializer for DynamoDB attribute values, imported on first use."""
+    global _deserializer
+    if _deserializer is None:
+        from boto3.dynamodb.types import TypeDeserializer
+        _deserializer = TypeDeserializer()
+    return _deserializer
+
@@ -0,0 +1,26 @@
+import time
+
+# DynamoDB BatchGetItem accepts at most 100 keys
+MAX_BATCH_GET_KEYS = 100
+
+
+def batch_get_items(dynamodb, table_name, keys, projection=None, attribute_names=None):
+    """Yield the items of one table for a list of keys, 100 keys per BatchGetItem.
+
+    UnprocessedKeys are requested again with exponential backoff. Keys with no
+    item are simply absent from the output, which comes in no particular order.
+    """
+    for i in range(0, len(keys), MAX_BATCH_GET_KEYS):
+        request = {table_name: {'Keys': keys[i:i + MAX_BATCH_GET_KEYS]}}
+        if projection:
+            request[table_name]['ProjectionExpression'] = projection
+        if attribute_names:
+            request[table_name]['ExpressionAttributeNames'] = attribute_names
+        attempt = 0
+        while request:
+            if attempt:
+                time.sleep(min(1.0, 0.05 * 2 ** attempt))
+            response = dynamodb.batch_get_item(RequestItems=request)
+            yield from response['Responses'].get(table_name, [])
+            request = response.get('UnprocessedKeys') or None
+            attempt += 1
@@ -0,0 +1,169 @@
+import struct
+import sys
+from array import array
+
+# Binary snapshot of one city's hotel catalog, laid out so a reader can map
+# every column straight onto the file without parsing or copying.
+#
+#   header      MAGIC, format version, counts and the catalog generation
+#   rating      float64[hotels]
+#   popularity  float64[hotels]
+#   tag_bits    uint64[hotels * tag_words]   row-major bitset over the tag vocabulary
+#   postings    int64[postings]              hotel rows per tag, tag by tag, ascending
+#   posting_offsets int64[tags + 1]          start of each tag's rows in postings
+#   <column>    uint32[hotels]               string table index, one per STRING_COLUMNS entry
+#   tag_names   uint32[tags]                 string table index of each tag id
+#   string_offsets uint32[strings + 1]       byte offsets into string_data
+#   string_data UTF-8 bytes of every distinct string, concatenated
+#
+# Everything is little-endian and each section starts on an 8-byte boundary.
+# Hotels are stored in catalog order: most popular first, as the city index
+# returns them, and equally popular hotels by hotel_id. Version 1 kept ties
+# in file order.
+
+MAGIC = b'BKRCATSN'
+FORMAT_VERSION = 2
+
+SNAPSHOT_PREFIX = 'catalog-snapshots/'
+
+STRING_COLUMNS = ('hotel_id', 'hotel_name', 'city_id', 'price_band', 'tags')
+
+_HEADER = struct.Struct('<8sIIIIIIQ')
+
+
+def snapshot_key(generation, city_id):
+    """Object key (relative to the snapshot root) of a city's snapshot for one catalog generation."""
+    return f'{SNAPSHOT_PREFIX}{generation}/{city_id}.bin'
+
+
+def section_layout(hotels, tags, tag_words, postings, strings):
+    """Return [(name, numpy dtype string, count)] in file order."""
+    return [
+        ('rating', '<f8', hotels),
+        ('popularity', '<f8', hotels),
+        ('tag_bits', '<u8', hotels * tag_words),
+        ('postings', '<i8', postings),
+        ('posting_offsets', '<i8', tags + 1),
+        *((column, '<u4', hotels) for column in STRING_COLUMNS),
+        ('tag_names', '<u4', tags),
+        ('string_offsets', '<u4', strings + 1),
+        ('string_data', 'u1', None)
+    ]
+
+
+def parse_header(buffer):
+    """Read the header and return (header, {section: (offset, dtype, count)}).
+
+    string_data's count is its length in bytes. Raises ValueError for anything
+    that is not a snapshot this code can read.
+    """
+    if len(buffer) < _HEADER.size:
+        raise ValueError('Catalog snapshot is truncated')
+    magic, version, hotels, tags, tag_words, postings, strings, generation = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError('Not a catalog snapshot')
+    if version != FORMAT_VERSION:
+        raise ValueError(f'Unsupported catalog snapshot format {version}')
+
+    sections = {}
+    offset = _align(_HEADER.size)
+    string_bytes = None
+    for name, dtype, count in section_layout(hotels, tags, tag_words, postings, strings):
+        if name == 'string_data':
+            string_offsets = sections['string_offsets']
+            string_bytes = struct.unpack_from('<I', buffer, string_offsets[0] + 4 * strings)[0]
+            count = string_bytes
+        sections[name] = (offset, dtype, count)
+        offset = _align(offset + int(dtype[-1]) * count)
+    if offset > _align(len(buffer)):
+        raise ValueError('Catalog snapshot is truncated')
+
+    header = {
+        'hotels': hotels,
+        'tags': tags,
+        'tag_words': tag_words,
+        'postings': postings,
+        'strings': strings,
+        'generation': generation
+    }
+    return header, sections
+
+
+def build_snapshot(hotels, generation):
+    """Serialise one city's hotel rows (dicts of CSV strings or numbers) to snapshot bytes.
+
+    Tag ids are assigned in order of first appearance and a tag repeated on
+    a hotel counts once, matching CityCatalog, so the columns read back are
+    exactly those CityCatalog would build from the same rows.
+    """
+    # Ties by hotel_id, as reco_v1 orders the hotels it queries, so a city ranks
+    # the same whether a container loaded it from here or from the city index
+    hotels = sorted(hotels, key=lambda h: (-float(h.get('popularity_score', 0)), str(h.get('hotel_id', ''))))
+
+    strings = {}
+
+    def intern(value):
+        return strings.setdefault(value, len(strings))
+
+    tag_ids = {}
+    hotel_tags = []
+    for hotel in hotels:
+        row_tags = []
+        for tag in hotel.get('tags', '').split(','):
+            tag = tag.strip()
+            if tag:
+                tag_id = tag_ids.setdefault(tag, len(tag_ids))
+                if tag_id not in row_tags:
+                    row_tags.append(tag_id)
+        hotel_tags.append(row_tags)
+
+    tag_words = max(1, (len(tag_ids) + 63) // 64)
+    tag_bits = array('Q', bytes(8 * len(hotels) * tag_words))
+    posting_lists = [[] for _ in tag_ids]
+    for row, row_tags in enumerate(hotel_tags):
+        for tag_id in row_tags:
+            tag_bits[row * tag_words + (tag_id >> 6)] |= 1 << (tag_id & 63)
+            posting_lists[tag_id].append(row)
+
+    postings = array('q', (row for posting in posting_lists for row in posting))
+    posting_offsets = array('q', [0])
+    for posting in posting_lists:
+        posting_offsets.append(posting_offsets[-1] + len(posting))
+
+    columns = {
+        'rating': array('d', (float(h.get('rating', 0)) for h in hotels)),
+        'popularity': array('d', (float(h.get('popularity_score', 0)) for h in hotels)),
+        'tag_bits': tag_bits,
+        'postings': postings,
+        'posting_offsets': posting_offsets
+    }
+    for column in STRING_COLUMNS:
+        columns[column] = array('I', (intern(str(h.get(column, ''))) for h in hotels))
+    columns['tag_names'] = array('I', (intern(tag) for tag in tag_ids))
+
+    encoded = [value.encode('utf-8') for value in strings]
+    string_offsets = array('I', [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+    columns['string_offsets'] = string_offsets
+    columns['string_data'] = b''.join(encoded)
+
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(hotels), len(tag_ids), tag_words,
+                          len(postings), len(strings), generation)]
+    size = len(parts[0])
+    for name, _, _ in section_layout(len(hotels), len(tag_ids), tag_words, len(postings), len(strings)):
+        padding = _align(size) - size
+        data = columns[name]
+        if isinstance(data, array):
+            if sys.byteorder == 'big':
+                data = array(data.typecode, data)
+                data.byteswap()
+            data = data.tobytes()
+        parts.append(b'\0' * padding)
+        parts.append(data)
+        size += padding + len(data)
+    return b''.join(parts)
+
+
+def _align(offset):
+    return (offset + 7) & ~7
@@ -0,0 +1,30 @@
+# Hotels table item holding the catalog generation. It has no city_id, so it
+# never shows up in the city index.
+CATALOG_VERSION_KEY = {'hotel_id': {'S': '__catalog_version__'}}
+
+
+def bump_catalog_version(dynamodb, table_name):
+    """Increment the catalog generation after a load and return the new value."""
+    response = dynamodb.update_item(
+        TableName=table_name,
+        Key=CATALOG_VERSION_KEY,
+        UpdateExpression='ADD #generation :one',
+        ExpressionAttributeNames={'#generation': 'generation'},
+        ExpressionAttributeValues={':one': {'N': '1'}},
+        ReturnValues='UPDATED_NEW'
+    )
+    return int(response['Attributes']['generation']['N'])
+
+
+def read_catalog_version(dynamodb, table_name):
+    """Return the current catalog generation, or 0 if nothing has been loaded yet."""
+    response = dynamodb.get_item(
+        TableName=table_name,
+        Key=CATALOG_VERSION_KEY,
+        ProjectionExpression='#generation',
+        ExpressionAttributeNames={'#generation': 'generation'}
+    )
+    item = response.get('Item')
+    if not item:
+        return 0
+    return int(item['generation']['N'])
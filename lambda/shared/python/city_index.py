@@ -0,0 +1,141 @@
+import os
+import time
+import unicodedata
+
+# Most cities one autocomplete prefix returns
+MAX_COMPLETIONS = int(os.environ.get('CITY_MAX_COMPLETIONS', 10))
+
+# Attributes of a cities table item the index keeps
+CITY_ATTRIBUTES = ('city_id', 'city_name', 'country_code', 'popularity_index')
+
+
+def normalise(name):
+    """Fold a city name for matching: accents and punctuation dropped, case folded, spaces collapsed.
+
+    'São Paulo', 'sao  paulo' and 'SAO-PAULO' all become 'sao paulo'.
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    kept = []
+    for char in decomposed:
+        category = unicodedata.category(char)
+        if category == 'Mn':
+            continue
+        if category.startswith('P') or category.startswith('Z'):
+            # Hyphens and other separators split words; '.' and "'" just go
+            kept.append(' ' if char in '-_/' or category.startswith('Z') else '')
+        else:
+            kept.append(char)
+    return ' '.join(''.join(kept).casefold().split())
+
+
+class CityIndex:
+    """Every city of the cities table, for constant-time resolution and autocomplete.
+
+    Cities are keyed by id and by normalised name; a name shared by two
+    cities resolves to the more popular one. completions maps every prefix
+    of a normalised name, and of each word in it, to the most popular
+    matching cities (MAX_COMPLETIONS of them), whole-name matches first, so
+    a lookup is one dict access however many cities there are.
+    """
+
+    def __init__(self, cities):
+        ranked = sorted(cities, key=lambda city: (-float(city.get('popularity_index') or 0), city['city_name']))
+        self.by_id = {}
+        self.by_name = {}
+        self.completions = {}
+        self.ranked = ranked
+        for city in ranked:
+            self.by_id[city['city_id']] = city
+            self.by_name.setdefault(normalise(city['city_name']), city)
+
+        for whole_name in (True, False):
+            for city in ranked:
+                name = normalise(city['city_name'])
+                starts = [0] if whole_name else [i + 1 for i, char in enumerate(name) if char == ' ']
+                for start in starts:
+                    for end in range(start + 1, len(name) + 1):
+                        matches = self.completions.setdefault(name[start:end], [])
+                        if len(matches) < MAX_COMPLETIONS and city not in matches:
+                            matches.append(city)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def resolve(self, city_input):
+        """Return (city_id, city_name) for a city ID or name; city_id is None if unknown."""
+        if not city_input:
+            return None, city_input
+        city = self.by_id.get(city_input) or self.by_id.get(city_input.upper()) or self.by_name.get(normalise(city_input))
+        if city is None:
+            return None, city_input
+        return city['city_id'], city['city_name']
+
+    def complete(self, prefix, limit=MAX_COMPLETIONS):
+        """The most popular cities whose name, or a word of it, starts with prefix; without one, the most popular."""
+        key = normalise(prefix or '')
+        matches = self.completions.get(key, []) if key else self.ranked
+        return matches[:limit]
+
+
+def city_from_item(item):
+    city = {key: value['S'] for key, value in item.items() if 'S' in value}
+    city['popularity_index'] = float(item['popularity_index']['N']) if 'popularity_index' in item else 0.0
+    return city
+
+
+def read_city_index(dynamodb, table_name):
+    """Scan the cities table into a CityIndex; it holds one small item per city."""
+    names = {f'#a{i}': attr for i, attr in enumerate(CITY_ATTRIBUTES)}
+    scan_kwargs = {'TableName': table_name, 'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+    cities = []
+    while True:
+        response = dynamodb.scan(**scan_kwargs)
+        cities.extend(city_from_item(item) for item in response.get('Items', []))
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return CityIndex(cities)
+        scan_kwargs['ExclusiveStartKey'] = last_key
+
+
+class CityIndexCache:
+    """The city index of a warm container, read on first use and again every ttl_seconds.
+
+    An empty index, or a failed read, is kept for retry_seconds only, so
+    cities loaded after a container starts are seen soon without every
+    request scanning the table meanwhile. A refresh that fails or finds the
+    table empty keeps the previous index; cities change rarely. A failed
+    first read raises, and get returns None until the retry.
+    """
+
+    def __init__(self, ttl_seconds, retry_seconds=30, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._index = None
+        self._expires_at = None
+
+    def get(self, read):
+        now = self.clock()
+        if self._expires_at is not None and now < self._expires_at:
+            return self._index
+        try:
+            index = read()
+            self.refreshes += 1
+        except Exception:
+            self.refresh_errors += 1
+            self._expires_at = now + self.retry_seconds
+            if self._index is None:
+                raise
+            return self._index
+        if index or not self._index:
+            self._index = index
+        self._expires_at = now + (self.ttl_seconds if index else self.retry_seconds)
+        return self._index
+
+    def clear(self):
+        self._index = self._expires_at = None
+
+    def stats(self):
+        return {'cities': len(self._index or ()), 'refreshes': self.refreshes, 'refresh_errors': self.refresh_errors}
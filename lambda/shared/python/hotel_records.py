@@ -0,0 +1,254 @@
+import sys
+from array import array
+from decimal import Decimal
+
+import aws_clients
+
+# Attributes the scorer and the response need; anything else on the item is never read
+HOTEL_ATTRIBUTES = ('hotel_id', 'hotel_name', 'city_id', 'rating', 'price_band', 'tags', 'popularity_score')
+
+# What the fields parameter may ask for, in the order a projected hotel lists them
+RESPONSE_FIELDS = HOTEL_ATTRIBUTES + ('recommendation_score',)
+
+_ATTRIBUTE_SET = frozenset(HOTEL_ATTRIBUTES)
+
+
+def parse_fields(value):
+    """The fields parameter, a comma-separated string or a list, as a tuple in RESPONSE_FIELDS order.
+
+    Returns None, meaning every field, when no field is named. Raises
+    ValueError for a field that is not one of RESPONSE_FIELDS.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    names = {name.strip() for name in value if isinstance(name, str) and name.strip()}
+    if not names:
+        return None
+    unknown = names.difference(RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields {', '.join(sorted(unknown))}; fields may be {', '.join(RESPONSE_FIELDS)}")
+    return tuple(name for name in RESPONSE_FIELDS if name in names)
+
+
+def decode_item(item):
+    """A hotel item in DynamoDB's wire format as a dict of str and float.
+
+    Strings and numbers, all HOTEL_ATTRIBUTES hold, are read straight off the
+    wire, without TypeDeserializer's Decimals or a second walk converting
+    them; any other type still goes through it.
+    """
+    hotel = {}
+    for key, value in item.items():
+        string = value.get('S')
+        if string is not None:
+            hotel[key] = string
+        elif 'N' in value:
+            hotel[key] = float(value['N'])
+        else:
+            decoded = aws_clients.deserializer().deserialize(value)
+            hotel[key] = float(decoded) if isinstance(decoded, Decimal) else decoded
+    return hotel
+
+
+class TextColumn:
+    """Strings that differ from hotel to hotel, concatenated into one str with each hotel's end in offsets."""
+
+    def __init__(self):
+        self.text = ''
+        self.offsets = array('I', [0])
+        self.pending = []
+
+    def append(self, value):
+        self.pending.append(value)
+        self.offsets.append(self.offsets[-1] + len(value))
+
+    def compact(self):
+        """Join the strings appended since the last compact onto text."""
+        if self.pending:
+            self.text += ''.join(self.pending)
+            self.pending = []
+
+    def __getitem__(self, row):
+        if self.pending:
+            self.compact()
+        return self.text[self.offsets[row]:self.offsets[row + 1]]
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self.offsets) - 1))
+
+
+class CodedColumn:
+    """Strings most hotels share, held as one code per hotel into values."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = array('I')
+        self._codes = {}
+
+    def append(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def __iter__(self):
+        return map(self.values.__getitem__, self.codes)
+
+
+class HotelColumns:
+    """Read-only sequence of one city's hotel dicts, held as parallel array-backed columns.
+
+    hotel_id, hotel_name and tags are TextColumns, city_id and price_band
+    CodedColumns; rating and popularity_score are float64 arrays numpy can
+    wrap without copying. Each hotel's tags are also kept as ids into the
+    city's tag vocabulary, tag_names, stored back to back with each hotel's
+    end in tag_offsets, which is what scoring reads. A hotel costs about a
+    quarter of a dict of its attributes, and a city is a handful of objects
+    for the garbage collector to traverse rather than a list entry per
+    hotel and attribute. Records are built on access, with tags stripped
+    and without empty entries.
+    """
+
+    def __init__(self):
+        self.hotel_ids = TextColumn()
+        self.hotel_names = TextColumn()
+        self.city_ids = CodedColumn()
+        self.price_bands = CodedColumn()
+        self.tag_text = TextColumn()
+        self.strings = {'hotel_id': self.hotel_ids, 'hotel_name': self.hotel_names, 'city_id': self.city_ids,
+                        'price_band': self.price_bands, 'tags': self.tag_text}
+        self.rating = array('d')
+        self.popularity = array('d')
+        self.tag_ids = {}
+        self.tag_names = []
+        self.tags = array('I')
+        self.tag_offsets = array('I', [0])
+        # (row, attribute) pairs a hotel has no value for, and by row the values the columns cannot hold:
+        # attributes outside HOTEL_ATTRIBUTES and hotel_id or hotel_name that are not strings
+        self.absent = set()
+        self.extras = {}
+
+    @classmethod
+    def from_dicts(cls, hotels, tag_lists=None):
+        """Columns holding a list of hotel dicts; tag_lists, if given, holds each hotel's tags already split."""
+        columns = cls()
+        if tag_lists is None:
+            for hotel in hotels:
+                columns.append(hotel)
+        else:
+            for hotel, tags in zip(hotels, tag_lists):
+                columns.append(hotel, tags)
+        columns.compact()
+        return columns
+
+    def append(self, hotel, tags=None):
+        """Add a hotel dict; tags, if given, replaces splitting its tags attribute."""
+        row = len(self.rating)
+        get = hotel.get
+        values = (get('hotel_id'), get('hotel_name'), get('city_id'), get('rating'),
+                  get('price_band'), get('tags'), get('popularity_score'))
+        hotel_id, hotel_name, city_id, rating, price_band, tag_string, popularity = values
+        if len(hotel) != len(HOTEL_ATTRIBUTES) or None in values or type(hotel_id) is not str or type(hotel_name) is not str:
+            hotel_id, hotel_name = self._note_irregular(row, hotel, values)
+
+        self.hotel_ids.append(hotel_id)
+        self.hotel_names.append(hotel_name)
+        self.city_ids.append(city_id)
+        self.price_bands.append(price_band)
+        self.rating.append(0.0 if rating is None else float(rating))
+        self.popularity.append(0.0 if popularity is None else float(popularity))
+
+        if tags is None:
+            tags = [tag for tag in map(str.strip, tag_string.split(',')) if tag] if tag_string else ()
+        self.tag_text.append(','.join(tags))
+        tag_ids = self.tag_ids
+        append_tag = self.tags.append
+        for tag in tags:
+            tag_id = tag_ids.get(tag)
+            if tag_id is None:
+                # Interned, so every city's vocabulary shares one object per tag
+                tag = sys.intern(tag)
+                tag_id = tag_ids[tag] = len(self.tag_names)
+                self.tag_names.append(tag)
+            append_tag(tag_id)
+        self.tag_offsets.append(len(self.tags))
+
+    def compact(self):
+        """Join the strings appended so far, once the hotels are all in."""
+        self.hotel_ids.compact()
+        self.hotel_names.compact()
+        self.tag_text.compact()
+
+    def _note_irregular(self, row, hotel, values):
+        """Record what the columns cannot hold for a hotel; returns the hotel_id and hotel_name to store."""
+        extras = {name: value for name, value in hotel.items() if name not in _ATTRIBUTE_SET}
+        for name, value in zip(HOTEL_ATTRIBUTES, values):
+            if value is None:
+                self.absent.add((row, name))
+        texts = []
+        for name, value in zip(('hotel_id', 'hotel_name'), values):
+            if value is not None and type(value) is not str:
+                self.absent.add((row, name))
+                extras[name] = value
+            texts.append(value if type(value) is str else '')
+        if extras:
+            self.extras[row] = extras
+        return texts
+
+    def set_popularity(self, popularity):
+        """Replace every popularity_score with popularity[hotel_id], 0.0 for hotels it leaves out."""
+        self.popularity = array('d', [popularity.get(hotel_id, 0.0) for hotel_id in self.hotel_ids])
+        self.absent = {entry for entry in self.absent if entry[1] != 'popularity_score'}
+
+    def __len__(self):
+        return len(self.rating)
+
+    def __getitem__(self, row):
+        return self.project(row)
+
+    def __iter__(self):
+        return map(self.project, range(len(self)))
+
+    def project(self, row, fields=None):
+        """The hotel at row as a dict of fields (RESPONSE_FIELDS names; others are skipped), or of every attribute."""
+        count = len(self.rating)
+        if row < 0:
+            row += count
+        if not 0 <= row < count:
+            raise IndexError('hotel row out of range')
+        if fields is None and not self.absent:
+            # The columns read inline: this builds every record on a fragment cache miss
+            ids, names, tags = self.hotel_ids, self.hotel_names, self.tag_text
+            if tags.pending:
+                self.compact()
+            hotel = {
+                'hotel_id': ids.text[ids.offsets[row]:ids.offsets[row + 1]],
+                'hotel_name': names.text[names.offsets[row]:names.offsets[row + 1]],
+                'city_id': self.city_ids.values[self.city_ids.codes[row]],
+                'rating': self.rating[row],
+                'price_band': self.price_bands.values[self.price_bands.codes[row]],
+                'tags': tags.text[tags.offsets[row]:tags.offsets[row + 1]],
+                'popularity_score': self.popularity[row]
+            }
+        else:
+            absent = self.absent
+            hotel = {}
+            for name in HOTEL_ATTRIBUTES if fields is None else fields:
+                if absent and (row, name) in absent:
+                    continue
+                if name == 'rating':
+                    hotel[name] = self.rating[row]
+                elif name == 'popularity_score':
+                    hotel[name] = self.popularity[row]
+                elif name in self.strings:
+                    hotel[name] = self.strings[name][row]
+        if self.extras and row in self.extras:
+            extras = self.extras[row]
+            hotel.update(extras if fields is None else {name: extras[name] for name in fields if name in extras})
+        return hotel
@@ -0,0 +1,211 @@
+import functools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from time import perf_counter
+
+# CloudWatch namespace the functions' metrics go to
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'HotelRecommendations')
+
+# Aggregated values are written at least this often while requests keep coming
+FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 10))
+
+# Fraction of invocations run under cProfile and tracemalloc; 0 turns sampling off
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+
+# Functions and allocation sites a profile summary lists, by own time and by size
+PROFILE_TOP = int(os.environ.get('PROFILE_TOP', 15))
+
+# One sampled invocation at a time: the router runs its variants in-process,
+# and profilers do not nest
+_profiling = threading.Lock()
+
+
+# EMF documents and profiles are bare JSON lines on stdout: Lambda's log handler
+# on the root logger would prefix them, and CloudWatch only parses an unprefixed line
+emf_logger = logging.getLogger('metrics')
+emf_logger.propagate = False
+emf_logger.setLevel(logging.INFO)
+if not emf_logger.handlers:
+    _stdout = logging.StreamHandler(sys.stdout)
+    _stdout.setFormatter(logging.Formatter('%(message)s'))
+    emf_logger.addHandler(_stdout)
+
+
+class PhaseTimer:
+    """Checkpoints through one request, each phase running from the previous mark to its own.
+
+    Marking reads the clock and adds the span to its phase, so a phase
+    marked more than once adds up and the phases are ready when recorded.
+    """
+
+    __slots__ = ('phases', 'last')
+
+    def __init__(self):
+        self.phases = {}
+        self.last = perf_counter()
+
+    def mark(self, phase):
+        now = perf_counter()
+        phases = self.phases
+        phases[phase] = phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def items(self):
+        """(phase, seconds) pairs."""
+        return self.phases.items()
+
+
+class Metrics:
+    """A function's metric values, written to stdout in CloudWatch Embedded Metric Format.
+
+    CloudWatch extracts the metrics from the log line, so recording them costs
+    no API calls. Records are folded into running statistics across warm
+    invocations, count, sum, min and max per duration and a sum per count, so
+    a request's share is a few additions; a document is written once
+    flush_seconds have passed. It carries each duration's mean as <name>_us
+    and its max as <name>_max_us, each count's total, and the statistics
+    themselves under 'statistics' for Logs Insights, so CloudWatch
+    percentiles range over flushes rather than requests. Records not yet written when a container is
+    reclaimed are lost; a long invocation calls flush() when it ends.
+    properties, if given, returns extra fields for each document, such as
+    cache stats. dimensions, {name: value}, are dimensions the metrics carry
+    besides Function; a Metrics has one value for each, so records for
+    another value go to another Metrics.
+    """
+
+    def __init__(self, function, namespace=NAMESPACE, flush_seconds=FLUSH_SECONDS, properties=None, clock=time.time,
+                 dimensions=None):
+        self.function = function
+        self.dimensions = dimensions or {}
+        self.namespace = namespace
+        self.flush_seconds = flush_seconds
+        self.properties = properties
+        self.clock = clock
+        # name -> [count, sum, min, max] of seconds, and name -> total
+        self._timings = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._flushed_at = clock()
+
+    def record(self, durations, counts=None):
+        """Add one record: durations, {name: seconds} or a PhaseTimer, become
+        <name>_us metrics in microseconds, and counts, {name: number}, Count metrics.
+        """
+        with self._lock:
+            timings = self._timings
+            for name, seconds in durations.items():
+                stats = timings.get(name)
+                if stats is None:
+                    timings[name] = [1, seconds, seconds, seconds]
+                    continue
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds < stats[2]:
+                    stats[2] = seconds
+                elif seconds > stats[3]:
+                    stats[3] = seconds
+            if counts:
+                totals = self._counts
+                for name, count in counts.items():
+                    totals[name] = totals.get(name, 0) + count
+        if self.clock() - self._flushed_at >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            timings, self._timings = self._timings, {}
+            counted, self._counts = self._counts, {}
+            self._flushed_at = self.clock()
+        if not timings and not counted:
+            return
+        metrics = {}
+        statistics = {}
+        for name, (count, total, low, high) in timings.items():
+            metrics[f'{name}_us'] = round(total / count * 1e6, 1)
+            metrics[f'{name}_max_us'] = round(high * 1e6, 1)
+            statistics[f'{name}_us'] = {'count': count, 'sum': round(total * 1e6, 1),
+                                        'min': round(low * 1e6, 1), 'max': round(high * 1e6, 1)}
+        units = {**{name: 'Microseconds' for name in metrics}, **{name: 'Count' for name in counted}}
+        metrics.update(counted)
+        document = {
+            '_aws': {
+                'Timestamp': int(self._flushed_at * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [['Function', *self.dimensions]],
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, unit in units.items()]
+                }]
+            },
+            'Function': self.function,
+            **self.dimensions,
+            **(self.properties() if self.properties else {}),
+            'statistics': statistics,
+            **metrics
+        }
+        emf_logger.info(json.dumps(document, default=str))
+
+    def sampling(self, handler):
+        """Decorate a Lambda handler to profile PROFILE_SAMPLE_RATE of its invocations.
+
+        While the rate is 0 the handler is returned as it is, so sampling
+        that is off costs nothing per request.
+        """
+        if not PROFILE_SAMPLE_RATE:
+            return handler
+
+        @functools.wraps(handler)
+        def sampled(event, context):
+            if random.random() < PROFILE_SAMPLE_RATE:
+                return self.profile(lambda: handler(event, context))
+            return handler(event, context)
+        return sampled
+
+    def profile(self, call):
+        """Return call(), writing a cProfile and tracemalloc summary of it as a JSON log line."""
+        if not _profiling.acquire(blocking=False):
+            return call()
+        import cProfile
+        import pstats
+        import tracemalloc
+        try:
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                return call()
+            finally:
+                profiler.disable()
+                seconds = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot().filter_traces([
+                    tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+                allocations = snapshot.statistics('lineno')[:PROFILE_TOP]
+                if not tracing:
+                    tracemalloc.stop()
+                # Heaviest first by time spent in the function itself
+                functions = sorted(pstats.Stats(profiler).stats.items(), key=lambda entry: -entry[1][2])[:PROFILE_TOP]
+                emf_logger.info(json.dumps({'profile': {
+                    'function': self.function,
+                    'ms': round(seconds * 1000, 3),
+                    'peak_kb': round(peak / 1024, 1),
+                    'functions': [
+                        {'function': f'{path}:{line}({name})', 'calls': calls,
+                         'own_ms': round(own * 1000, 3), 'cumulative_ms': round(cumulative * 1000, 3)}
+                        for (path, line, name), (_, calls, own, cumulative, _) in functions
+                    ],
+                    'allocations': [
+                        {'line': str(stat.traceback), 'kb': round(stat.size / 1024, 1), 'blocks': stat.count}
+                        for stat in allocations
+                    ]
+                }}))
+        finally:
+            _profiling.release()
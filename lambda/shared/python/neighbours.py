@@ -0,0 +1,40 @@
+import os
+
+from batch_get import batch_get_items
+
+# Most similar hotels kept per hotel in the co-visit index
+NEIGHBOURS_PER_HOTEL = int(os.environ.get('NEIGHBOURS_PER_HOTEL', 50))
+
+
+def encode_neighbours(neighbours):
+    """Pack [(hotel_id, city_id, similarity), ...] into the string stored on a hotel's item.
+
+    One string attribute keeps the item small and is far cheaper to read back
+    than a list of maps, which boto3 would deserialise value by value.
+    """
+    return ','.join(f'{hotel_id}:{city_id}:{similarity:.6g}' for hotel_id, city_id, similarity in neighbours)
+
+
+def decode_neighbours(packed):
+    """Inverse of encode_neighbours; the list stays most similar first."""
+    neighbours = []
+    for entry in packed.split(',') if packed else ():
+        hotel_id, city_id, similarity = entry.split(':')
+        neighbours.append((hotel_id, city_id, float(similarity)))
+    return neighbours
+
+
+def neighbours_item(hotel_id, neighbours, generation):
+    return {
+        'hotel_id': {'S': hotel_id},
+        'neighbours': {'S': encode_neighbours(neighbours)},
+        'generation': {'N': str(generation)}
+    }
+
+
+def read_neighbours(dynamodb, table_name, hotel_ids):
+    """Return {hotel_id: neighbour list} for the hotels that have an entry in the index."""
+    hotel_ids = list(dict.fromkeys(hotel_ids))
+    items = batch_get_items(dynamodb, table_name, [{'hotel_id': {'S': hotel_id}} for hotel_id in hotel_ids],
+                            projection='hotel_id, neighbours')
+    return {item['hotel_id']['S']: decode_neighbours(item['neighbours']['S']) for item in items}
@@ -0,0 +1,207 @@
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from batch_get import batch_get_items
+
+# Engagement each interaction type adds to a hotel's popularity
+INTERACTION_WEIGHTS = {
+    'search': 0.5,
+    'view': 1.0,
+    'click': 2.0,
+    'favourite': 4.0,
+    'book': 10.0
+}
+
+# An event counts half as much after this many days. Stored scores are only
+# comparable with the half-life they were written with.
+HALF_LIFE_DAYS = float(os.environ.get('POPULARITY_HALF_LIFE_DAYS', 14))
+
+# Scores are stored as if observed at an item's reference_time. Each event is
+# weighted by 2 ** ((event_time - reference_time) / half_life), so decay never
+# requires rewriting totals on every event: new events are a plain ADD and the
+# live score is the stored one scaled back to now. Those weights double every
+# half-life, so reference times move forward in epochs of REBASE_HALF_LIVES
+# half-lives counted from REFERENCE_TIME; the first write of a new epoch
+# rescales the item's total to it. Within an epoch weights grow by at most
+# 2 ** REBASE_HALF_LIVES, far inside DynamoDB's 1e125, whatever the half-life.
+# Items written without a reference_time are stored against REFERENCE_TIME.
+REFERENCE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+REBASE_HALF_LIVES = 64
+
+# DynamoDB numbers cannot be smaller than 1e-130; contributions below this are
+# stored as nothing
+MIN_STORED_SCORE = 1e-100
+
+# Conditional writes an update retries when other flushes rebase the same item
+MAX_REBASE_ATTEMPTS = 5
+
+
+def epoch_start(epoch_seconds, half_life_days=HALF_LIFE_DAYS):
+    """The reference time of the epoch epoch_seconds falls in."""
+    period = REBASE_HALF_LIVES * half_life_days * 86400
+    return REFERENCE_TIME + math.floor((epoch_seconds - REFERENCE_TIME) / period) * period
+
+
+def decay_exponent(epoch_seconds, half_life_days=HALF_LIFE_DAYS, reference_time=REFERENCE_TIME):
+    return (epoch_seconds - reference_time) / (half_life_days * 86400)
+
+
+def parse_timestamp(timestamp):
+    """Seconds since the epoch for an interaction timestamp ('YYYY-MM-DD HH:MM:SS', UTC)."""
+    return datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+
+
+def event_score(interaction_type, epoch_seconds, half_life_days=HALF_LIFE_DAYS, reference_time=REFERENCE_TIME):
+    """Stored-score contribution of one interaction, or 0.0 for unknown types."""
+    return INTERACTION_WEIGHTS.get(interaction_type, 0.0) * 2 ** decay_exponent(epoch_seconds, half_life_days, reference_time)
+
+
+def current_popularity(stored_score, now=None, half_life_days=HALF_LIFE_DAYS, reference_time=REFERENCE_TIME):
+    """Decayed engagement as of now (default: the current time) from a score stored against reference_time."""
+    now = time.time() if now is None else now
+    return stored_score * 2 ** -decay_exponent(now, half_life_days, reference_time)
+
+
+def rebased_score(stored_score, reference_time, new_reference_time, half_life_days=HALF_LIFE_DAYS):
+    """A score stored against reference_time, stored against new_reference_time instead."""
+    score = stored_score * 2 ** -decay_exponent(new_reference_time, half_life_days, reference_time)
+    return score if score >= MIN_STORED_SCORE else 0.0
+
+
+class PopularityAggregator:
+    """Accumulates interaction events in memory and applies them as one ADD per hotel.
+
+    Several events for the same hotel within a batch collapse into a single
+    UpdateItem, so write cost follows the number of distinct hotels touched
+    rather than the number of events. Scores are accumulated against the
+    reference time of the epoch the aggregator was created in.
+    """
+
+    def __init__(self, half_life_days=HALF_LIFE_DAYS, now=None):
+        self.half_life_days = half_life_days
+        self.reference_time = epoch_start(time.time() if now is None else now, half_life_days)
+        self.pending = {}
+        self.events = 0
+        self.skipped = 0
+        self.invalid = 0
+
+    def add(self, hotel_id, interaction_type, timestamp):
+        if interaction_type not in INTERACTION_WEIGHTS:
+            self.skipped += 1
+            return
+        try:
+            epoch_seconds = parse_timestamp(timestamp)
+        except (TypeError, ValueError):
+            # Missing (None) or malformed: counted rather than raised, so one bad
+            # row cannot fail every batch it is redelivered in
+            self.invalid += 1
+            return
+        score = event_score(interaction_type, epoch_seconds, self.half_life_days, self.reference_time)
+        if score < MIN_STORED_SCORE:
+            # Decayed to nothing long before the epoch started
+            self.skipped += 1
+            return
+        total = self.pending.get(hotel_id)
+        if total is None:
+            self.pending[hotel_id] = [score, 1]
+        else:
+            total[0] += score
+            total[1] += 1
+        self.events += 1
+
+    def flush(self, dynamodb, table_name, max_workers=8):
+        """Write the pending deltas to the aggregate table and return flush stats."""
+        pending, self.pending = self.pending, {}
+        updated_at = str(int(time.time()))
+
+        def update(entry):
+            hotel_id, (score, events) = entry
+            self._update(dynamodb, table_name, hotel_id, score, events, updated_at)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # list() re-raises the first failed update
+            list(executor.map(update, pending.items()))
+        stats = {
+            'events': self.events,
+            'skipped': self.skipped,
+            'invalid': self.invalid,
+            'hotels': len(pending),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        self.events = 0
+        self.skipped = 0
+        self.invalid = 0
+        return stats
+
+    def _update(self, dynamodb, table_name, hotel_id, score, events, updated_at):
+        """ADD one hotel's deltas, first moving the item or the deltas to the later of their two epochs."""
+        from botocore.exceptions import ClientError
+
+        key = {'hotel_id': {'S': hotel_id}}
+        reference_time = self.reference_time
+        for _ in range(MAX_REBASE_ATTEMPTS):
+            try:
+                dynamodb.update_item(
+                    TableName=table_name,
+                    Key=key,
+                    UpdateExpression='ADD decayed_score :score, events :events '
+                                     'SET updated_at = :updated_at, reference_time = :reference_time',
+                    ConditionExpression='attribute_not_exists(decayed_score) OR reference_time = :reference_time',
+                    ExpressionAttributeValues={
+                        ':score': {'N': repr(score)},
+                        ':events': {'N': str(events)},
+                        ':updated_at': {'N': updated_at},
+                        ':reference_time': {'N': repr(reference_time)}
+                    }
+                )
+                return
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+            item = dynamodb.get_item(TableName=table_name, Key=key, ConsistentRead=True,
+                                     ProjectionExpression='decayed_score, reference_time')['Item']
+            stored_reference = float(item['reference_time']['N']) if 'reference_time' in item else REFERENCE_TIME
+            if stored_reference > reference_time:
+                # Already moved on by a later flush: the deltas follow it
+                score = rebased_score(score, reference_time, stored_reference, self.half_life_days)
+                reference_time = stored_reference
+                continue
+            stored_score = item['decayed_score']['N']
+            rebased = rebased_score(float(stored_score), stored_reference, reference_time, self.half_life_days)
+            try:
+                dynamodb.update_item(
+                    TableName=table_name,
+                    Key=key,
+                    UpdateExpression='SET decayed_score = :rebased, reference_time = :reference_time',
+                    # Unchanged since it was read, so no concurrent ADD is lost
+                    ConditionExpression='decayed_score = :stored AND '
+                                        '(attribute_not_exists(reference_time) OR reference_time = :stored_reference)',
+                    ExpressionAttributeValues={
+                        ':rebased': {'N': repr(rebased)},
+                        ':reference_time': {'N': repr(reference_time)},
+                        ':stored': {'N': stored_score},
+                        ':stored_reference': {'N': repr(stored_reference)}
+                    }
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        raise RuntimeError(f'Could not update popularity of {hotel_id} after {MAX_REBASE_ATTEMPTS} attempts')
+
+
+def read_popularity(dynamodb, table_name, hotel_ids, now=None):
+    """Return {hotel_id: current popularity} for the hotels that have any interactions."""
+    hotel_ids = list(dict.fromkeys(hotel_ids))
+    items = batch_get_items(dynamodb, table_name, [{'hotel_id': {'S': hotel_id}} for hotel_id in hotel_ids],
+                            projection='hotel_id, decayed_score, reference_time')
+    return {
+        item['hotel_id']['S']: current_popularity(
+            float(item['decayed_score']['N']), now,
+            reference_time=float(item['reference_time']['N']) if 'reference_time' in item else REFERENCE_TIME
+        )
+        for item in items
+    }
@@ -0,0 +1,86 @@
+import os
+import time
+from collections import OrderedDict
+
+# GSI on the user interactions table: partition on user_id, sorted by timestamp
+USER_INDEX_NAME = os.environ.get('USER_INTERACTIONS_USER_INDEX', 'user-timestamp-index')
+
+# Attributes the index projects besides its keys
+HISTORY_ATTRIBUTES = ('user_id', 'timestamp', 'hotel_id', 'interaction_type', 'session_id')
+
+
+def read_user_history(dynamodb, table_name, user_id, limit, index_name=USER_INDEX_NAME):
+    """Return a user's last limit interactions, most recent first.
+
+    One Query on the user's partition of the index, newest first, following
+    LastEvaluatedKey only until limit items have been read; the cost depends
+    on limit, never on how many interactions the table holds.
+    """
+    names = {f'#a{i}': attr for i, attr in enumerate(HISTORY_ATTRIBUTES)}
+    query_kwargs = {
+        'TableName': table_name,
+        'IndexName': index_name,
+        'KeyConditionExpression': '#user_id = :user_value',
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': {**names, '#user_id': 'user_id'},
+        'ExpressionAttributeValues': {':user_value': {'S': user_id}},
+        'ScanIndexForward': False,
+    }
+
+    history = []
+    while len(history) < limit:
+        query_kwargs['Limit'] = limit - len(history)
+        response = dynamodb.query(**query_kwargs)
+        history.extend({key: value['S'] for key, value in item.items()} for item in response.get('Items', []))
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        query_kwargs['ExclusiveStartKey'] = last_key
+    return history
+
+
+def recent_hotels(history, limit):
+    """Distinct hotels of a history, most recent first."""
+    return list(dict.fromkeys(interaction['hotel_id'] for interaction in history))[:limit]
+
+
+class UserHistoryCache:
+    """Recent interactions per user, kept across warm invocations.
+
+    Bounded to max_users, evicted least-recently-used, and each entry expires
+    after ttl_seconds so new interactions show up within that long. An entry
+    answers any request for at most as many interactions as it was read with.
+    """
+
+    def __init__(self, max_users, ttl_seconds, clock=time.monotonic):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, user_id, limit, read_history):
+        """Return (history, hit), calling read_history(user_id, limit) on a miss."""
+        now = self.clock()
+        entry = self._entries.get(user_id)
+        # A history shorter than it was asked for is the user's whole history
+        if entry is not None and now - entry[2] < self.ttl_seconds and (entry[1] >= limit or len(entry[0]) < entry[1]):
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0][:limit], True
+
+        self.misses += 1
+        history = read_history(user_id, limit)
+        self._entries[user_id] = (history, limit, now)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+        return history, False
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'users': len(self._entries)}
@@ -0,0 +1,23 @@
+#!/usr/bin/env bash
+# Build the third-party dependency layer for the Lambda functions.
+# boto3/botocore ship with the Lambda runtime, so they are left out of the layer.
+set -euo pipefail
+
+ROOT_DIR="$(cd "$(dirname "$0")/.." && pwd)"
+LAYER_DIR="$ROOT_DIR/build/deps-layer"
+
+rm -rf "$LAYER_DIR"
+mkdir -p "$LAYER_DIR/python"
+
+grep -vE '^(boto3|botocore)\b' "$ROOT_DIR/lambda/requirements.txt" > "$LAYER_DIR/requirements.txt"
+
+pip install \
+  --requirement "$LAYER_DIR/requirements.txt" \
+  --target "$LAYER_DIR/python" \
+  --platform manylinux2014_x86_64 \
+  --implementation cp \
+  --python-version 3.11 \
+  --only-binary=:all:
+
+rm "$LAYER_DIR/requirements.txt"
+echo "Dependency layer built in $LAYER_DIR"
@@ -11,13 +11,16 @@ module "compute" {
   source     = "./modules/compute"
   depends_on = [module.storage]
 
-  project_prefix       = var.project_prefix
-  environment          = var.environment
-  aws_region           = var.aws_region
-  dynamodb_table_names = module.storage.dynamodb-table-names
-  s3_bucket_names      = module.storage.s3-bucket-names
-  kms_key_arn          = module.storage.kms-key-arn
-  tags                 = var.tags
+  project_prefix                    = var.project_prefix
+  environment                       = var.environment
+  aws_region                        = var.aws_region
+  dynamodb_table_names              = module.storage.dynamodb-table-names
+  hotels_city_index_name            = module.storage.hotels-city-index-name
+  user_interactions_user_index_name = module.storage.user-interactions-user-index-name
+  user_interactions_stream_arn      = module.storage.user-interactions-stream-arn
+  s3_bucket_names                   = module.storage.s3-bucket-names
+  kms_key_arn                       = module.storage.kms-key-arn
+  tags                              = var.tags
 }
 
 module "frontend" {
@@ -63,6 +63,27 @@ resource "aws_iam_role" "bkr-reco-role" {
   tags = var.tags
 }
 
+# Role for personalised recommendation Lambda
+resource "aws_iam_role" "bkr-reco-v2-role" {
+  name = "${var.project_prefix}-${var.environment}-reco-v2-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = "sts:AssumeRole"
+        Effect = "Allow"
+        Sid    = ""
+        Principal = {
+          Service = "lambda.amazonaws.com"
+        }
+      },
+    ]
+  })
+
+  tags = var.tags
+}
+
 # Policy for data ingestion Lambda
 resource "aws_iam_policy" "bkr-data-ingestion-policy" {
   name = "${var.project_prefix}-${var.environment}-data-ingestion-policy"
@@ -73,14 +94,41 @@ resource "aws_iam_policy" "bkr-data-ingestion-policy" {
       {
         Action = [
           "dynamodb:PutItem",
-          "dynamodb:BatchWriteItem"
+          "dynamodb:UpdateItem",
+          # The catalog generation is read before snapshots are published, and popularity
+          # items are read back to move them to a new epoch
+          "dynamodb:GetItem",
+          "dynamodb:BatchWriteItem",
+          # Incremental loads scan a table's keys when there are no row hashes for it yet
+          "dynamodb:Scan"
         ],
         Effect = "Allow"
         Resource = [
           "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotels}",
-          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.user_interactions}"
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.user_interactions}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotel_popularity}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotel_neighbours}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.cities}"
         ]
       },
+      {
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ],
+        Effect   = "Allow"
+        Resource = var.user_interactions_stream_arn
+      },
+      {
+        # On-failure destination of the user_interactions stream mapping
+        Action = [
+          "sqs:SendMessage"
+        ],
+        Effect   = "Allow"
+        Resource = aws_sqs_queue.bkr-user-interactions-stream-failures.arn
+      },
       {
         Action = [
           "s3:ListBucket"
@@ -95,6 +143,38 @@ resource "aws_iam_policy" "bkr-data-ingestion-policy" {
         Effect   = "Allow"
         Resource = "arn:aws:s3:::${var.s3_bucket_names.datasets}/*"
       },
+      {
+        Action = [
+          "s3:ListBucket"
+        ],
+        Effect   = "Allow"
+        Resource = "arn:aws:s3:::${var.s3_bucket_names.artefacts}"
+      },
+      {
+        Action = [
+          "s3:GetObject",
+          "s3:PutObject",
+          "s3:DeleteObject"
+        ],
+        Effect = "Allow"
+        Resource = [
+          "arn:aws:s3:::${var.s3_bucket_names.artefacts}/ingestion-checkpoints/*",
+          "arn:aws:s3:::${var.s3_bucket_names.artefacts}/ingestion-manifests/*",
+          "arn:aws:s3:::${var.s3_bucket_names.artefacts}/ingestion-row-hashes/*",
+          "arn:aws:s3:::${var.s3_bucket_names.artefacts}/catalog-snapshots/*"
+        ]
+      },
+      {
+        # Coordinator mode fans shards out to asynchronous invocations of this same function
+        Action = [
+          "lambda:InvokeFunction"
+        ],
+        Effect = "Allow"
+        Resource = [
+          "arn:aws:lambda:${var.aws_region}:${data.aws_caller_identity.current.account_id}:function:${var.project_prefix}-${var.environment}-data-ingestion",
+          "arn:aws:lambda:${var.aws_region}:${data.aws_caller_identity.current.account_id}:function:${var.project_prefix}-${var.environment}-data-ingestion:*"
+        ]
+      },
       {
         Action = [
           "kms:Decrypt",
@@ -117,14 +197,70 @@ resource "aws_iam_policy" "bkr-reco-policy" {
       {
         Action = [
           "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
           "dynamodb:Query",
           "dynamodb:Scan"
         ],
         Effect = "Allow"
         Resource = [
-          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotels}"
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotels}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotels}/index/${var.hotels_city_index_name}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotel_popularity}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.cities}"
+        ]
+      },
+      {
+        # ListBucket makes a missing snapshot a NoSuchKey rather than AccessDenied
+        Action = [
+          "s3:ListBucket"
+        ],
+        Effect   = "Allow"
+        Resource = "arn:aws:s3:::${var.s3_bucket_names.artefacts}"
+      },
+      {
+        Action = [
+          "s3:GetObject"
+        ],
+        Effect   = "Allow"
+        Resource = "arn:aws:s3:::${var.s3_bucket_names.artefacts}/catalog-snapshots/*"
+      },
+      {
+        Action = [
+          "kms:Decrypt"
+        ],
+        Effect   = "Allow"
+        Resource = var.kms_key_arn
+      }
+    ]
+  })
+}
+
+# Policy for personalised recommendation Lambda: point reads of neighbour lists and hotel records,
+# and queries of one user's partition of the interactions user index
+resource "aws_iam_policy" "bkr-reco-v2-policy" {
+  name = "${var.project_prefix}-${var.environment}-reco-v2-policy"
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:BatchGetItem"
+        ],
+        Effect = "Allow"
+        Resource = [
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotels}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotel_neighbours}"
         ]
       },
+      {
+        Action = [
+          "dynamodb:Query"
+        ],
+        Effect   = "Allow"
+        Resource = "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.user_interactions}/index/${var.user_interactions_user_index_name}"
+      },
       {
         Action = [
           "kms:Decrypt"
@@ -158,17 +294,133 @@ resource "aws_iam_role_policy_attachment" "bkr-reco-basic-execution" {
   policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
 }
 
+# Attach policies to personalised recommendation role
+resource "aws_iam_role_policy_attachment" "bkr-reco-v2-policy" {
+  role       = aws_iam_role.bkr-reco-v2-role.name
+  policy_arn = aws_iam_policy.bkr-reco-v2-policy.arn
+}
+
+resource "aws_iam_role_policy_attachment" "bkr-reco-v2-basic-execution" {
+  role       = aws_iam_role.bkr-reco-v2-role.name
+  policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
+}
+
+# Policy for the router: reads of the experiment config, plus whatever the variants it runs in-process read
+resource "aws_iam_policy" "bkr-router-policy" {
+  name = "${var.project_prefix}-${var.environment}-router-policy"
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
+          "dynamodb:Query"
+        ],
+        Effect = "Allow"
+        Resource = [
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.experiment_config}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotels}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotels}/index/${var.hotels_city_index_name}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotel_popularity}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.hotel_neighbours}",
+          "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.user_interactions}/index/${var.user_interactions_user_index_name}"
+        ]
+      },
+      {
+        # reco_v1 reads the whole cities table into its city index
+        Action = [
+          "dynamodb:Scan"
+        ],
+        Effect   = "Allow"
+        Resource = "arn:aws:dynamodb:${var.aws_region}:${data.aws_caller_identity.current.account_id}:table/${var.dynamodb_table_names.cities}"
+      },
+      {
+        Action = [
+          "s3:ListBucket"
+        ],
+        Effect   = "Allow"
+        Resource = "arn:aws:s3:::${var.s3_bucket_names.artefacts}"
+      },
+      {
+        Action = [
+          "s3:GetObject"
+        ],
+        Effect   = "Allow"
+        Resource = "arn:aws:s3:::${var.s3_bucket_names.artefacts}/catalog-snapshots/*"
+      },
+      {
+        Action = [
+          "kms:Decrypt"
+        ],
+        Effect   = "Allow"
+        Resource = var.kms_key_arn
+      }
+    ]
+  })
+}
+
+resource "aws_iam_role_policy_attachment" "bkr-router-policy" {
+  role       = aws_iam_role.bkr-lambda-base-role.name
+  policy_arn = aws_iam_policy.bkr-router-policy.arn
+}
+
 # Attach basic execution to base role (for router)
 resource "aws_iam_role_policy_attachment" "bkr-base-basic-execution" {
   role       = aws_iam_role.bkr-lambda-base-role.name
   policy_arn = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
 }
 
+# Shared Lambda layer (modules under lambda/shared/python are importable from every function)
+data "archive_file" "bkr-shared-layer" {
+  type        = "zip"
+  source_dir  = "${path.root}/../lambda/shared"
+  output_path = "${path.module}/shared-layer.zip"
+}
+
+resource "aws_lambda_layer_version" "bkr-shared-layer" {
+  filename            = data.archive_file.bkr-shared-layer.output_path
+  layer_name          = "${var.project_prefix}-${var.environment}-shared"
+  compatible_runtimes = ["python3.11"]
+  source_code_hash    = data.archive_file.bkr-shared-layer.output_base64sha256
+}
+
+# Third-party dependencies (numpy, orjson); build with scripts/build_deps_layer.sh before planning
+data "archive_file" "bkr-deps-layer" {
+  type        = "zip"
+  source_dir  = "${path.root}/../build/deps-layer"
+  output_path = "${path.module}/deps-layer.zip"
+}
+
+resource "aws_lambda_layer_version" "bkr-deps-layer" {
+  filename            = data.archive_file.bkr-deps-layer.output_path
+  layer_name          = "${var.project_prefix}-${var.environment}-deps"
+  compatible_runtimes = ["python3.11"]
+  source_code_hash    = data.archive_file.bkr-deps-layer.output_base64sha256
+}
+
 # Lambda Function Router
+# The recommenders are packaged inside the router, each in its own directory, so it can run them in-process
+locals {
+  router-package-files = merge(
+    { for f in fileset("${path.root}/../lambda/router", "*.py") : f => "${path.root}/../lambda/router/${f}" },
+    { for f in fileset("${path.root}/../lambda/reco_v1", "*.py") : "reco_v1/${f}" => "${path.root}/../lambda/reco_v1/${f}" },
+    { for f in fileset("${path.root}/../lambda/reco_v2", "*.py") : "reco_v2/${f}" => "${path.root}/../lambda/reco_v2/${f}" }
+  )
+}
+
 data "archive_file" "bkr-router-lambda" {
   type        = "zip"
-  source_dir  = "${path.root}/../lambda/router"
   output_path = "${path.module}/router.zip"
+
+  dynamic "source" {
+    for_each = local.router-package-files
+    content {
+      content  = file(source.value)
+      filename = source.key
+    }
+  }
 }
 
 resource "aws_lambda_function" "bkr-router" {
@@ -179,12 +431,23 @@ resource "aws_lambda_function" "bkr-router" {
   runtime          = "python3.11"
   timeout          = 30
   source_code_hash = data.archive_file.bkr-router-lambda.output_base64sha256
+  layers = [
+    aws_lambda_layer_version.bkr-shared-layer.arn,
+    aws_lambda_layer_version.bkr-deps-layer.arn
+  ]
 
+  # The variants' own settings too, since they run inside the router
   environment {
     variables = {
-      HOTELS_TABLE            = var.dynamodb_table_names.hotels
-      USER_INTERACTIONS_TABLE = var.dynamodb_table_names.user_interactions
-      EXPERIMENT_CONFIG_TABLE = var.dynamodb_table_names.experiment_config
+      HOTELS_TABLE                 = var.dynamodb_table_names.hotels
+      HOTELS_CITY_INDEX            = var.hotels_city_index_name
+      USER_INTERACTIONS_TABLE      = var.dynamodb_table_names.user_interactions
+      USER_INTERACTIONS_USER_INDEX = var.user_interactions_user_index_name
+      EXPERIMENT_CONFIG_TABLE      = var.dynamodb_table_names.experiment_config
+      HOTEL_POPULARITY_TABLE       = var.dynamodb_table_names.hotel_popularity
+      HOTEL_NEIGHBOURS_TABLE       = var.dynamodb_table_names.hotel_neighbours
+      CITIES_TABLE                 = var.dynamodb_table_names.cities
+      CATALOG_SNAPSHOT_BUCKET      = var.s3_bucket_names.artefacts
     }
   }
 
@@ -203,8 +466,14 @@ resource "aws_lambda_function" "bkr-data-ingestion" {
   function_name = "${var.project_prefix}-${var.environment}-data-ingestion"
   role          = aws_iam_role.bkr-data-ingestion-role.arn
   handler       = "handler.lambda_handler"
-  timeout       = 60
-  runtime       = "python3.11"
+  # Loads stop on their own before the deadline; the neighbour index rebuild needs the time and memory
+  timeout     = 900
+  memory_size = 2048
+  runtime     = "python3.11"
+  layers = [
+    aws_lambda_layer_version.bkr-shared-layer.arn,
+    aws_lambda_layer_version.bkr-deps-layer.arn
+  ]
 
   source_code_hash = data.archive_file.bkr-data-ingestion-lambda.output_base64sha256
 
@@ -215,12 +484,45 @@ resource "aws_lambda_function" "bkr-data-ingestion" {
       HOTELS_TABLE            = var.dynamodb_table_names.hotels
       USER_INTERACTIONS_TABLE = var.dynamodb_table_names.user_interactions
       EXPERIMENT_CONFIG_TABLE = var.dynamodb_table_names.experiment_config
+      HOTEL_POPULARITY_TABLE  = var.dynamodb_table_names.hotel_popularity
+      HOTEL_NEIGHBOURS_TABLE  = var.dynamodb_table_names.hotel_neighbours
+      CITIES_TABLE            = var.dynamodb_table_names.cities
     }
   }
 
   tags = var.tags
 }
 
+# Stream batches the popularity aggregation gave up on, recorded by shard and
+# sequence range so they can be re-read from the stream and replayed
+resource "aws_sqs_queue" "bkr-user-interactions-stream-failures" {
+  name                      = "${var.project_prefix}-${var.environment}-user-interactions-stream-failures"
+  message_retention_seconds = 1209600
+  kms_master_key_id         = var.kms_key_arn
+
+  tags = var.tags
+}
+
+# New user interactions are folded into the hotel popularity aggregates. A failing
+# batch is split in half until the bad records are isolated, and after bounded
+# retries it goes to the failure queue so the rest of its shard keeps flowing
+resource "aws_lambda_event_source_mapping" "bkr-user-interactions-stream" {
+  event_source_arn                   = var.user_interactions_stream_arn
+  function_name                      = aws_lambda_function.bkr-data-ingestion.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 1000
+  maximum_batching_window_in_seconds = 5
+  bisect_batch_on_function_error     = true
+  maximum_retry_attempts             = 3
+  maximum_record_age_in_seconds      = 21600
+
+  destination_config {
+    on_failure {
+      destination_arn = aws_sqs_queue.bkr-user-interactions-stream-failures.arn
+    }
+  }
+}
+
 # Lambda Function Recommendation v1
 data "archive_file" "bkr-reco-v1-lambda" {
   type        = "zip"
@@ -235,20 +537,59 @@ resource "aws_lambda_function" "bkr-reco-v1" {
   handler       = "handler.lambda_handler"
   timeout       = 60
   runtime       = "python3.11"
+  layers = [
+    aws_lambda_layer_version.bkr-shared-layer.arn,
+    aws_lambda_layer_version.bkr-deps-layer.arn
+  ]
 
   source_code_hash = data.archive_file.bkr-reco-v1-lambda.output_base64sha256
 
   environment {
     variables = {
-      HOTELS_TABLE = var.dynamodb_table_names.hotels
+      HOTELS_TABLE            = var.dynamodb_table_names.hotels
+      HOTELS_CITY_INDEX       = var.hotels_city_index_name
+      HOTEL_POPULARITY_TABLE  = var.dynamodb_table_names.hotel_popularity
+      CITIES_TABLE            = var.dynamodb_table_names.cities
+      CATALOG_SNAPSHOT_BUCKET = var.s3_bucket_names.artefacts
     }
   }
 
   tags = var.tags
 }
 
+# Lambda Function Recommendation v2 (personalised, from the co-visit index)
+data "archive_file" "bkr-reco-v2-lambda" {
+  type        = "zip"
+  source_dir  = "${path.root}/../lambda/reco_v2"
+  output_path = "${path.module}/reco_v2.zip"
+}
+
+resource "aws_lambda_function" "bkr-reco-v2" {
+  filename      = data.archive_file.bkr-reco-v2-lambda.output_path
+  function_name = "${var.project_prefix}-${var.environment}-reco-v2"
+  role          = aws_iam_role.bkr-reco-v2-role.arn
+  handler       = "handler.lambda_handler"
+  timeout       = 30
+  runtime       = "python3.11"
+  # orjson comes from the deps layer
+  layers = [
+    aws_lambda_layer_version.bkr-shared-layer.arn,
+    aws_lambda_layer_version.bkr-deps-layer.arn
+  ]
+
+  source_code_hash = data.archive_file.bkr-reco-v2-lambda.output_base64sha256
 
+  environment {
+    variables = {
+      HOTELS_TABLE                 = var.dynamodb_table_names.hotels
+      HOTEL_NEIGHBOURS_TABLE       = var.dynamodb_table_names.hotel_neighbours
+      USER_INTERACTIONS_TABLE      = var.dynamodb_table_names.user_interactions
+      USER_INTERACTIONS_USER_INDEX = var.user_interactions_user_index_name
+    }
+  }
 
+  tags = var.tags
+}
 
 # API Gateway Methods & Integration
 resource "aws_api_gateway_rest_api" "bkr-rest-api" {
@@ -346,6 +687,14 @@ resource "aws_api_gateway_method" "bkr-reco-v1-get-method" {
   authorization = "NONE"
 }
 
+# Batch recommendations: a JSON body of {"queries": [...]}
+resource "aws_api_gateway_method" "bkr-reco-v1-post-method" {
+  rest_api_id   = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id   = aws_api_gateway_resource.bkr-reco-v1-endpoint.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
 resource "aws_api_gateway_method" "bkr-reco-v1-options-method" {
   rest_api_id   = aws_api_gateway_rest_api.bkr-rest-api.id
   resource_id   = aws_api_gateway_resource.bkr-reco-v1-endpoint.id
@@ -385,7 +734,7 @@ resource "aws_api_gateway_integration_response" "bkr-reco-v1-options-response" {
 
   response_parameters = {
     "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
-    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,POST,OPTIONS'"
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
 }
@@ -399,11 +748,22 @@ resource "aws_lambda_permission" "bkr-reco-v1-api-gw-allow" {
 
 }
 
+# GET requests go through the router, which picks the variant from the route's experiment config
 resource "aws_api_gateway_integration" "bkr-lambda-reco-v1" {
   rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
   resource_id = aws_api_gateway_resource.bkr-reco-v1-endpoint.id
   http_method = aws_api_gateway_method.bkr-reco-v1-get-method.http_method
 
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.bkr-router.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "bkr-lambda-reco-v1-batch" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-reco-v1-endpoint.id
+  http_method = aws_api_gateway_method.bkr-reco-v1-post-method.http_method
+
   integration_http_method = "POST"
   type                    = "AWS_PROXY"
   uri                     = aws_lambda_function.bkr-reco-v1.invoke_arn
@@ -420,6 +780,172 @@ resource "aws_api_gateway_method_response" "bkr-reco-v1-get-response" {
   }
 }
 
+# City autocomplete, served by reco_v1 from its city index
+resource "aws_api_gateway_resource" "bkr-cities-endpoint" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  parent_id   = aws_api_gateway_rest_api.bkr-rest-api.root_resource_id
+  path_part   = "cities"
+}
+
+resource "aws_api_gateway_method" "bkr-cities-get-method" {
+  rest_api_id   = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id   = aws_api_gateway_resource.bkr-cities-endpoint.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "bkr-cities-options-method" {
+  rest_api_id   = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id   = aws_api_gateway_resource.bkr-cities-endpoint.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "bkr-cities-options" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-cities-endpoint.id
+  http_method = aws_api_gateway_method.bkr-cities-options-method.http_method
+  type        = "MOCK"
+
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "bkr-cities-options-response" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-cities-endpoint.id
+  http_method = aws_api_gateway_method.bkr-cities-options-method.http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "bkr-cities-options-response" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-cities-endpoint.id
+  http_method = aws_api_gateway_method.bkr-cities-options-method.http_method
+  status_code = aws_api_gateway_method_response.bkr-cities-options-response.status_code
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+}
+
+resource "aws_api_gateway_integration" "bkr-lambda-cities" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-cities-endpoint.id
+  http_method = aws_api_gateway_method.bkr-cities-get-method.http_method
+
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.bkr-reco-v1.invoke_arn
+}
+
+resource "aws_api_gateway_method_response" "bkr-cities-get-response" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-cities-endpoint.id
+  http_method = aws_api_gateway_method.bkr-cities-get-method.http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = true
+  }
+}
+
+resource "aws_api_gateway_resource" "bkr-reco-v2-endpoint" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  parent_id   = aws_api_gateway_resource.bkr-reco-v1-endpoint.id
+  path_part   = "personalised"
+}
+
+resource "aws_api_gateway_method" "bkr-reco-v2-get-method" {
+  rest_api_id   = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id   = aws_api_gateway_resource.bkr-reco-v2-endpoint.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "bkr-reco-v2-options-method" {
+  rest_api_id   = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id   = aws_api_gateway_resource.bkr-reco-v2-endpoint.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "bkr-reco-v2-options" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-reco-v2-endpoint.id
+  http_method = aws_api_gateway_method.bkr-reco-v2-options-method.http_method
+  type        = "MOCK"
+
+  request_templates = {
+    "application/json" = "{\"statusCode\": 200}"
+  }
+}
+
+resource "aws_api_gateway_method_response" "bkr-reco-v2-options-response" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-reco-v2-endpoint.id
+  http_method = aws_api_gateway_method.bkr-reco-v2-options-method.http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "bkr-reco-v2-options-response" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-reco-v2-endpoint.id
+  http_method = aws_api_gateway_method.bkr-reco-v2-options-method.http_method
+  status_code = aws_api_gateway_method_response.bkr-reco-v2-options-response.status_code
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+}
+
+resource "aws_lambda_permission" "bkr-reco-v2-api-gw-allow" {
+  function_name = aws_lambda_function.bkr-reco-v2.function_name
+  statement_id  = "AllowExecutionFromAPIGateway"
+  action        = "lambda:InvokeFunction"
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.bkr-rest-api.execution_arn}/*/*"
+
+}
+
+resource "aws_api_gateway_integration" "bkr-lambda-reco-v2" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-reco-v2-endpoint.id
+  http_method = aws_api_gateway_method.bkr-reco-v2-get-method.http_method
+
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.bkr-router.invoke_arn
+}
+
+resource "aws_api_gateway_method_response" "bkr-reco-v2-get-response" {
+  rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
+  resource_id = aws_api_gateway_resource.bkr-reco-v2-endpoint.id
+  http_method = aws_api_gateway_method.bkr-reco-v2-get-method.http_method
+  status_code = "200"
+
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = true
+  }
+}
+
 resource "aws_api_gateway_method_response" "bkr-health-get-response" {
   rest_api_id = aws_api_gateway_rest_api.bkr-rest-api.id
   resource_id = aws_api_gateway_resource.bkr-health-endpoint.id
@@ -439,9 +965,21 @@ resource "aws_api_gateway_deployment" "bkr-api-gw-deployment" {
     aws_api_gateway_integration.bkr-health-options,
     aws_api_gateway_method.bkr-reco-v1-get-method,
     aws_api_gateway_integration.bkr-lambda-reco-v1,
+    aws_api_gateway_method.bkr-reco-v1-post-method,
+    aws_api_gateway_integration.bkr-lambda-reco-v1-batch,
     aws_api_gateway_method.bkr-reco-v1-options-method,
     aws_api_gateway_integration.bkr-reco-v1-options,
     aws_api_gateway_method_response.bkr-reco-v1-get-response,
+    aws_api_gateway_method.bkr-reco-v2-get-method,
+    aws_api_gateway_integration.bkr-lambda-reco-v2,
+    aws_api_gateway_method.bkr-reco-v2-options-method,
+    aws_api_gateway_integration.bkr-reco-v2-options,
+    aws_api_gateway_method_response.bkr-reco-v2-get-response,
+    aws_api_gateway_method.bkr-cities-get-method,
+    aws_api_gateway_integration.bkr-lambda-cities,
+    aws_api_gateway_method.bkr-cities-options-method,
+    aws_api_gateway_integration.bkr-cities-options,
+    aws_api_gateway_method_response.bkr-cities-get-response,
     aws_api_gateway_method_response.bkr-health-get-response
   ]
 
@@ -455,6 +993,17 @@ resource "aws_api_gateway_deployment" "bkr-api-gw-deployment" {
       aws_api_gateway_resource.bkr-reco-v1-endpoint.id,
       aws_api_gateway_method.bkr-reco-v1-get-method.id,
       aws_api_gateway_integration.bkr-lambda-reco-v1.id,
+      aws_api_gateway_method.bkr-reco-v1-post-method.id,
+      aws_api_gateway_integration.bkr-lambda-reco-v1-batch.id,
+      aws_api_gateway_resource.bkr-reco-v2-endpoint.id,
+      aws_api_gateway_method.bkr-reco-v2-get-method.id,
+      aws_api_gateway_integration.bkr-lambda-reco-v2.id,
+      aws_api_gateway_resource.bkr-cities-endpoint.id,
+      aws_api_gateway_method.bkr-cities-get-method.id,
+      aws_api_gateway_integration.bkr-lambda-cities.id,
+      # Integrations are updated in place when their target changes, keeping their id
+      aws_api_gateway_integration.bkr-lambda-reco-v1.uri,
+      aws_api_gateway_integration.bkr-lambda-reco-v2.uri,
     ]))
   }
 
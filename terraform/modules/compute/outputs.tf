@@ -2,3 +2,8 @@ output "api_gateway_invoke_url" {
   description = "Invoke URL for the API Gateway"
   value       = aws_api_gateway_stage.bkr-api-stage.invoke_url
 }
+
+output "user_interactions_stream_failures_queue_url" {
+  description = "URL of the queue holding user_interactions stream batches the popularity aggregation gave up on"
+  value       = aws_sqs_queue.bkr-user-interactions-stream-failures.url
+}
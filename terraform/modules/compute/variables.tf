@@ -14,6 +14,18 @@ variable "dynamodb_table_names" {
   type = map(string)
 }
 
+variable "hotels_city_index_name" {
+  type = string
+}
+
+variable "user_interactions_user_index_name" {
+  type = string
+}
+
+variable "user_interactions_stream_arn" {
+  type = string
+}
+
 variable "s3_bucket_names" {
   type = object({
     datasets  = string
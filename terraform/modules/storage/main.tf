@@ -20,6 +20,9 @@ locals {
     artefacts = "${var.project_prefix}-artefacts-${random_id.bkr-s3-bucket-suffix.hex}"
     website   = "${var.project_prefix}-website-${random_id.bkr-s3-bucket-suffix.hex}"
   }
+
+  hotels-city-index-name            = "city-popularity-index"
+  user-interactions-user-index-name = "user-timestamp-index"
 }
 
 # S3 Buckets
@@ -70,6 +73,26 @@ resource "aws_dynamodb_table" "bkr-hotels-dynamodb-table" {
     name = "hotel_id"
     type = "S"
   }
+
+  attribute {
+    name = "city_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "popularity_score"
+    type = "N"
+  }
+
+  # City-partitioned read path for the recommenders, most popular first
+  global_secondary_index {
+    name               = local.hotels-city-index-name
+    hash_key           = "city_id"
+    range_key          = "popularity_score"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["hotel_name", "rating", "price_band", "tags"]
+  }
+
   server_side_encryption {
     enabled     = true
     kms_key_arn = aws_kms_key.bkr-kms-key.arn
@@ -89,6 +112,87 @@ resource "aws_dynamodb_table" "bkr-user-interactions-dynamodb-table" {
     name = "interaction_id"
     type = "S"
   }
+
+  attribute {
+    name = "user_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "timestamp"
+    type = "S"
+  }
+
+  # Per-user read path: a user's interactions, newest first, without scanning the table
+  global_secondary_index {
+    name               = local.user-interactions-user-index-name
+    hash_key           = "user_id"
+    range_key          = "timestamp"
+    projection_type    = "INCLUDE"
+    non_key_attributes = ["hotel_id", "interaction_type", "session_id"]
+  }
+
+  # New interactions feed the popularity aggregates in data-ingestion
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
+  server_side_encryption {
+    enabled     = true
+    kms_key_arn = aws_kms_key.bkr-kms-key.arn
+  }
+  point_in_time_recovery {
+    enabled = true
+  }
+}
+
+# DynamoDB Table for per-hotel decayed engagement, aggregated from user interactions
+resource "aws_dynamodb_table" "bkr-hotel-popularity-dynamodb-table" {
+  name         = "${var.project_prefix}-${var.environment}-hotel-popularity"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "hotel_id"
+
+  attribute {
+    name = "hotel_id"
+    type = "S"
+  }
+  server_side_encryption {
+    enabled     = true
+    kms_key_arn = aws_kms_key.bkr-kms-key.arn
+  }
+  point_in_time_recovery {
+    enabled = true
+  }
+}
+
+# DynamoDB Table for the item-item co-visit index: top-N similar hotels per hotel, built from user interactions
+resource "aws_dynamodb_table" "bkr-hotel-neighbours-dynamodb-table" {
+  name         = "${var.project_prefix}-${var.environment}-hotel-neighbours"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "hotel_id"
+
+  attribute {
+    name = "hotel_id"
+    type = "S"
+  }
+  server_side_encryption {
+    enabled     = true
+    kms_key_arn = aws_kms_key.bkr-kms-key.arn
+  }
+  point_in_time_recovery {
+    enabled = true
+  }
+}
+
+# DynamoDB Table for cities, loaded from cities.csv: names, countries and popularity for city lookup
+resource "aws_dynamodb_table" "bkr-cities-dynamodb-table" {
+  name         = "${var.project_prefix}-${var.environment}-cities"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "city_id"
+
+  attribute {
+    name = "city_id"
+    type = "S"
+  }
   server_side_encryption {
     enabled     = true
     kms_key_arn = aws_kms_key.bkr-kms-key.arn
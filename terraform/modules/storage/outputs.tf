@@ -23,5 +23,23 @@ output "dynamodb-table-names" {
     hotels            = aws_dynamodb_table.bkr-hotels-dynamodb-table.name
     user_interactions = aws_dynamodb_table.bkr-user-interactions-dynamodb-table.name
     experiment_config = aws_dynamodb_table.bkr-experiment-config-dynamodb-table.name
+    hotel_popularity  = aws_dynamodb_table.bkr-hotel-popularity-dynamodb-table.name
+    hotel_neighbours  = aws_dynamodb_table.bkr-hotel-neighbours-dynamodb-table.name
+    cities            = aws_dynamodb_table.bkr-cities-dynamodb-table.name
   }
 }
+
+output "hotels-city-index-name" {
+  description = "Name of the city_id GSI on the hotels table"
+  value       = local.hotels-city-index-name
+}
+
+output "user-interactions-user-index-name" {
+  description = "Name of the user_id GSI on the user interactions table"
+  value       = local.user-interactions-user-index-name
+}
+
+output "user-interactions-stream-arn" {
+  description = "ARN of the user interactions table stream"
+  value       = aws_dynamodb_table.bkr-user-interactions-dynamodb-table.stream_arn
+}
@@ -0,0 +1,73 @@
+"""Throughput of the reco_v1 batch entry point vs one query per invocation.
+
+Catalogs are built in memory (as a warm container would have them cached),
+so this isolates the per-query work: answering each query on its own, the
+way one GET invocation does, against run_batch grouping the same queries by
+city, ranking each distinct tag profile once and scoring a city's profiles
+together. Results are checked to be identical. Real single-query traffic
+also pays one Lambda invocation (and API Gateway) per query, which is not
+counted here.
+
+    python tools/benchmarks/bench_batch_reco.py --queries 20000 --cities 50 --hotels-per-city 10,100,500
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'reco_v1'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+sys.path.insert(0, os.path.dirname(__file__))
+from batch import run_batch  # noqa: E402
+from bench_tag_index import make_hotels  # noqa: E402
+from generate_synthetic_data import HOTEL_TAGS  # noqa: E402
+from scoring import CityCatalog  # noqa: E402
+
+
+def make_queries(count, city_ids):
+    return [
+        {
+            'city_id': random.choice(city_ids),
+            'user_tags': ','.join(random.sample(HOTEL_TAGS, random.choice([0, 1, 2, 2, 3, 3, 4, 5]))),
+            'limit': random.choice([5, 10, 10, 10, 20])
+        }
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--cities', type=int, default=50)
+    parser.add_argument('--hotels-per-city', default='10,100,500')
+    args = parser.parse_args()
+    random.seed(23)
+
+    print(f"{'hotels/city':>11} {'queries':>8} {'single q/s':>11} {'batch q/s':>10} {'speedup':>8}")
+    for hotels_per_city in (int(h) for h in args.hotels_per_city.split(',')):
+        catalogs = {f'CITY_{c + 1:03d}': CityCatalog(make_hotels(hotels_per_city, (1, 1050)))
+                    for c in range(args.cities)}
+        queries = make_queries(args.queries, list(catalogs))
+
+        def resolve_city(city_id):
+            return (city_id, city_id) if city_id in catalogs else (None, city_id)
+
+        started = time.perf_counter()
+        single = [json.dumps(run_batch([query], resolve_city, catalogs.__getitem__)[0]) for query in queries]
+        single_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batched = [json.dumps(result) for result in run_batch(queries, resolve_city, catalogs.__getitem__)]
+        batch_seconds = time.perf_counter() - started
+
+        assert single == batched, 'batch results differ from single queries'
+        print(f'{hotels_per_city:>11} {len(queries):>8} {len(queries) / single_seconds:11.0f} '
+              f'{len(queries) / batch_seconds:10.0f} {single_seconds / batch_seconds:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
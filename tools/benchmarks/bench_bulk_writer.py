@@ -0,0 +1,151 @@
+"""Measure data-ingestion write throughput: the old sequential loop vs BulkWriter.
+
+Writes a synthetic user_interactions.csv (1M rows by default), parses it the
+way the handler does and loads it into an in-process DynamoDB stand-in that
+adds per-call latency and randomly leaves items unprocessed, as DynamoDB does
+under throttling. Every run is checked for lost or duplicated items.
+
+    python tools/benchmarks/bench_bulk_writer.py --rows 1000000 --workers 1,8,32
+
+--moto runs the same comparison against moto instead (use fewer rows; moto
+is much slower than DynamoDB).
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'data-ingestion'))
+from bulk_writer import BulkWriter  # noqa: E402
+from handler import interaction_item  # noqa: E402
+
+TABLE_NAME = 'bench-user-interactions'
+INTERACTION_TYPES = ['view', 'click', 'book', 'favourite', 'search']
+
+
+class LocalDynamoDB:
+    """Thread-safe batch_write_item stand-in keyed on interaction_id."""
+
+    def __init__(self, latency, unprocessed_rate):
+        self.latency = latency
+        self.unprocessed_rate = unprocessed_rate
+        self.items = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def batch_write_item(self, RequestItems):
+        time.sleep(self.latency)
+        table_name, requests = next(iter(RequestItems.items()))
+        unprocessed = []
+        with self._lock:
+            self.calls += 1
+            for request in requests:
+                if random.random() < self.unprocessed_rate:
+                    unprocessed.append(request)
+                else:
+                    item = request['PutRequest']['Item']
+                    self.items[item['interaction_id']['S']] = item
+        return {'UnprocessedItems': {table_name: unprocessed} if unprocessed else {}}
+
+    def count(self):
+        return len(self.items)
+
+
+class MotoTable:
+    def __init__(self):
+        import boto3
+        self.client = boto3.client('dynamodb', region_name='us-east-1')
+        self.client.create_table(
+            TableName=TABLE_NAME,
+            BillingMode='PAY_PER_REQUEST',
+            AttributeDefinitions=[{'AttributeName': 'interaction_id', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'interaction_id', 'KeyType': 'HASH'}]
+        )
+
+    def batch_write_item(self, RequestItems):
+        return self.client.batch_write_item(RequestItems=RequestItems)
+
+    def count(self):
+        paginator = self.client.get_paginator('scan')
+        return sum(page['Count'] for page in paginator.paginate(TableName=TABLE_NAME, Select='COUNT'))
+
+    def drop(self):
+        self.client.delete_table(TableName=TABLE_NAME)
+
+
+def write_interactions_csv(path, rows):
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['interaction_id', 'user_id', 'hotel_id', 'interaction_type', 'timestamp', 'session_id'])
+        for r in range(rows):
+            writer.writerow([
+                f'INT_{r + 1:09d}', f'USER_{random.randint(1, 100000):06d}', f'HOTEL_{random.randint(1, 50000):06d}',
+                random.choice(INTERACTION_TYPES), '2025-07-01 12:00:00', f'SESSION_{random.randint(1, rows // 3 + 1):08d}'
+            ])
+
+
+def sequential_load(dynamodb, items):
+    """The loop data-ingestion ran before BulkWriter: one batch at a time, UnprocessedItems dropped."""
+    for i in range(0, len(items), 25):
+        request_items = {TABLE_NAME: [{'PutRequest': {'Item': item}} for item in items[i:i + 25]]}
+        dynamodb.batch_write_item(RequestItems=request_items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--workers', default='1,8,32')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Stand-in latency per batch_write_item call')
+    parser.add_argument('--unprocessed-rate', type=float, default=0.02, help='Share of items the stand-in leaves unprocessed')
+    parser.add_argument('--base-delay-ms', type=float, default=5.0, help='BulkWriter backoff base delay')
+    parser.add_argument('--moto', action='store_true')
+    args = parser.parse_args()
+    random.seed(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'user_interactions.csv')
+        write_interactions_csv(path, args.rows)
+        with open(path, newline='') as csvfile:
+            items = [interaction_item(row) for row in csv.DictReader(csvfile)]
+    print(f'{len(items)} interactions parsed')
+
+    if args.moto:
+        from moto import mock_aws
+        mock = mock_aws()
+        mock.start()
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    def new_table():
+        return MotoTable() if args.moto else LocalDynamoDB(args.latency_ms / 1000, args.unprocessed_rate)
+
+    print(f"{'writer':>14} {'seconds':>8} {'items/s':>10} {'stored':>9} {'lost':>7} {'retries':>8} {'speedup':>8}")
+    table = new_table()
+    started = time.perf_counter()
+    sequential_load(table, items)
+    baseline = time.perf_counter() - started
+    stored = table.count()
+    print(f"{'sequential':>14} {baseline:8.2f} {len(items) / baseline:10.0f} {stored:>9} {len(items) - stored:>7} {'-':>8} {1:7.1f}x")
+    if args.moto:
+        table.drop()
+
+    for workers in (int(w) for w in args.workers.split(',')):
+        table = new_table()
+        stats = BulkWriter(table, TABLE_NAME, max_workers=workers,
+                           base_delay=args.base_delay_ms / 1000).write(iter(items))
+        stored = table.count()
+        assert stats['written'] == stored == len(items), (stats, stored)
+        assert stats['failed'] == 0
+        print(f"{f'bulk x{workers}':>14} {stats['seconds']:8.2f} {stats['items_per_second']:10.0f} {stored:>9} "
+              f"{len(items) - stored:>7} {stats['retries']:>8} {baseline / stats['seconds']:7.1f}x")
+        if args.moto:
+            table.drop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Compare the reco_v1 city read path (GSI Query) against the old filtered Scan.
+
+Hotels per city stays fixed while the catalog grows, so the Query should read
+the same items (and bill the same capacity) at every size while the Scan grows
+with the table.
+
+    python tools/benchmarks/bench_city_query.py --sizes 500,5000,50000,500000
+
+Runs against moto by default. Pass --endpoint-url http://localhost:8000 to use
+DynamoDB Local instead, which gives more realistic latencies at large sizes.
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'lambda', 'reco_v1'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'lambda', 'shared', 'python'))
+from catalog import CITY_INDEX_NAME, HOTEL_ATTRIBUTES, query_city_hotels  # noqa: E402
+
+TABLE_NAME = 'bench-hotels'
+TAGS = ['Free WiFi', 'Spa', 'City Center', 'Swimming Pool', 'Pet Friendly', 'Breakfast Included', 'Luxury', 'Budget']
+RCU_BYTES = 4096
+
+
+def item_size(item):
+    """Approximate DynamoDB item size in bytes (attribute names + values)."""
+    size = 0
+    for name, value in item.items():
+        size += len(name)
+        if 'S' in value:
+            size += len(value['S'].encode('utf-8'))
+        else:
+            size += len(value['N']) // 2 + 1
+    return size
+
+
+def read_capacity(total_bytes):
+    """Eventually consistent RCUs for a read of total_bytes."""
+    return math.ceil(total_bytes / RCU_BYTES) * 0.5
+
+
+def make_hotel(i, num_cities):
+    return {
+        'hotel_id': {'S': f'HOTEL_{i + 1:07d}'},
+        'city_id': {'S': f'CITY_{i % num_cities + 1:05d}'},
+        'hotel_name': {'S': f'Bench Hotel {i + 1}'},
+        'rating': {'N': str(random.choice([2.0, 3.0, 3.5, 4.0, 4.5, 5.0]))},
+        'price_band': {'S': random.choice(['budget', 'mid', 'luxury'])},
+        'tags': {'S': ','.join(random.sample(TAGS, 3))},
+        'popularity_score': {'N': str(random.randint(1, 1000))},
+    }
+
+
+def create_table(dynamodb):
+    dynamodb.create_table(
+        TableName=TABLE_NAME,
+        BillingMode='PAY_PER_REQUEST',
+        AttributeDefinitions=[
+            {'AttributeName': 'hotel_id', 'AttributeType': 'S'},
+            {'AttributeName': 'city_id', 'AttributeType': 'S'},
+            {'AttributeName': 'popularity_score', 'AttributeType': 'N'},
+        ],
+        KeySchema=[{'AttributeName': 'hotel_id', 'KeyType': 'HASH'}],
+        GlobalSecondaryIndexes=[{
+            'IndexName': CITY_INDEX_NAME,
+            'KeySchema': [
+                {'AttributeName': 'city_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'popularity_score', 'KeyType': 'RANGE'},
+            ],
+            'Projection': {
+                'ProjectionType': 'INCLUDE',
+                'NonKeyAttributes': ['hotel_name', 'rating', 'price_band', 'tags'],
+            },
+        }],
+    )
+
+
+def load_catalog(dynamodb, num_hotels, hotels_per_city):
+    """Write num_hotels items and return the per-city byte totals plus the table byte total."""
+    num_cities = max(1, num_hotels // hotels_per_city)
+    city_bytes = {}
+    table_bytes = 0
+    batch = []
+    for i in range(num_hotels):
+        item = make_hotel(i, num_cities)
+        size = item_size(item)
+        table_bytes += size
+        city_bytes[item['city_id']['S']] = city_bytes.get(item['city_id']['S'], 0) + size
+        batch.append({'PutRequest': {'Item': item}})
+        if len(batch) == 25:
+            dynamodb.batch_write_item(RequestItems={TABLE_NAME: batch})
+            batch = []
+    if batch:
+        dynamodb.batch_write_item(RequestItems={TABLE_NAME: batch})
+    return city_bytes, table_bytes
+
+
+def scan_city_hotels(dynamodb, city_id):
+    """The read path reco_v1 used before the city index, paginated so results are complete."""
+    scan_kwargs = {
+        'TableName': TABLE_NAME,
+        'FilterExpression': '#city_id = :city_value',
+        'ExpressionAttributeNames': {'#city_id': 'city_id'},
+        'ExpressionAttributeValues': {':city_value': {'S': city_id}},
+    }
+    items = []
+    while True:
+        response = dynamodb.scan(**scan_kwargs)
+        items.extend(response.get('Items', []))
+        if not response.get('LastEvaluatedKey'):
+            return items
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def time_reads(read, repeats):
+    timings = []
+    items = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        items = read()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), items
+
+
+def run_size(dynamodb, num_hotels, hotels_per_city, repeats, skip_scan):
+    create_table(dynamodb)
+    try:
+        city_bytes, table_bytes = load_catalog(dynamodb, num_hotels, hotels_per_city)
+        city_id = 'CITY_00001'
+
+        query_ms, query_items = time_reads(lambda: query_city_hotels(dynamodb, TABLE_NAME, city_id), repeats)
+        projected_bytes = sum(item_size({k: v for k, v in item.items() if k in HOTEL_ATTRIBUTES}) for item in query_items)
+        row = {
+            'hotels': num_hotels,
+            'city_hotels': len(query_items),
+            'query_ms': query_ms,
+            'query_rcu': read_capacity(projected_bytes),
+            'scan_ms': None,
+            'scan_rcu': read_capacity(table_bytes),
+        }
+        assert projected_bytes <= city_bytes[city_id]
+
+        if not skip_scan:
+            row['scan_ms'], scan_items = time_reads(lambda: scan_city_hotels(dynamodb, city_id), repeats)
+            assert len(scan_items) == len(query_items)
+        return row
+    finally:
+        dynamodb.delete_table(TableName=TABLE_NAME)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='500,5000,50000,500000', help='Comma separated catalog sizes')
+    parser.add_argument('--hotels-per-city', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--endpoint-url', help='DynamoDB Local endpoint; defaults to moto')
+    parser.add_argument('--skip-scan', action='store_true', help='Only time the Query path')
+    args = parser.parse_args()
+    random.seed(42)
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    print(f"{'hotels':>9} {'city':>5} {'query ms':>9} {'query RCU':>10} {'scan ms':>9} {'scan RCU':>9}")
+
+    def report(row):
+        scan_ms = f"{row['scan_ms']:9.2f}" if row['scan_ms'] is not None else f"{'-':>9}"
+        print(f"{row['hotels']:>9} {row['city_hotels']:>5} {row['query_ms']:9.2f} {row['query_rcu']:10.1f} "
+              f"{scan_ms} {row['scan_rcu']:9.1f}")
+
+    if args.endpoint_url:
+        dynamodb = boto3.client('dynamodb', endpoint_url=args.endpoint_url, region_name='us-east-1',
+                                aws_access_key_id='local', aws_secret_access_key='local')
+        for size in sizes:
+            report(run_size(dynamodb, size, args.hotels_per_city, args.repeats, args.skip_scan))
+        return
+
+    from moto import mock_aws
+
+    with mock_aws():
+        dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+        for size in sizes:
+            report(run_size(dynamodb, size, args.hotels_per_city, args.repeats, args.skip_scan))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Cold start of each Lambda handler on a request that never reaches AWS.
+
+Every run is a fresh interpreter, like a new container: it imports the
+handler and answers one request that stops before any AWS call (the
+router's /health, a bad limit for reco_v1, a missing user for reco_v2, a file
+data-ingestion has no loader for). 'lazy' is the handler as shipped, with
+boto3 and numpy imported on first use; 'eager' first does what the handler
+module tops used to do (import boto3 and create their clients), for
+comparison. Reported: the median over --runs of the whole process (with
+interpreter startup), the handler import and the first request, whether
+boto3 and numpy ended up loaded, and peak RSS.
+
+--importtime also runs each lazy cold start under python -X importtime and
+lists its heaviest top-level imports.
+
+    python tools/benchmarks/bench_cold_start.py --runs 5 --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+SHARED = os.path.join(ROOT, 'lambda', 'shared', 'python')
+
+# Handler directory and a request it answers without calling AWS
+TARGETS = {
+    'router': ('router', {'path': '/health'}),
+    'reco_v1': ('reco_v1', {'queryStringParameters': {'city': 'London', 'limit': 'ten'}}),
+    'reco_v2': ('reco_v2', {'queryStringParameters': {'limit': '10'}}),
+    'data_ingestion': ('data-ingestion', {'file': 'README.txt'}),
+}
+
+# What each handler's module top did before clients were created lazily
+EAGER = {
+    'router': "import boto3; boto3.client('dynamodb')",
+    'reco_v1': "import boto3; from boto3.dynamodb.types import TypeDeserializer; boto3.client('dynamodb'); TypeDeserializer()",
+    'reco_v2': "import boto3; from boto3.dynamodb.types import TypeDeserializer; boto3.client('dynamodb'); TypeDeserializer()",
+    'data_ingestion': "import boto3; from botocore.config import Config; import numpy",
+}
+
+ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'eu-west-1',
+    'HOTELS_TABLE': 'bench-hotels',
+    'CITIES_TABLE': 'bench-cities',
+    'USER_INTERACTIONS_TABLE': 'bench-user-interactions',
+    'HOTEL_NEIGHBOURS_TABLE': 'bench-hotel-neighbours',
+    'EXPERIMENT_CONFIG_TABLE': 'bench-experiment-config',
+    'DATASETS_BUCKET': 'bench-datasets',
+}
+
+CHILD = '''
+import importlib.util, json, logging, os, sys, time
+started = time.perf_counter()
+directory, event, eager = sys.argv[1], json.loads(sys.argv[2]), sys.argv[3]
+sys.path[:0] = [directory, {shared!r}]
+exec(eager)
+spec = importlib.util.spec_from_file_location('handler', os.path.join(directory, 'handler.py'))
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+logging.getLogger().handlers.clear()
+logging.getLogger().addHandler(logging.NullHandler())
+imported = time.perf_counter()
+response = module.lambda_handler(event, None)
+answered = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'request_ms': (answered - imported) * 1000,
+    'status': response.get('statusCode'),
+    'boto3': 'boto3' in sys.modules,
+    'numpy': 'numpy' in sys.modules,
+    # VmHWM rather than ru_maxrss, which a child inherits from the process that started it
+    'peak_rss_mb': next(int(line.split()[1]) for line in open('/proc/self/status') if line.startswith('VmHWM')) / 1024
+}}))
+'''.format(shared=SHARED)
+
+
+def cold_start(target, eager, python_flags=()):
+    directory, event = TARGETS[target]
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *python_flags, '-c', CHILD, os.path.join(ROOT, 'lambda', directory), json.dumps(event),
+         EAGER[target] if eager else ''],
+        capture_output=True, text=True, check=True, env={**os.environ, **ENVIRONMENT})
+    stats = json.loads(result.stdout)
+    stats['process_ms'] = (time.perf_counter() - started) * 1000
+    return stats, result.stderr
+
+
+def heaviest_imports(importtime_output, count):
+    """Top-level imports by cumulative microseconds, from python -X importtime's stderr."""
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented further under the module that pulled them in
+        if not name.startswith('  '):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--importtime', action='store_true')
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'handler':>15} {'mode':>6} {'process ms':>11} {'import ms':>10} {'request ms':>11} "
+          f"{'status':>6} {'boto3':>6} {'numpy':>6} {'peak MB':>8}")
+    for target in TARGETS:
+        for eager in (False, True):
+            runs = [cold_start(target, eager)[0] for _ in range(args.runs)]
+            median = {key: statistics.median(run[key] for run in runs)
+                      for key in ('process_ms', 'import_ms', 'request_ms', 'peak_rss_mb')}
+            last = runs[-1]
+            print(f"{target:>15} {'eager' if eager else 'lazy':>6} {median['process_ms']:11.1f} "
+                  f"{median['import_ms']:10.1f} {median['request_ms']:11.2f} {last['status']:>6} "
+                  f"{'yes' if last['boto3'] else 'no':>6} {'yes' if last['numpy'] else 'no':>6} "
+                  f"{median['peak_rss_mb']:8.1f}")
+
+    if args.importtime:
+        for target in TARGETS:
+            _, stderr = cold_start(target, False, ('-X', 'importtime'))
+            print(f'\n{target}: heaviest imports (cumulative ms)')
+            for cumulative, name in heaviest_imports(stderr, args.top):
+                print(f'  {cumulative / 1000:8.1f}  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Per-hotel cost of turning a city's DynamoDB items into a catalog and a response.
+
+A --hotels city is built as the Query returns it, in DynamoDB's wire format,
+and put through both paths reco_v1 has had:
+
+  boto3    TypeDeserializer into Decimals, a second walk converting them to
+           floats, CityCatalog splitting each tags string, json.dumps with
+           a Decimal-aware encoder
+  decoder  catalog.decode_hotels reading strings and numbers straight off the
+           wire into HotelColumns, orjson
+
+Both must produce the same catalog ranking and the same JSON. Reported: the
+median over --runs of each step per hotel. --profile also prints each path's
+heaviest functions under cProfile.
+
+    python tools/benchmarks/bench_hotel_decode.py --hotels 10000 --runs 5 --profile
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'reco_v1'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+os.environ.pop('CITIES_TABLE', None)
+import aws_clients  # noqa: E402
+import handler  # noqa: E402
+from catalog import decode_hotels  # noqa: E402
+from generate_synthetic_data import HOTEL_RATINGS, HOTEL_TAGS  # noqa: E402
+from scoring import CityCatalog  # noqa: E402
+
+STEPS = ('decode', 'catalog', 'serialize')
+
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super().default(obj)
+
+
+def make_items(count):
+    return [
+        {
+            'hotel_id': {'S': f'HOTEL_{i + 1:07d}'},
+            'hotel_name': {'S': f'Hotel {i + 1}'},
+            'city_id': {'S': 'CITY_001'},
+            'rating': {'N': str(random.choice(HOTEL_RATINGS))},
+            'price_band': {'S': random.choice(['$', '$$', '$$$', '$$$$'])},
+            'tags': {'S': ','.join(random.sample(HOTEL_TAGS, random.randint(3, 6)))},
+            'popularity_score': {'N': str(round(random.random(), 4))},
+        }
+        for i in range(count)
+    ]
+
+
+def boto3_path(items):
+    deserializer = aws_clients.deserializer()
+    started = time.perf_counter()
+    hotels = []
+    for item in items:
+        hotel = {}
+        for key, value in item.items():
+            value = deserializer.deserialize(value)
+            hotel[key] = float(value) if isinstance(value, Decimal) else value
+        hotels.append(hotel)
+    decoded = time.perf_counter()
+    catalog = CityCatalog(hotels)
+    built = time.perf_counter()
+    body = [json.dumps({**hotel, 'recommendation_score': 0.5}, cls=DecimalEncoder) for hotel in catalog.hotels]
+    return catalog, body, (decoded - started, built - decoded, time.perf_counter() - built)
+
+
+def decoder_path(items):
+    started = time.perf_counter()
+    hotels = decode_hotels(items)
+    decoded = time.perf_counter()
+    catalog = CityCatalog(hotels)
+    built = time.perf_counter()
+    body = [handler.to_json({**hotel, 'recommendation_score': 0.5}) for hotel in catalog.hotels]
+    return catalog, body, (decoded - started, built - decoded, time.perf_counter() - built)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--profile', action='store_true')
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+    random.seed(20)
+    items = make_items(args.hotels)
+
+    expected_catalog, expected_body, _ = boto3_path(items)
+    catalog, body, _ = decoder_path(items)
+    assert [json.loads(hotel) for hotel in body] == [json.loads(hotel) for hotel in expected_body], 'responses differ'
+    assert catalog.default_order.tolist() == expected_catalog.default_order.tolist(), 'rankings differ'
+    profile = ['Pool', 'Spa']
+    assert catalog.top_k(profile, 50)[0].tolist() == expected_catalog.top_k(profile, 50)[0].tolist(), 'rankings differ'
+
+    print(f"{args.hotels} hotels, us per hotel")
+    print(f"{'path':>8} {'decode':>8} {'catalog':>8} {'serialize':>10} {'total':>8}")
+    totals = {}
+    for name, path in (('boto3', boto3_path), ('decoder', decoder_path)):
+        runs = [path(items)[2] for _ in range(args.runs)]
+        medians = [statistics.median(run[i] for run in runs) * 1e6 / args.hotels for i in range(len(STEPS))]
+        totals[name] = sum(medians)
+        print(f'{name:>8} {medians[0]:8.2f} {medians[1]:8.2f} {medians[2]:10.2f} {totals[name]:8.2f}')
+    print(f"decoder path is {totals['boto3'] / totals['decoder']:.1f}x faster")
+
+    if args.profile:
+        for name, path in (('boto3', boto3_path), ('decoder', decoder_path)):
+            profiler = cProfile.Profile()
+            profiler.runcall(path, items)
+            print(f'\n{name}: heaviest functions by own time')
+            pstats.Stats(profiler).sort_stats('tottime').print_stats(args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Memory, garbage-collection and serialisation cost of reco_v1's hotel records.
+
+Each city's hotels are decoded from DynamoDB wire items into
+
+  dicts    one dict per hotel, as decode_hotels returned them before
+           HotelColumns (the representation cached catalogs held)
+  columns  catalog.decode_hotels' HotelColumns, as cached catalogs hold them now
+
+and measured three ways:
+
+  memory     bytes per hotel still allocated (tracemalloc) once the wire
+             items are gone, strings included
+  gc         a full gc.collect() with --cities cities of --hotels hotels held,
+             as a warm container's catalog cache holds them; the "none" row
+             is the collection with no hotels held, what the interpreter and
+             its imports cost anyway
+  serialise  us and JSON bytes per hotel for a response fragment with its
+             recommendation_score: every attribute, and the --fields projection
+
+    python tools/benchmarks/bench_hotel_records.py --hotels 2000 --cities 64 --fields hotel_id,hotel_name,rating
+"""
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'reco_v1'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.pop('CITIES_TABLE', None)
+import handler  # noqa: E402
+from bench_hotel_decode import make_items  # noqa: E402
+from catalog import decode_hotels  # noqa: E402
+from hotel_records import parse_fields  # noqa: E402
+from scoring import CityCatalog  # noqa: E402
+
+
+def dict_records(items):
+    hotels = []
+    for item in items:
+        hotel = {}
+        for key, value in item.items():
+            string = value.get('S')
+            hotel[key] = string if string is not None else float(value['N'])
+        hotels.append(hotel)
+    return hotels
+
+
+DECODERS = {'dicts': dict_records, 'columns': decode_hotels}
+
+
+def bytes_per_hotel(decode, count):
+    gc.collect()
+    tracemalloc.start()
+    items = make_items(count)
+    hotels = decode(items)
+    del items
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del hotels
+    return retained / count
+
+
+def gc_ms(decode, cities, count, runs=5):
+    held = [decode(make_items(count)) for _ in range(cities)] if decode else []
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        gc.collect()
+        timings.append((time.perf_counter() - started) * 1e3)
+    del held
+    gc.collect()
+    return statistics.median(timings)
+
+
+def serialise_us(encode_all, count, runs=5):
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        fragments = encode_all()
+        best = min(best, time.perf_counter() - started)
+    return best * 1e6 / count, sum(map(len, fragments)) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=2000)
+    parser.add_argument('--cities', type=int, default=64)
+    parser.add_argument('--fields', default='hotel_id,hotel_name,rating,recommendation_score')
+    args = parser.parse_args()
+    random.seed(23)
+    fields = parse_fields(args.fields)
+
+    print(f'{args.hotels} hotels per city')
+    print(f"{'records':>8} {'bytes/hotel':>12} {f'gc ms, {args.cities} cities':>18}")
+    print(f"{'none':>8} {'-':>12} {gc_ms(None, args.cities, args.hotels):18.2f}")
+    for name, decode in DECODERS.items():
+        print(f'{name:>8} {bytes_per_hotel(decode, args.hotels):12.0f} {gc_ms(decode, args.cities, args.hotels):18.2f}')
+
+    items = make_items(args.hotels)
+    dicts = dict_records(items)
+    catalog = CityCatalog(decode_hotels(items))
+    rows = range(args.hotels)
+    assert [catalog.record(row, 0.5) for row in rows] == [{**hotel, 'recommendation_score': 0.5} for hotel in dicts]
+    paths = {
+        'dicts': lambda: [handler.to_json({**hotel, 'recommendation_score': 0.5}) for hotel in dicts],
+        'columns': lambda: [handler.to_json(catalog.record(row, 0.5)) for row in rows],
+        'fields': lambda: [handler.to_json(catalog.record(row, 0.5, fields)) for row in rows],
+    }
+    print(f"\n{'serialise':>8} {'us/hotel':>9} {'bytes/hotel':>12}   fields={','.join(fields)}")
+    for name, encode_all in paths.items():
+        us, size = serialise_us(encode_all, args.hotels)
+        print(f'{name:>8} {us:9.2f} {size:12.0f}')
+
+
+if __name__ == '__main__':
+    main()
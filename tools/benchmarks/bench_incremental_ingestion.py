@@ -0,0 +1,227 @@
+"""Incremental (delta-only) reloads of user_interactions.csv against full reloads.
+
+data-ingestion's lambda_handler runs end to end over in-memory stand-ins:
+an S3 holding the datasets and artefacts buckets (ETags are content
+hashes, Range and IfMatch honoured) and a user_interactions table taking
+batch_write_item puts and deletes after --latency-ms, and answering the key
+Scan a first incremental load makes. The same synthetic file is loaded
+
+  full          the default mode, every row put again
+  first         incremental without row hashes: keys scanned, every row put
+  unchanged     incremental, same file again
+  delta         incremental after --change-pct of the rows were edited,
+                as many deleted and as many added
+
+and after every load the table is checked to hold exactly the file's rows.
+
+    python tools/benchmarks/bench_incremental_ingestion.py --rows 1000000 --change-pct 1
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'data-ingestion'))
+os.environ.update(DATASETS_BUCKET='datasets', ARTEFACTS_BUCKET='artefacts', USER_INTERACTIONS_TABLE='bench-user-interactions')
+os.environ.pop('HOTEL_NEIGHBOURS_TABLE', None)
+from botocore.exceptions import ClientError  # noqa: E402
+
+import aws_clients  # noqa: E402
+import handler  # noqa: E402
+
+FILE_NAME = 'user_interactions.csv'
+HEADER = 'interaction_id,user_id,hotel_id,interaction_type,timestamp,session_id\n'
+INTERACTION_TYPES = ['view', 'click', 'book', 'favourite', 'search']
+
+
+class _Body:
+    def __init__(self, data):
+        self.data = data
+
+    def iter_chunks(self, chunk_size):
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start:start + chunk_size]
+
+    def read(self):
+        return self.data
+
+
+class MemoryS3:
+    """get/put/head/delete_object over dicts, counting the bytes read from each bucket."""
+
+    def __init__(self):
+        self.objects = {}
+        self.bytes_read = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.objects[Bucket, Key] = Body if isinstance(Body, bytes) else Body.encode('utf-8')
+
+    def head_object(self, Bucket, Key):
+        data = self._data(Bucket, Key)
+        return {'ETag': f'"{hashlib.md5(data).hexdigest()}"', 'ContentLength': len(data)}
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        data = self._data(Bucket, Key)
+        if IfMatch and IfMatch != self.head_object(Bucket, Key)['ETag']:
+            raise ClientError({'Error': {'Code': 'PreconditionFailed'}}, 'GetObject')
+        if Range:
+            first, _, last = Range[len('bytes='):].partition('-')
+            data = data[int(first):int(last) + 1 if last else None]
+        self.bytes_read[Bucket] = self.bytes_read.get(Bucket, 0) + len(data)
+        return {'Body': _Body(data)}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def _data(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        return self.objects[Bucket, Key]
+
+
+class _ScanPaginator:
+    def __init__(self, table):
+        self.table = table
+
+    def paginate(self, TableName, ProjectionExpression, ExpressionAttributeNames):
+        key = ExpressionAttributeNames['#key']
+        with self.table._lock:
+            keys = list(self.table.items)
+        self.table.calls['scan'] += 1
+        yield {'Items': [{key: {'S': k}} for k in keys]}
+
+
+class MemoryTable:
+    """batch_write_item and a key Scan over one table keyed on interaction_id."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.items = {}
+        self.calls = {'batch_write_item': 0, 'scan': 0}
+        self.requests = {'PutRequest': 0, 'DeleteRequest': 0}
+        self._lock = threading.Lock()
+
+    def batch_write_item(self, RequestItems):
+        time.sleep(self.latency)
+        (requests,) = RequestItems.values()
+        with self._lock:
+            self.calls['batch_write_item'] += 1
+            for request in requests:
+                if 'PutRequest' in request:
+                    item = request['PutRequest']['Item']
+                    self.items[item['interaction_id']['S']] = item
+                    self.requests['PutRequest'] += 1
+                else:
+                    del self.items[request['DeleteRequest']['Key']['interaction_id']['S']]
+                    self.requests['DeleteRequest'] += 1
+        return {}
+
+    def get_paginator(self, operation):
+        return _ScanPaginator(self)
+
+    def reset_counts(self):
+        self.calls = dict.fromkeys(self.calls, 0)
+        self.requests = dict.fromkeys(self.requests, 0)
+
+
+def make_rows(count):
+    return {
+        f'INT_{i:09d}': [f'USER_{random.randrange(10000):06d}', f'HOTEL_{random.randrange(5000):06d}',
+                         random.choice(INTERACTION_TYPES), f'2025-07-{random.randint(1, 28):02d} 12:00:00',
+                         f'SESSION_{i // 3:08d}']
+        for i in range(count)
+    }
+
+
+def upload(s3, rows):
+    body = io.StringIO()
+    body.write(HEADER)
+    for key, values in rows.items():
+        body.write(f"{key},{','.join(values)}\n")
+    s3.put_object(Bucket='datasets', Key=FILE_NAME, Body=body.getvalue().encode('utf-8'))
+
+
+def edit(rows, change_pct):
+    rows = dict(rows)
+    count = max(1, int(len(rows) * change_pct / 100))
+    keys = random.sample(list(rows), 2 * count)
+    for key in keys[:count]:
+        rows[key] = [*rows[key][:2], 'book', *rows[key][3:]]
+    for key in keys[count:]:
+        del rows[key]
+    rows.update(make_rows_after(len(rows) + count, count))
+    return rows
+
+
+def make_rows_after(start, count):
+    return {f'NEW_{start + i:09d}': values for i, values in enumerate(make_rows(count).values())}
+
+
+def load(s3, table, name, event):
+    s3.bytes_read.clear()
+    table.reset_counts()
+    started = time.perf_counter()
+    response = handler.lambda_handler(event, None)
+    seconds = time.perf_counter() - started
+    assert response['statusCode'] == 200, response['body']
+    stats = json.loads(response['body'])['stats']
+    hashes = s3.objects.get(('artefacts', f'ingestion-row-hashes/{FILE_NAME}.bin'), b'')
+    print(f"{name:>10} {seconds:8.2f} {table.calls['batch_write_item']:>8} {table.calls['scan']:>5} "
+          f"{table.requests['PutRequest']:>8} {table.requests['DeleteRequest']:>8} "
+          f"{s3.bytes_read.get('artefacts', 0) / 1e6:10.2f} {len(hashes) / 1e6:9.2f}  "
+          f"{stats.get('inserted', '-')}/{stats.get('changed', '-')}/{stats.get('unchanged', '-')}/{stats.get('deleted', '-')}")
+
+
+def check(table, rows):
+    assert table.items.keys() == rows.keys(), 'table and file hold different rows'
+    for key, values in rows.items():
+        item = table.items[key]
+        assert [item[column]['S'] for column in ('user_id', 'hotel_id', 'interaction_type', 'timestamp', 'session_id')] == values, key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--change-pct', type=float, default=1.0)
+    parser.add_argument('--latency-ms', type=float, default=5)
+    args = parser.parse_args()
+    random.seed(22)
+
+    logging.getLogger().handlers = [logging.StreamHandler(io.StringIO())]
+    logging.getLogger('metrics').handlers = [logging.StreamHandler(io.StringIO())]
+    s3 = MemoryS3()
+    table = MemoryTable(args.latency_ms / 1000)
+    aws_clients.client = lambda service, **config: s3 if service == 's3' else table
+
+    rows = make_rows(args.rows)
+    upload(s3, rows)
+    print(f"{args.rows} rows, {len(s3.objects['datasets', FILE_NAME]) / 1e6:.1f} MB, "
+          f"{args.latency_ms:.0f} ms per batch_write_item")
+    print(f"{'load':>10} {'seconds':>8} {'batches':>8} {'scans':>5} {'puts':>8} {'deletes':>8} "
+          f"{'hashes MB':>10} {'stored MB':>9}  ins/chg/same/del")
+
+    load(s3, table, 'full', {'file': FILE_NAME})
+    check(table, rows)
+    load(s3, table, 'first', {'file': FILE_NAME, 'incremental': True})
+    check(table, rows)
+    load(s3, table, 'unchanged', {'file': FILE_NAME, 'incremental': True})
+    assert not table.calls['batch_write_item'], 'an unchanged reload wrote to the table'
+    check(table, rows)
+    rows = edit(rows, args.change_pct)
+    upload(s3, rows)
+    load(s3, table, 'delta', {'file': FILE_NAME, 'incremental': True})
+    check(table, rows)
+    load(s3, table, 'unchanged', {'file': FILE_NAME, 'incremental': True})
+    assert not table.calls['batch_write_item'], 'an unchanged reload wrote to the table'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Overhead of reco_v1's phase timings and EMF metrics on warm requests.
+
+Requests hit a cached catalog and, after the first of each key, the response
+cache: the cheapest path reco_v1 has, so the instrumentation's share is at
+its largest. The same requests are timed through
+
+  bare          lambda_handler with PhaseTimer.mark and Metrics.record
+                turned into no-ops
+  logged        bare plus the per-request INFO line of cache stats reco_v1
+                wrote before it had metrics
+  instrumented  lambda_handler as shipped, EMF documents formatted into a
+                discarded stream; with PROFILE_SAMPLE_RATE at 0 the sampling
+                decorator hands back the handler itself
+  sampled       lambda_handler with every request profiled (--sampled of them)
+
+each pass timing all of them in turn so drift on the machine hits all alike.
+
+    python tools/benchmarks/bench_metrics.py --requests 5000 --passes 5
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'reco_v1'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ['HOTELS_TABLE'] = 'bench-hotels'
+os.environ.pop('CITIES_TABLE', None)
+import handler  # noqa: E402
+import metrics  # noqa: E402
+from bench_response_cache import make_events  # noqa: E402
+from bench_tag_index import make_hotels  # noqa: E402
+from generate_synthetic_data import HOTEL_TAGS  # noqa: E402
+from scoring import CityCatalog  # noqa: E402
+
+
+def mean_us(call, events):
+    started = time.perf_counter()
+    for event in events:
+        call(event, None)
+    return (time.perf_counter() - started) * 1e6 / len(events)
+
+
+def logged(event, context):
+    response = handler.lambda_handler(event, context)
+    handler.logger.info(f"Catalog cache hit for {event['queryStringParameters']['city_id']}: "
+                        f"{json.dumps({'catalog': handler.catalog_cache.stats(), 'responses': handler.response_cache.stats()})}")
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--passes', type=int, default=5)
+    parser.add_argument('--sampled', type=int, default=200)
+    args = parser.parse_args()
+    random.seed(20)
+
+    logging.getLogger().handlers = [logging.StreamHandler(io.StringIO())]
+    logging.getLogger('metrics').handlers = [logging.StreamHandler(io.StringIO())]
+    catalogs = {f'CITY_{c + 1:03d}': CityCatalog(make_hotels(500, (1, 1050))) for c in range(10)}
+    handler.load_city_catalog = lambda table_name, city_id, timer: catalogs[city_id]
+    handler.get_catalog_version = lambda table_name, timer: 1
+    profiles = [()] + [tuple(random.sample(HOTEL_TAGS, random.randint(1, 3))) for _ in range(19)]
+    events = make_events(args.requests, list(catalogs), profiles)
+    for event in events:
+        handler.lambda_handler(event, None)
+
+    results = {'bare': [], 'logged': [], 'instrumented': []}
+    for _ in range(args.passes):
+        # Stub once per pass rather than per request, so the stubbing itself is not timed
+        mark, record = metrics.PhaseTimer.mark, metrics.Metrics.record
+        metrics.PhaseTimer.mark = lambda self, phase: None
+        metrics.Metrics.record = lambda self, values, unit='Milliseconds': None
+        results['bare'].append(mean_us(handler.lambda_handler, events))
+        results['logged'].append(mean_us(logged, events))
+        metrics.PhaseTimer.mark, metrics.Metrics.record = mark, record
+        results['instrumented'].append(mean_us(handler.lambda_handler, events))
+
+    metrics.PROFILE_SAMPLE_RATE = 1.0
+    sampled = mean_us(handler.metrics.sampling(handler.lambda_handler), events[:args.sampled])
+
+    base = statistics.median(results['bare'])
+    print(f"{'':>13} {'mean us':>8} {'vs bare':>8}")
+    for name, samples in results.items():
+        value = statistics.median(samples)
+        print(f'{name:>13} {value:8.2f} {(value - base) / base:+8.1%}')
+    print(f"{'sampled':>13} {sampled:8.2f} {(sampled - base) / base:+8.1%}")
+
+
+if __name__ == '__main__':
+    main()
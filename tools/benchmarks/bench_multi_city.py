@@ -0,0 +1,147 @@
+"""Cold multi-city reco_v1 requests against N single-city requests, with injected DynamoDB latency.
+
+DynamoDB is replaced by a local stub answering the city index Query and the
+catalog version GetItem from generated hotels after sleeping --latency-ms
+(plus up to --jitter-ms) per call, with --page-size items per Query page.
+Every run starts from empty catalog and response caches, like a cold
+container, and either sends one request per city in turn, as a client
+without city_ids has to, or a single city_ids request for all of them.
+The merged ranking is checked against the single-city rankings.
+
+    python tools/benchmarks/bench_multi_city.py --max-cities 8 --hotels 2000 --latency-ms 40
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'reco_v1'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+os.environ['HOTELS_TABLE'] = 'bench-hotels'
+os.environ.pop('CITIES_TABLE', None)
+os.environ.pop('CATALOG_SNAPSHOT_BUCKET', None)
+os.environ.pop('CATALOG_SNAPSHOT_DIR', None)
+import aws_clients  # noqa: E402
+import handler  # noqa: E402
+from generate_synthetic_data import HOTEL_RATINGS, HOTEL_TAGS  # noqa: E402
+
+
+class StubDynamoDB:
+    """The Query and GetItem calls reco_v1 makes, answered locally after a sleep."""
+
+    def __init__(self, items_by_city, latency, jitter, page_size):
+        self.items_by_city = items_by_city
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.calls = 0
+
+    def _wait(self):
+        self.calls += 1
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def query(self, ExpressionAttributeValues, ExclusiveStartKey=None, **kwargs):
+        self._wait()
+        items = self.items_by_city[ExpressionAttributeValues[':city_value']['S']]
+        start = ExclusiveStartKey['position'] if ExclusiveStartKey else 0
+        page = {'Items': items[start:start + self.page_size]}
+        if start + self.page_size < len(items):
+            page['LastEvaluatedKey'] = {'position': start + self.page_size}
+        return page
+
+    def get_item(self, **kwargs):
+        self._wait()
+        return {'Item': {'generation': {'N': '1'}}}
+
+
+def make_items(city_id, count):
+    items = [
+        {
+            'hotel_id': {'S': f'{city_id}_HOTEL_{i + 1:05d}'},
+            'hotel_name': {'S': f'Hotel {i + 1}'},
+            'city_id': {'S': city_id},
+            'rating': {'N': str(random.choice(HOTEL_RATINGS))},
+            'price_band': {'S': random.choice(['$', '$$', '$$$'])},
+            'tags': {'S': ','.join(random.sample(HOTEL_TAGS, random.randint(3, 6)))},
+            'popularity_score': {'N': str(round(random.random(), 4))},
+        }
+        for i in range(count)
+    ]
+    # The index returns the most popular hotels first
+    return sorted(items, key=lambda item: -float(item['popularity_score']['N']))
+
+
+def cold():
+    handler.catalog_cache.clear()
+    handler.response_cache.clear()
+
+
+def request(params):
+    response = handler.lambda_handler({'queryStringParameters': params}, None)
+    assert response['statusCode'] == 200, response
+    return json.loads(response['body'])
+
+
+def check_merge(city_ids, user_tags, limit):
+    """The multi-city page must be the single-city pages merged by score, ties to the earlier city."""
+    singles = [request({'city_id': city_id, 'user_tags': user_tags, 'limit': str(limit)})['hotels'] for city_id in city_ids]
+    expected = sorted((hotel for hotels in singles for hotel in hotels), key=lambda hotel: -hotel['recommendation_score'])
+    merged = request({'city_ids': ','.join(city_ids), 'user_tags': user_tags, 'limit': str(limit)})['hotels']
+    assert [h['hotel_id'] for h in merged] == [h['hotel_id'] for h in expected[:limit]], 'merged ranking differs'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-cities', type=int, default=8)
+    parser.add_argument('--hotels', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=40)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+    random.seed(21)
+
+    logging.getLogger().handlers = [logging.StreamHandler(io.StringIO())]
+    logging.getLogger('metrics').handlers = [logging.StreamHandler(io.StringIO())]
+    city_ids = [f'CITY_{c + 1:03d}' for c in range(args.max_cities)]
+    stub = StubDynamoDB({city_id: make_items(city_id, args.hotels) for city_id in city_ids},
+                        args.latency_ms / 1000, args.jitter_ms / 1000, args.page_size)
+    aws_clients.client = lambda service, **config: stub
+    handler.catalog_cache.max_cities = args.max_cities
+
+    check_merge(city_ids, 'Pool,Spa', args.limit)
+
+    pages = -(-args.hotels // args.page_size)
+    print(f'{args.hotels} hotels per city in {pages} Query pages, {args.latency_ms:.0f} ms + up to '
+          f'{args.jitter_ms:.0f} ms per call')
+    print(f"{'cities':>6} {'serial ms':>10} {'city_ids ms':>12} {'speedup':>8} {'ddb calls':>10}")
+    for count in range(1, args.max_cities + 1):
+        cities = city_ids[:count]
+        serial, together = [], []
+        for _ in range(args.runs):
+            cold()
+            started = time.perf_counter()
+            for city_id in cities:
+                request({'city_id': city_id, 'user_tags': 'Pool,Spa', 'limit': str(args.limit)})
+            serial.append(time.perf_counter() - started)
+
+            cold()
+            stub.calls = 0
+            started = time.perf_counter()
+            body = request({'city_ids': ','.join(cities), 'user_tags': 'Pool,Spa', 'limit': str(args.limit)})
+            together.append(time.perf_counter() - started)
+            assert body['count'] == min(args.limit, count * args.hotels)
+        serial_ms, together_ms = statistics.median(serial) * 1000, statistics.median(together) * 1000
+        print(f'{count:>6} {serial_ms:10.1f} {together_ms:12.1f} {serial_ms / together_ms:7.1f}x {stub.calls:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Update throughput of the hotel popularity aggregates, in interaction events per second.
+
+Synthetic interactions are fed through the stream path of data-ingestion
+(aggregate_interactions) in stream-sized batches, against a DynamoDB stand-in
+with per-call latency. As a baseline, the same events are applied with one
+UpdateItem each. Both must leave identical scores in the table, and stream
+items without a usable timestamp must be skipped rather than fail the batch.
+
+    python tools/benchmarks/bench_popularity.py --events 1000000 --hotels 500 --batch-size 1000
+
+Hotels are drawn with Zipf-like skew; the fewer distinct hotels per batch, the
+more events each UpdateItem carries.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'data-ingestion'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+from generate_synthetic_data import INTERACTION_TYPES, INTERACTION_WEIGHTS  # noqa: E402
+from handler import aggregate_interactions, interaction_item  # noqa: E402
+from popularity import PopularityAggregator, event_score, parse_timestamp  # noqa: E402
+
+TABLE_NAME = 'bench-hotel-popularity'
+
+
+class LocalDynamoDB:
+    """Thread-safe update_item stand-in for the aggregator's ADD, whose reference_time condition always holds here."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.scores = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def update_item(self, TableName, Key, UpdateExpression, ExpressionAttributeValues, ConditionExpression=None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            hotel_id = Key['hotel_id']['S']
+            self.scores[hotel_id] = self.scores.get(hotel_id, 0.0) + float(ExpressionAttributeValues[':score']['N'])
+
+
+def make_records(count, hotels):
+    types = random.choices(INTERACTION_TYPES, weights=INTERACTION_WEIGHTS, k=count)
+    # Zipf-like: a few hotels draw most of the traffic, as popularity does
+    hotel_ids = random.choices(range(1, hotels + 1), weights=[1 / rank for rank in range(1, hotels + 1)], k=count)
+    return [
+        {'eventName': 'INSERT', 'dynamodb': {'NewImage': interaction_item({
+            'interaction_id': f'INT_{i:09d}',
+            'user_id': f'USER_{random.randint(1, 100000):06d}',
+            'hotel_id': f'HOTEL_{hotel_ids[i]:06d}',
+            'interaction_type': types[i],
+            'timestamp': f'2025-{random.randint(1, 9):02d}-{random.randint(1, 28):02d} {random.randint(0, 23):02d}:00:00',
+            'session_id': f'SESSION_{i // 3:08d}'
+        })}}
+        for i in range(count)
+    ]
+
+
+def per_event(dynamodb, records, workers):
+    """One UpdateItem per event: what a stream consumer without coalescing would do."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    reference_time = PopularityAggregator().reference_time
+
+    def update(record):
+        image = record['dynamodb']['NewImage']
+        score = event_score(image['interaction_type']['S'], parse_timestamp(image['timestamp']['S']),
+                            reference_time=reference_time)
+        dynamodb.update_item(TableName=TABLE_NAME, Key={'hotel_id': image['hotel_id']},
+                             UpdateExpression='ADD decayed_score :score',
+                             ExpressionAttributeValues={':score': {'N': repr(score)}})
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(update, records))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--hotels', type=int, default=500, help='Distinct hotels (the synthetic catalog has 500)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Records per stream batch')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Stand-in latency per update_item call')
+    parser.add_argument('--baseline-events', type=int, default=20000, help='Events for the slow per-event baseline')
+    args = parser.parse_args()
+    random.seed(5)
+
+    records = make_records(args.events, args.hotels)
+    print(f"{'path':>24} {'events':>9} {'seconds':>8} {'events/s':>10} {'updates':>9}")
+
+    baseline = LocalDynamoDB(args.latency_ms / 1000)
+    sample = records[:args.baseline_events]
+    started = time.perf_counter()
+    per_event(baseline, sample, 8)
+    seconds = time.perf_counter() - started
+    print(f"{'per-event UpdateItem':>24} {len(sample):>9} {seconds:8.2f} {len(sample) / seconds:10.0f} {baseline.calls:>9}")
+
+    table = LocalDynamoDB(args.latency_ms / 1000)
+    started = time.perf_counter()
+    for i in range(0, len(records), args.batch_size):
+        aggregate_interactions(records[i:i + args.batch_size], table, TABLE_NAME)
+    seconds = time.perf_counter() - started
+    print(f"{'coalesced per batch':>24} {len(records):>9} {seconds:8.2f} {len(records) / seconds:10.0f} {table.calls:>9}")
+
+    # Same path with instant writes: the ceiling set by parsing and decay maths
+    instant = LocalDynamoDB(0)
+    started = time.perf_counter()
+    for i in range(0, len(records), args.batch_size):
+        aggregate_interactions(records[i:i + args.batch_size], instant, TABLE_NAME)
+    seconds = time.perf_counter() - started
+    print(f"{'coalesced, no latency':>24} {len(records):>9} {seconds:8.2f} {len(records) / seconds:10.0f} {instant.calls:>9}")
+
+    check = LocalDynamoDB(0)
+    for i in range(0, len(sample), args.batch_size):
+        aggregate_interactions(sample[i:i + args.batch_size], check, TABLE_NAME)
+    assert check.scores.keys() == baseline.scores.keys()
+    for hotel_id, score in baseline.scores.items():
+        assert math.isclose(score, check.scores[hotel_id], rel_tol=1e-9), hotel_id
+
+    # A blank CSV timestamp leaves the attribute out of the item; with a
+    # malformed one the batch must still apply its other events
+    bad = make_records(3, args.hotels)
+    del bad[0]['dynamodb']['NewImage']['timestamp']
+    bad[1]['dynamodb']['NewImage']['timestamp'] = {'S': 'not a date'}
+    skipped = LocalDynamoDB(0)
+    stats = aggregate_interactions(bad, skipped, TABLE_NAME)
+    assert stats['invalid'] == 2 and stats['events'] == 1, stats
+    assert list(skipped.scores) == [bad[2]['dynamodb']['NewImage']['hotel_id']['S']]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Offline build and request-time cost of the reco_v2 co-visit index.
+
+Synthetic interactions for --users users are grouped into sessions that stay
+within one city, with hotels drawn Zipf-like inside the city. The index is
+built from the interaction arrays (build_neighbour_index, as data-ingestion
+does after factorising the CSV), its DynamoDB items are encoded, and then
+--requests personalised requests are answered the way reco_v2 answers them:
+decode the neighbour lists of up to 20 recent hotels and merge them into a
+top 10. The neighbour table is an in-memory dict, so request times exclude
+the DynamoDB round trips; on a cold cache a request makes two BatchGetItem
+calls (neighbour lists, then hotel records), on a warm one none.
+
+    python tools/benchmarks/bench_reco_v2.py --users 1000000 --interactions 10000000 --hotels 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'data-ingestion'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'reco_v2'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+from candidates import MAX_RECENT_HOTELS, merge_neighbours  # noqa: E402
+from cooccurrence import build_neighbour_index  # noqa: E402
+from generate_synthetic_data import INTERACTION_TYPES, INTERACTION_WEIGHTS as TYPE_FREQUENCIES  # noqa: E402
+from neighbours import decode_neighbours  # noqa: E402
+from popularity import INTERACTION_WEIGHTS  # noqa: E402
+
+
+def peak_rss_mb():
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmHWM')) / 1024
+
+
+def make_interactions(rng, users, interactions, hotels, cities, session_length):
+    """Parallel arrays (users, sessions, hotels, weights) of synthetic interactions."""
+    hotel_city = rng.integers(0, cities, hotels)
+    city_hotels = [np.flatnonzero(hotel_city == c) for c in range(cities)]
+
+    # Sessions of geometric length, each in one city (the city of a random hotel, so never an empty one)
+    lengths = rng.geometric(1 / session_length, int(interactions / session_length * 2))
+    lengths = lengths[:np.searchsorted(np.cumsum(lengths), interactions) + 1]
+    lengths[-1] -= lengths.sum() - interactions
+    session_of = np.repeat(np.arange(len(lengths)), lengths)
+    session_city = hotel_city[rng.integers(0, hotels, len(lengths))]
+    session_user = rng.permutation(np.resize(np.arange(users), len(lengths)))
+
+    # Zipf-like rank within the city's hotels
+    sizes = np.array([len(h) for h in city_hotels])
+    city = session_city[session_of]
+    rank = np.minimum(rng.zipf(1.3, interactions) - 1, sizes[city] - 1)
+    offsets = np.r_[0, np.cumsum(sizes)]
+    flat = np.concatenate(city_hotels)
+    hotel = flat[offsets[city] + rank]
+
+    types = rng.choice(len(INTERACTION_TYPES), interactions,
+                       p=np.array(TYPE_FREQUENCIES) / sum(TYPE_FREQUENCIES))
+    weights = np.array([INTERACTION_WEIGHTS[t] for t in INTERACTION_TYPES])[types]
+    return session_user[session_of], session_of, hotel, weights, hotel_city
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--interactions', type=int, default=10000000)
+    parser.add_argument('--hotels', type=int, default=100000)
+    parser.add_argument('--cities', type=int, default=500)
+    parser.add_argument('--session-length', type=float, default=5.0)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(12)
+
+    started = time.perf_counter()
+    users, sessions, hotels, weights, hotel_city = make_interactions(
+        rng, args.users, args.interactions, args.hotels, args.cities, args.session_length)
+    print(f'generated {len(hotels):,} interactions, {sessions[-1] + 1:,} sessions, '
+          f'{len(np.unique(users)):,} users in {time.perf_counter() - started:.1f}s')
+
+    hotel_ids = [f'HOTEL_{i + 1:07d}' for i in range(args.hotels)]
+    started = time.perf_counter()
+    index = build_neighbour_index(sessions, hotels, weights, hotel_ids)
+    build_seconds = time.perf_counter() - started
+    print(f'index build: {build_seconds:.1f}s, {len(index):,} hotels with neighbours, '
+          f'{len(index.neighbours):,} neighbour entries, peak RSS {peak_rss_mb():.0f} MB')
+
+    hotel_cities = {hotel_id: f'CITY_{c + 1:04d}' for hotel_id, c in zip(hotel_ids, hotel_city.tolist())}
+    started = time.perf_counter()
+    table = {item['hotel_id']['S']: item['neighbours']['S'] for item in index.items(hotel_cities, 1)}
+    print(f'encode items: {time.perf_counter() - started:.1f}s, '
+          f'mean item {sum(map(len, table.values())) / len(table):.0f} bytes')
+
+    # Recent hotels of random users: their last MAX_RECENT_HOTELS interactions, most recent first
+    by_user = np.argsort(users, kind='stable')
+    user_sorted = users[by_user]
+    picked = rng.choice(np.unique(user_sorted), args.requests)
+    ends = np.searchsorted(user_sorted, picked, side='right')
+    starts = np.searchsorted(user_sorted, picked, side='left')
+    histories = [list(dict.fromkeys(hotel_ids[h] for h in hotels[by_user[max(s, e - 50):e]][::-1].tolist()))[:MAX_RECENT_HOTELS]
+                 for s, e in zip(starts.tolist(), ends.tolist())]
+
+    latencies = []
+    returned = 0
+    for recent in histories:
+        t = time.perf_counter()
+        lists = {hotel_id: decode_neighbours(table[hotel_id]) for hotel_id in recent if hotel_id in table}
+        ranked = merge_neighbours(recent, lists, 10)
+        latencies.append(time.perf_counter() - t)
+        returned += len(ranked)
+    latencies = np.array(latencies) * 1000
+    print(f'requests: {len(histories):,}, mean recent hotels {np.mean([len(h) for h in histories]):.1f}, '
+          f'mean results {returned / len(histories):.1f}')
+    print(f'request compute ms: p50 {np.percentile(latencies, 50):.3f}  p99 {np.percentile(latencies, 99):.3f}  '
+          f'max {latencies.max():.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""reco_v1 GET latency with and without the in-process response cache.
+
+Catalogs are built in memory and handed to the handler's catalog cache, as a
+warm container holds them, so the difference is the ranking and JSON
+encoding a response cache hit skips. Requests pick cities and tag profiles
+by 1/rank, the shape of real traffic, listing a profile's tags in any order,
+and every response body is checked against the uncached handler. A last pass sends
+each request's ETag back in If-None-Match, as a browser or CDN revalidating
+does, and times the 304s.
+
+    python tools/benchmarks/bench_response_cache.py --requests 20000 --cities 50 --entries 1024
+"""
+import argparse
+import io
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'reco_v1'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+os.environ['HOTELS_TABLE'] = 'bench-hotels'
+os.environ.pop('CITIES_TABLE', None)
+import handler  # noqa: E402
+from bench_tag_index import make_hotels  # noqa: E402
+from generate_synthetic_data import HOTEL_TAGS  # noqa: E402
+from scoring import CityCatalog  # noqa: E402
+
+
+def by_rank(values, count):
+    return random.choices(values, [1 / rank for rank in range(1, len(values) + 1)], k=count)
+
+
+def make_events(count, city_ids, profiles):
+    return [
+        {'queryStringParameters': {
+            'city_id': city_id,
+            'user_tags': ','.join(random.sample(profile, len(profile))),
+            'limit': str(random.choice([5, 10, 10, 10, 20]))
+        }}
+        for city_id, profile in zip(by_rank(city_ids, count), by_rank(profiles, count))
+    ]
+
+
+def timed(events):
+    samples, responses = [], []
+    for event in events:
+        started = time.perf_counter()
+        responses.append(handler.lambda_handler(event, None))
+        samples.append(time.perf_counter() - started)
+    return np.array(samples) * 1e6, responses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--cities', type=int, default=50)
+    parser.add_argument('--hotels-per-city', type=int, default=500)
+    parser.add_argument('--profiles', type=int, default=40)
+    parser.add_argument('--entries', type=int, default=handler.response_cache.max_entries)
+    args = parser.parse_args()
+    random.seed(18)
+
+    for log_handler in logging.getLogger().handlers:
+        logging.getLogger().removeHandler(log_handler)
+    logging.getLogger().addHandler(logging.StreamHandler(io.StringIO()))
+    logging.getLogger('metrics').handlers = [logging.StreamHandler(io.StringIO())]
+
+    catalogs = {f'CITY_{c + 1:03d}': CityCatalog(make_hotels(args.hotels_per_city, (1, 1050)))
+                for c in range(args.cities)}
+    handler.load_city_catalog = lambda table_name, city_id, timer: catalogs[city_id]
+    handler.get_catalog_version = lambda table_name, timer: 1
+    handler.catalog_cache.max_cities = args.cities
+    profiles = [()] + [tuple(random.sample(HOTEL_TAGS, random.randint(1, 4))) for _ in range(args.profiles - 1)]
+    events = make_events(args.requests, list(catalogs), profiles)
+
+    handler.response_cache.max_entries = 0
+    uncached, expected = timed(events)
+    handler.response_cache.max_entries = args.entries
+    handler.response_cache.hits = handler.response_cache.misses = 0
+    cached, responses = timed(events)
+    stats = handler.response_cache.stats()
+    assert [r['body'] for r in responses] == [r['body'] for r in expected], 'cached responses differ'
+    revalidated, not_modified = timed([
+        {**event, 'headers': {'If-None-Match': response['headers']['ETag']}}
+        for event, response in zip(events, responses)
+    ])
+    assert all(r['statusCode'] == 304 for r in not_modified)
+
+    print(f"{'':>22} {'p50 us':>8} {'p99 us':>8} {'mean us':>8}")
+    for label, samples in (('no response cache', uncached), ('response cache', cached), ('If-None-Match (304)', revalidated)):
+        print(f'{label:>22} {np.percentile(samples, 50):8.1f} {np.percentile(samples, 99):8.1f} {samples.mean():8.1f}')
+    print(f"response cache hit rate {stats['hits'] / len(events):.1%}, {stats['entries']} entries")
+
+
+if __name__ == '__main__':
+    main()
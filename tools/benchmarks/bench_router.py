@@ -0,0 +1,86 @@
+"""Per-request overhead the router adds in front of a recommender variant.
+
+The router's lambda_handler is timed against calling the variant directly,
+with a variant that does nothing, so the difference is the routing itself:
+reading the user, the cached experiment lookup, the stable hash into a
+bucket, the in-process call with its per-variant metrics record (written
+into a null stream, as Lambda writes to stdout) and the X-Variant header.
+The experiment config is already cached, as it is on all but one
+request per TTL in a warm container; a refresh is one GetItem.
+
+    python tools/benchmarks/bench_router.py --requests 200000 --variants 3
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'router'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+os.environ['EXPERIMENT_CONFIG_TABLE'] = 'bench-experiment-config'
+import handler as router  # noqa: E402
+from experiments import Experiment  # noqa: E402
+
+
+def noop_variant(event, context):
+    return {'statusCode': 200, 'headers': {'Access-Control-Allow-Origin': '*'}, 'body': '{}'}
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1e6
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--variants', type=int, default=3)
+    args = parser.parse_args()
+
+    for handler in logging.getLogger().handlers:
+        logging.getLogger().removeHandler(handler)
+    logging.getLogger().addHandler(logging.StreamHandler(io.StringIO()))
+    logging.getLogger('metrics').handlers = [logging.StreamHandler(io.StringIO())]
+
+    names = [f'variant_{i}' for i in range(args.variants)]
+    experiment = Experiment('/recommendations', {name: 100 / len(names) for name in names})
+    router.variants.names = tuple(names)
+    router.variants._handlers = {name: noop_variant for name in names}
+    router.experiments.get('/recommendations', lambda route: experiment)
+
+    events = [{'resource': '/recommendations', 'path': '/recommendations',
+               'queryStringParameters': {'city': 'London', 'user_id': f'USER_{i:07d}'}} for i in range(args.requests)]
+
+    direct, routed = [], []
+    for event in events:
+        started = time.perf_counter()
+        noop_variant(event, None)
+        direct.append(time.perf_counter() - started)
+    for event in events:
+        started = time.perf_counter()
+        router.lambda_handler(event, None)
+        routed.append(time.perf_counter() - started)
+    choose = []
+    for event in events:
+        started = time.perf_counter()
+        router.choose_variant('/recommendations', event['queryStringParameters']['user_id'])
+        choose.append(time.perf_counter() - started)
+
+    print(f"{'':>24} {'p50 us':>8} {'p99 us':>8}")
+    for label, samples in (('direct variant call', direct), ('through the router', routed),
+                           ('choose_variant alone', choose)):
+        p50, p99 = percentiles(samples)
+        print(f'{label:>24} {p50:8.2f} {p99:8.2f}')
+    overhead = percentiles(routed)[1] - percentiles(direct)[1]
+    print(f'routing overhead at p99: {overhead:.1f} us ({overhead / 1000:.3f} ms)')
+    print('split:', router.variant_metrics.requests)
+
+
+if __name__ == '__main__':
+    main()
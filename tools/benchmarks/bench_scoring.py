@@ -0,0 +1,101 @@
+"""Micro-benchmark of the vectorised V1 scorer against the per-hotel Python loop.
+
+Checks that both produce identical scores and rankings, then times one
+request (score + top-k selection) at each city size. Tagless requests are
+served from the ranking precomputed when the catalog is built.
+
+    python tools/benchmarks/bench_scoring.py --sizes 500,50000,1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'reco_v1'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+from generate_synthetic_data import HOTEL_RATINGS, HOTEL_TAGS  # noqa: E402
+from scoring import CityCatalog  # noqa: E402
+
+
+def make_hotels(count):
+    return [
+        {
+            'hotel_id': f'HOTEL_{i + 1:07d}',
+            'rating': random.choice(HOTEL_RATINGS),
+            'tags': ','.join(random.sample(HOTEL_TAGS, random.randint(3, 6))),
+            'popularity_score': float(random.randint(1, 1050)),
+        }
+        for i in range(count)
+    ]
+
+
+def loop_rank(hotels, user_tags, limit):
+    """The scoring loop reco_v1 ran before the vectorised scorer."""
+    scored_hotels = []
+    for hotel in hotels:
+        rating = float(hotel.get('rating', 0))
+        popularity = float(hotel.get('popularity_score', 0))
+        hotel_tags = hotel.get('tags', '')
+        normalised_rating = (rating - 1) / 4
+        if user_tags:
+            hotel_tag_list = [tag.strip() for tag in hotel_tags.split(',') if tag.strip()]
+            matches = sum(1 for tag in user_tags if tag in hotel_tag_list)
+            tag_overlap_percentage = (matches / len(user_tags)) * 100
+        else:
+            tag_overlap_percentage = 100
+        score = 0.5 * popularity + 0.3 * normalised_rating + 0.2 * (tag_overlap_percentage / 100)
+        scored_hotels.append({**hotel, 'recommendation_score': round(score, 4)})
+    scored_hotels.sort(key=lambda h: h['recommendation_score'], reverse=True)
+    return scored_hotels[:limit]
+
+
+def vector_rank(catalog, user_tags, limit):
+    order, scores = catalog.top_k(user_tags, limit)
+    return [{**catalog.hotels[i], 'recommendation_score': score} for i, score in zip(order.tolist(), scores.tolist())]
+
+
+def best_of(fn, repeats):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def check_identical(hotels, catalog, user_tags):
+    """Top-k prefixes and the full ranking must match hotel for hotel and score for score."""
+    expected = [(h['hotel_id'], h['recommendation_score']) for h in loop_rank(hotels, user_tags, len(hotels))]
+    for k in (1, 10, 100, len(hotels)):
+        actual = [(h['hotel_id'], h['recommendation_score']) for h in vector_rank(catalog, user_tags, k)]
+        assert actual == expected[:k], f'top {k} differs for {user_tags}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='500,50000,1000000')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    random.seed(7)
+
+    tag_profiles = [[], ['Spa', 'Free WiFi'], ['Luxury', 'City Center', 'Swimming Pool', 'Bar', 'Not A Tag']]
+    print(f"{'hotels':>9} {'tags':>4} {'build ms':>9} {'loop ms':>9} {'numpy ms':>9} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        hotels = make_hotels(size)
+        build_ms, catalog = best_of(lambda: CityCatalog(hotels), 1)
+        for user_tags in tag_profiles:
+            if size <= 50000:
+                check_identical(hotels, catalog, user_tags)
+            loop_ms, expected = best_of(lambda: loop_rank(hotels, user_tags, args.limit), args.repeats)
+            numpy_ms, actual = best_of(lambda: vector_rank(catalog, user_tags, args.limit), args.repeats)
+            assert expected == actual
+            print(f"{size:>9} {len(user_tags):>4} {build_ms:9.1f} {loop_ms:9.2f} {numpy_ms:9.2f} {loop_ms / numpy_ms:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
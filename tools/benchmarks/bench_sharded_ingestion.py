@@ -0,0 +1,134 @@
+"""Sharded ingestion scaling: coordinator planning plus process-pool workers standing in for fanned-out Lambdas.
+
+The coordinator half of data-ingestion (start_shards) plans newline-aligned
+shards of a synthetic user_interactions.csv and writes the manifest; each
+shard is then loaded by ingest_shard in its own process, as a worker
+invocation would. The dataset comes from the S3 stand-in in
+bench_stream_memory.py, manifest objects live in a temporary directory shared
+by all processes, and DynamoDB is a stand-in with fixed per-call latency.
+
+    python tools/benchmarks/bench_sharded_ingestion.py --rows 10000000 --shards 1,4,16
+
+Wall time should fall close to linearly with the shard count until the
+machine runs out of cores (a 1M-row file is a quicker check).
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'data-ingestion'))
+sys.path.insert(0, os.path.dirname(__file__))
+from bench_stream_memory import HEADER, ROWS_PER_BLOCK, LocalS3, make_block  # noqa: E402
+
+FILE_NAME = 'user_interactions.csv'
+
+
+class ShardedS3(LocalS3):
+    """LocalS3 plus just enough of put_object/list_objects_v2 for the shard manifest, kept on disk."""
+
+    def __init__(self, size_bytes, artefacts_dir):
+        super().__init__(size_bytes)
+        self.artefacts_dir = artefacts_dir
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        if Bucket == 'artefacts':
+            path = os.path.join(self.artefacts_dir, Key)
+            if not os.path.exists(path):
+                from botocore.exceptions import ClientError
+                raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+            with open(path, 'rb') as f:
+                return {'Body': _Bytes(f.read())}
+        return super().get_object(Bucket, Key, Range, IfMatch)
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        path = os.path.join(self.artefacts_dir, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(Body)
+
+    def delete_object(self, Bucket, Key):
+        path = os.path.join(self.artefacts_dir, Key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        directory = os.path.join(self.artefacts_dir, Prefix)
+        yield {'KeyCount': len(os.listdir(directory)) if os.path.isdir(directory) else 0}
+
+
+class _Bytes:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class LatencyDynamoDB:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def batch_write_item(self, RequestItems):
+        time.sleep(self.latency)
+        return {}
+
+
+def run_worker(args):
+    shard, size_bytes, artefacts_dir, latency = args
+    import handler
+    # The batch metrics the handler writes to stdout would interleave with the table
+    logging.getLogger('metrics').disabled = True
+    s3 = ShardedS3(size_bytes, artefacts_dir)
+    stats, complete, shards_done = handler.ingest_shard(s3, LatencyDynamoDB(latency), 'datasets', shard, None)
+    assert complete and not stats['failed'], stats
+    return stats['written']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--shards', default='1,4,16')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Stand-in latency per batch_write_item call')
+    args = parser.parse_args()
+
+    size_bytes = len(HEADER) + len(make_block()) * max(1, args.rows // ROWS_PER_BLOCK)
+    print(f"{'shards':>7} {'rows':>11} {'seconds':>8} {'rows/s':>10} {'speedup':>8}")
+    baseline = None
+    for shard_count in (int(s) for s in args.shards.split(',')):
+        with tempfile.TemporaryDirectory() as artefacts_dir:
+            os.environ['ARTEFACTS_BUCKET'] = 'artefacts'
+            os.environ['USER_INTERACTIONS_TABLE'] = 'bench'
+            import handler
+            s3 = ShardedS3(size_bytes, artefacts_dir)
+            handler.SHARD_BYTES = -(-s3.size // shard_count)
+
+            started = time.perf_counter()
+            shards = []
+            handler.start_shards(s3, 'datasets', FILE_NAME, shards.append)
+            with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+                written = sum(pool.map(run_worker, [(event['shard'], size_bytes, artefacts_dir, args.latency_ms / 1000)
+                                                    for event in shards]))
+            seconds = time.perf_counter() - started
+
+            manifest = handler.ShardManifest(s3, 'artefacts', FILE_NAME, '"synthetic"')
+            assert written == s3.rows, (written, s3.rows)
+            assert manifest.done_count() == len(shards)
+            with open(os.path.join(artefacts_dir, manifest.prefix, 'manifest.json')) as f:
+                assert len(json.load(f)['shards']) == len(shards)
+
+        baseline = baseline or seconds
+        print(f'{len(shards):>7} {written:>11} {seconds:8.2f} {written / seconds:10.0f} {baseline / seconds:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
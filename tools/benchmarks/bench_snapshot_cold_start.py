@@ -0,0 +1,131 @@
+"""Cold-start cost of a city catalog in reco_v1: DynamoDB query path vs a mapped binary snapshot.
+
+Each measurement runs in a fresh interpreter, like a cold Lambda container:
+it imports what the path needs, builds the CityCatalog, answers one tagged
+top-k request and reports the times and the process's peak RSS.
+
+ddb       the pages a city index Query returns (DynamoDB JSON, read from a file
+          so no network is involved), TypeDeserializer on every attribute,
+          Decimal to float, CityCatalog(hotels)
+snapshot  open_snapshot on a file written by build_snapshot; in Lambda the
+          download to /tmp comes first, and is not included
+
+    python tools/benchmarks/bench_snapshot_cold_start.py --sizes 1000,50000,500000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+PATHS = [os.path.join(ROOT, 'lambda', 'reco_v1'), os.path.join(ROOT, 'lambda', 'shared', 'python'),
+         os.path.join(ROOT, 'tools')]
+sys.path[:0] = PATHS
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+sys.path[:0] = {paths!r}
+mode, path = sys.argv[1], sys.argv[2]
+if mode == 'ddb':
+    from decimal import Decimal
+    from boto3.dynamodb.types import TypeDeserializer
+    from scoring import CityCatalog
+    imported = time.perf_counter()
+    deserializer = TypeDeserializer()
+    with open(path) as f:
+        pages = json.load(f)
+    hotels = []
+    for page in pages:
+        for item in page['Items']:
+            hotel = {{}}
+            for key, value in item.items():
+                value = deserializer.deserialize(value)
+                hotel[key] = float(value) if isinstance(value, Decimal) else value
+            hotels.append(hotel)
+    catalog = CityCatalog(hotels)
+else:
+    from snapshot_loader import open_snapshot
+    imported = time.perf_counter()
+    catalog, _ = open_snapshot(path)
+loaded = time.perf_counter()
+order, scores = catalog.top_k(['Spa', 'Free WiFi'], 10)
+page = [catalog.hotels[i] for i in order.tolist()]
+answered = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'load_ms': (loaded - imported) * 1000,
+    'first_query_ms': (answered - loaded) * 1000,
+    # VmHWM rather than ru_maxrss, which a child inherits from the process that started it
+    'peak_rss_mb': next(int(line.split()[1]) for line in open('/proc/self/status') if line.startswith('VmHWM')) / 1024,
+    'top': [h['hotel_id'] for h in page]
+}}))
+'''
+
+
+def make_city(count):
+    from generate_synthetic_data import HOTEL_NAMES, HOTEL_RATINGS, HOTEL_TAGS
+    return [
+        {
+            'hotel_id': f'HOTEL_{i + 1:07d}',
+            'hotel_name': random.choice(HOTEL_NAMES),
+            'city_id': 'CITY_001',
+            'rating': str(random.choice(HOTEL_RATINGS)),
+            'price_band': random.choice(['budget', 'mid', 'luxury']),
+            'tags': ','.join(random.sample(HOTEL_TAGS, random.randint(3, 6))),
+            'popularity_score': str(random.randint(1, 1050))
+        }
+        for i in range(count)
+    ]
+
+
+def query_pages(hotels, page_bytes=1024 * 1024):
+    """City index Query responses for hotels, most popular first, split at roughly 1 MB like DynamoDB."""
+    pages, items, size = [], [], 0
+    for hotel in sorted(hotels, key=lambda h: -float(h['popularity_score'])):
+        item = {key: ({'N': value} if key in ('rating', 'popularity_score') else {'S': value}) for key, value in hotel.items()}
+        items.append(item)
+        size += len(json.dumps(item))
+        if size >= page_bytes:
+            pages.append({'Items': items})
+            items, size = [], 0
+    pages.append({'Items': items})
+    return pages
+
+
+def run(mode, path):
+    output = subprocess.run([sys.executable, '-c', CHILD.format(paths=PATHS), mode, path],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,50000,500000')
+    args = parser.parse_args()
+    random.seed(17)
+    from catalog_snapshot import build_snapshot
+
+    print(f"{'hotels':>8} {'path':>9} {'file MB':>8} {'import ms':>10} {'load ms':>9} {'query ms':>9} {'total ms':>9} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(',')):
+            hotels = make_city(size)
+            files = {'ddb': os.path.join(tmp, f'{size}.json'), 'snapshot': os.path.join(tmp, f'{size}.bin')}
+            with open(files['ddb'], 'w') as f:
+                json.dump(query_pages(hotels), f)
+            with open(files['snapshot'], 'wb') as f:
+                f.write(build_snapshot(hotels, 1))
+
+            results = {mode: run(mode, path) for mode, path in files.items()}
+            assert results['ddb']['top'] == results['snapshot']['top'], 'paths disagree'
+            for mode, result in results.items():
+                total = result['import_ms'] + result['load_ms'] + result['first_query_ms']
+                print(f"{size:>8} {mode:>9} {os.path.getsize(files[mode]) / 2 ** 20:8.1f} {result['import_ms']:10.1f} "
+                      f"{result['load_ms']:9.1f} {result['first_query_ms']:9.1f} {total:9.1f} {result['peak_rss_mb']:12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""Peak memory of CSV ingestion: streaming S3CsvReader vs the old read-everything path.
+
+A local S3 stand-in serves a synthetic user_interactions.csv of any size
+(generated on the fly, honouring Range requests) and a no-op DynamoDB takes
+the writes, so only the ingestion pipeline's own memory is measured. Each
+run happens in a fresh subprocess and reports its peak RSS.
+
+    python tools/benchmarks/bench_stream_memory.py --stream-mb 256,1024,4096 --buffered-mb 64,256
+
+Streaming peak RSS should stay flat as the file grows; the buffered path
+grows at several times the file size. --resume-check also verifies that a
+load stopped part-way and resumed from its checkpoint reads every row once.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'data-ingestion'))
+
+HEADER = b'interaction_id,user_id,hotel_id,interaction_type,timestamp,session_id\n'
+ROWS_PER_BLOCK = 10000
+
+
+def make_block():
+    rows = [
+        f'INT_{i:09d},USER_{i % 1000:06d},HOTEL_{i % 500:06d},view,2025-07-01 12:00:00,SESSION_{i // 3:08d}\n'
+        for i in range(ROWS_PER_BLOCK)
+    ]
+    return ''.join(rows).encode('utf-8')
+
+
+class SyntheticBody:
+    """Streaming body over HEADER followed by a repeated block, from byte start to byte end."""
+
+    def __init__(self, block, start, end):
+        self.block = block
+        self.position = start
+        self.end = end
+
+    def iter_chunks(self, chunk_size):
+        while self.position < self.end:
+            chunk = self._read(min(chunk_size, self.end - self.position))
+            self.position += len(chunk)
+            yield chunk
+
+    def read(self):
+        return b''.join(self.iter_chunks(1024 * 1024))
+
+    def _read(self, size):
+        if self.position < len(HEADER):
+            return HEADER[self.position:self.position + size]
+        start = (self.position - len(HEADER)) % len(self.block)
+        return self.block[start:start + size]
+
+
+class LocalS3:
+    def __init__(self, size_bytes):
+        self.block = make_block()
+        blocks = max(1, (size_bytes - len(HEADER)) // len(self.block))
+        self.size = len(HEADER) + blocks * len(self.block)
+        self.rows = blocks * ROWS_PER_BLOCK
+
+    def head_object(self, Bucket, Key):
+        return {'ETag': '"synthetic"', 'ContentLength': self.size}
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        start, end = 0, self.size
+        if Range:
+            first, _, last = Range[len('bytes='):].partition('-')
+            start = int(first)
+            end = min(self.size, int(last) + 1) if last else self.size
+        return {'Body': SyntheticBody(self.block, start, end), 'ETag': '"synthetic"'}
+
+
+class NullDynamoDB:
+    def batch_write_item(self, RequestItems):
+        return {}
+
+
+def run_stream(size_mb, stop_after_rows=None):
+    from bulk_writer import BulkWriter
+    from handler import interaction_item
+    from s3_stream import S3CsvReader
+
+    s3 = LocalS3(size_mb * 1024 * 1024)
+    writer = BulkWriter(NullDynamoDB(), 'bench', max_workers=8)
+
+    written = 0
+    start_byte = 0
+    while True:
+        reader = S3CsvReader(s3, 'bucket', 'user_interactions.csv', start_byte=start_byte, etag='"synthetic"')
+        should_stop = (lambda: reader.rows_read >= stop_after_rows) if stop_after_rows else None
+        stats = writer.write((interaction_item(row) for row in reader.rows(should_stop)), position=lambda: reader.offset)
+        written += stats['written']
+        if not reader.stopped:
+            break
+        start_byte = stats['checkpoint']
+    assert written == s3.rows, (written, s3.rows)
+    return {'rows': written, 'file_mb': round(s3.size / 2 ** 20, 1)}
+
+
+def run_buffered(size_mb):
+    """The path data-ingestion used before streaming: read, decode, StringIO, list()."""
+    from handler import interaction_item
+
+    s3 = LocalS3(size_mb * 1024 * 1024)
+    csv_content = s3.get_object(Bucket='bucket', Key='user_interactions.csv')['Body'].read().decode('utf-8')
+    rows = list(csv.DictReader(io.StringIO(csv_content)))
+    items = [interaction_item(row) for row in rows[:25]]
+    assert len(rows) == s3.rows and items
+    return {'rows': len(rows), 'file_mb': round(s3.size / 2 ** 20, 1)}
+
+
+def measure(mode, size_mb, stop_after_rows=None):
+    command = [sys.executable, __file__, '--child', mode, '--size-mb', str(size_mb)]
+    if stop_after_rows:
+        command += ['--stop-after-rows', str(stop_after_rows)]
+    return json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+
+
+def child(mode, size_mb, stop_after_rows):
+    started = time.perf_counter()
+    result = run_stream(size_mb, stop_after_rows) if mode == 'stream' else run_buffered(size_mb)
+    result['seconds'] = round(time.perf_counter() - started, 2)
+    # ru_maxrss is in kilobytes on Linux
+    result['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stream-mb', default='256,1024,4096')
+    parser.add_argument('--buffered-mb', default='64,256')
+    parser.add_argument('--resume-check', action='store_true')
+    parser.add_argument('--child', choices=['stream', 'buffered'], help=argparse.SUPPRESS)
+    parser.add_argument('--size-mb', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--stop-after-rows', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.size_mb, args.stop_after_rows)
+        return
+
+    print(f"{'mode':>10} {'file MB':>9} {'rows':>11} {'seconds':>8} {'peak RSS MB':>12}")
+    runs = [('buffered', int(mb)) for mb in args.buffered_mb.split(',') if mb] + \
+        [('stream', int(mb)) for mb in args.stream_mb.split(',') if mb]
+    for mode, size_mb in runs:
+        result = measure(mode, size_mb)
+        print(f"{mode:>10} {result['file_mb']:>9} {result['rows']:>11} {result['seconds']:>8} {result['peak_rss_mb']:>12}")
+
+    if args.resume_check:
+        result = measure('stream', 64, stop_after_rows=100000)
+        print(f"resumed load of {result['file_mb']} MB in 100k-row invocations read all {result['rows']} rows exactly once")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark tagged top-k retrieval: inverted tag index vs early termination vs linear scan.
+
+Every method must return the same hotels and scores as the linear scan, which
+bench_scoring.py checks against the original per-hotel loop.
+
+    python tools/benchmarks/bench_tag_index.py --sizes 50000,1000000 --limit 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'reco_v1'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+from generate_synthetic_data import HOTEL_RATINGS, HOTEL_TAGS  # noqa: E402
+from scoring import TOP_K_METHODS, CityCatalog  # noqa: E402
+
+
+def make_hotels(count, popularity_range):
+    return [
+        {
+            'hotel_id': f'HOTEL_{i + 1:07d}',
+            'rating': random.choice(HOTEL_RATINGS),
+            'tags': ','.join(random.sample(HOTEL_TAGS, random.randint(3, 6))),
+            'popularity_score': float(random.randint(*popularity_range)),
+        }
+        for i in range(count)
+    ]
+
+
+def time_method(catalog, profiles, k, method):
+    results = []
+    start = time.perf_counter()
+    for user_tags in profiles:
+        order, scores = catalog.top_k(user_tags, k, method=method)
+        results.append((order.tolist(), scores.tolist()))
+    return (time.perf_counter() - start) * 1000 / len(profiles), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='50000,1000000')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--profiles', type=int, default=50, help='Random tag profiles per size')
+    parser.add_argument('--max-popularity', type=int, default=1050,
+                        help='Smaller values make score ties (and the tie-breaking rules) common')
+    args = parser.parse_args()
+    random.seed(11)
+
+    print(f"{'hotels':>9} {'tags':>4} {'postings':>9} " + ' '.join(f'{m + " ms":>22}' for m in TOP_K_METHODS))
+    for size in (int(s) for s in args.sizes.split(',')):
+        catalog = CityCatalog(make_hotels(size, (1, args.max_popularity)))
+        for num_tags in (1, 2, 5):
+            profiles = [random.sample(HOTEL_TAGS, num_tags) for _ in range(args.profiles)]
+            postings = sum(catalog.tag_index.posting_length([catalog.tag_ids[t] for t in p if t in catalog.tag_ids])
+                           for p in profiles) // len(profiles)
+            timings = {}
+            results = {}
+            for method in TOP_K_METHODS:
+                timings[method], results[method] = time_method(catalog, profiles, args.limit, method)
+            for method in TOP_K_METHODS:
+                assert results[method] == results['scan'], f'{method} differs from scan'
+            print(f'{size:>9} {num_tags:>4} {postings:>9} ' + ' '.join(f'{timings[m]:22.3f}' for m in TOP_K_METHODS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Cost of reading one user's recent history as the interactions table grows.
+
+read_user_history runs against an in-memory stand-in for the user index
+that behaves like DynamoDB: items live in per-user partitions sorted by
+timestamp, a Query reads only the partition it names, stops at Limit or
+1 MB and returns LastEvaluatedKey, and every call costs --round-trip-ms
+plus half a read unit per 4 KB (index reads are eventually consistent).
+Per-user history size is fixed (--per-user) while the number of users, and
+so the table, grows; the time and read units of one history read should
+stay flat. For contrast, the table-wide Scan that was the only option
+before the index is costed from the table size.
+
+    python tools/benchmarks/bench_user_history.py --volumes 10000,100000,1000000,3000000 --limit 50
+"""
+import argparse
+import bisect
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+from generate_synthetic_data import INTERACTION_TYPES  # noqa: E402
+from user_history import read_user_history  # noqa: E402
+
+# Bytes of one interaction item as DynamoDB sizes it (attribute names plus values)
+ITEM_BYTES = 150
+PAGE_BYTES = 1024 * 1024
+
+
+class UserIndex:
+    """Query-only stand-in for the user-timestamp GSI."""
+
+    def __init__(self, round_trip_seconds):
+        self.round_trip_seconds = round_trip_seconds
+        self.partitions = {}
+        self.calls = 0
+        self.read_units = 0.0
+
+    def add(self, user_id, timestamp, hotel_id, interaction_type, session_id):
+        self.partitions.setdefault(user_id, []).append((timestamp, hotel_id, interaction_type, session_id))
+
+    def seal(self):
+        for partition in self.partitions.values():
+            partition.sort()
+
+    def query(self, **kwargs):
+        user_id = kwargs['ExpressionAttributeValues'][':user_value']['S']
+        partition = self.partitions.get(user_id, [])
+        end = len(partition)
+        if 'ExclusiveStartKey' in kwargs:
+            end = bisect.bisect_left(partition, (kwargs['ExclusiveStartKey']['timestamp']['S'],))
+        count = min(kwargs['Limit'], PAGE_BYTES // ITEM_BYTES, end)
+        rows = partition[end - count:end][::-1]
+        self.calls += 1
+        self.read_units += (math.ceil(count * ITEM_BYTES / 4096) or 1) / 2
+        time.sleep(self.round_trip_seconds)
+        items = [{'user_id': {'S': user_id}, 'timestamp': {'S': t}, 'hotel_id': {'S': h},
+                  'interaction_type': {'S': i}, 'session_id': {'S': s}} for t, h, i, s in rows]
+        response = {'Items': items}
+        if end - count > 0:
+            response['LastEvaluatedKey'] = {'user_id': {'S': user_id}, 'timestamp': {'S': rows[-1][0]}}
+        return response
+
+
+def build(volume, per_user, round_trip_seconds, rng):
+    index = UserIndex(round_trip_seconds)
+    users = max(1, volume // per_user)
+    base = 1735689600
+    seconds = rng.integers(0, 300 * 86400, volume)
+    user_of = rng.integers(0, users, volume)
+    hotel_of = rng.integers(1, 500, volume)
+    for n, (user, second, hotel) in enumerate(zip(user_of.tolist(), seconds.tolist(), hotel_of.tolist())):
+        index.add(f'USER_{user:07d}', time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(base + second)),
+                  f'HOTEL_{hotel:03d}', INTERACTION_TYPES[n % len(INTERACTION_TYPES)], f'SESSION_{n // 5:07d}')
+    index.seal()
+    return index, users
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--volumes', default='10000,100000,1000000,3000000')
+    parser.add_argument('--per-user', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--reads', type=int, default=500)
+    parser.add_argument('--round-trip-ms', type=float, default=5.0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(3)
+    random.seed(3)
+
+    print(f"{'interactions':>12} {'users':>9} {'p50 ms':>7} {'p99 ms':>7} {'calls/read':>10} {'RCU/read':>9} "
+          f"{'scan pages':>10} {'scan RCU':>9}")
+    for volume in (int(v) for v in args.volumes.split(',')):
+        index, users = build(volume, args.per_user, args.round_trip_ms / 1000, rng)
+        user_ids = random.sample(sorted(index.partitions), min(args.reads, len(index.partitions)))
+        index.calls, index.read_units = 0, 0.0
+        latencies = []
+        for user_id in user_ids:
+            started = time.perf_counter()
+            history = read_user_history(index, 'bench-user-interactions', user_id, args.limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert [h['timestamp'] for h in history] == sorted((r[0] for r in index.partitions[user_id]), reverse=True)[:args.limit]
+        scan_bytes = volume * ITEM_BYTES
+        print(f'{volume:>12,} {users:>9,} {np.percentile(latencies, 50):7.2f} {np.percentile(latencies, 99):7.2f} '
+              f'{index.calls / len(user_ids):10.2f} {index.read_units / len(user_ids):9.2f} '
+              f'{math.ceil(scan_bytes / PAGE_BYTES):>10,} {math.ceil(scan_bytes / 4096) / 2:>9,.0f}')
+        del index
+
+
+if __name__ == '__main__':
+    main()
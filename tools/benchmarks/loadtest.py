@@ -0,0 +1,517 @@
+"""End-to-end load test of the Lambda handlers against local AWS stand-ins.
+
+A catalog of --cities/--hotels/--users/--interactions is generated with
+tools/generate_synthetic_data.py and loaded the way production loads it:
+the CSVs go into a moto S3 bucket and data-ingestion's lambda_handler writes
+them into moto DynamoDB tables shaped like terraform's, publishing the catalog
+snapshots and the hotel neighbour index on the way. The request mix in
+requests.jsonl (next to this file; --mix for another) is then replayed
+against reco_v1, the router and data-ingestion. Each handler is imported once
+under its own module name, like one warm container per function, and the
+router splits /recommendations with --experiment.
+
+Every mix line is {"name", "target": reco_v1 | router | data_ingestion,
+"weight", "event"}. Strings in the event may hold placeholders filled per
+request from the generated catalog: {city_id}, {city_name}, {hotel_tags},
+{user_id} and {hotel_ids}. A value that is only {batch_queries} or
+{interaction_records} becomes a list (a reco_v1 batch, a stream batch of new
+interactions). The sequence of requests depends only on --seed.
+
+After --warmup unrecorded requests come two passes, each with requests of
+its own from the same mix:
+
+  timed     --requests requests from --concurrency threads; p50/p95/p99
+            latency and throughput
+  profiled  --profiled requests one at a time under tracemalloc; DynamoDB
+            calls per request (counted on the boto3 session, by operation)
+            and the peak Python allocation above the starting point, which
+            with nothing else running belong to that request
+
+Both see the warm-container caches as the requests before them left them,
+so cache misses and their DynamoDB calls count in proportion to the mix.
+
+moto answers in-process, far slower per call than DynamoDB and without the
+network, and the threads share one interpreter, so a slow request holds up
+the others; the absolute latencies describe this machine. Compare runs of the
+same settings between commits (--concurrency 1 gives the steadiest tails). Results are written as JSON (--output);
+--baseline compares the run with an earlier result and exits 1 on a
+regression, --compare OLD NEW compares two result files without running.
+
+    python tools/benchmarks/loadtest.py --hotels 5000 --interactions 50000 --requests 5000 --concurrency 8
+    python tools/benchmarks/loadtest.py --baseline loadtest-<commit>.json
+"""
+import argparse
+import bisect
+import csv
+import importlib.util
+import json
+import logging
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda', 'shared', 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-1')
+for credential in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+    os.environ.setdefault(credential, 'testing')
+import generate_synthetic_data  # noqa: E402
+from catalog_snapshot import SNAPSHOT_PREFIX  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+# Handler directory of each target
+TARGETS = {'reco_v1': 'reco_v1', 'router': 'router', 'data_ingestion': 'data-ingestion'}
+
+TABLES = {
+    'HOTELS_TABLE': 'loadtest-hotels',
+    'USER_INTERACTIONS_TABLE': 'loadtest-user-interactions',
+    'HOTEL_POPULARITY_TABLE': 'loadtest-hotel-popularity',
+    'HOTEL_NEIGHBOURS_TABLE': 'loadtest-hotel-neighbours',
+    'CITIES_TABLE': 'loadtest-cities',
+    'EXPERIMENT_CONFIG_TABLE': 'loadtest-experiment-config'
+}
+HOTELS_CITY_INDEX = 'city-popularity-index'
+USER_INTERACTIONS_USER_INDEX = 'user-timestamp-index'
+DATASETS_BUCKET = 'loadtest-datasets'
+ARTEFACTS_BUCKET = 'loadtest-artefacts'
+
+# Size of the list placeholders
+BATCH_QUERIES = 20
+STREAM_RECORDS = 100
+
+# A run regresses when a metric grows by more than --threshold and by more than this much
+REGRESSION_FLOORS = {'p50_ms': 0.05, 'p95_ms': 0.1, 'p99_ms': 0.2, 'dynamodb_calls': 0.01, 'peak_alloc_kb': 4.0}
+# Samples a group needs in both runs before a metric is compared; tail percentiles of a few requests are noise
+MIN_SAMPLES = {'p50_ms': 20, 'p95_ms': 100, 'p99_ms': 500, 'dynamodb_calls': 10, 'peak_alloc_kb': 10}
+
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+class LambdaContext:
+    """The parts of the Lambda context object the handlers use."""
+
+    def __init__(self, function_name, timeout_seconds=900):
+        self.function_name = function_name
+        self.invoked_function_arn = f'arn:aws:lambda:eu-west-1:123456789012:function:{function_name}'
+        self.deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return int((self.deadline - time.monotonic()) * 1000)
+
+
+class DynamoDBCalls:
+    """Counts DynamoDB API calls made through any boto3 client, by operation."""
+
+    def __init__(self):
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, model, **kwargs):
+        with self._lock:
+            self.counts[model.name] = self.counts.get(model.name, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
+
+
+def create_tables(dynamodb):
+    """The tables and indexes of terraform/modules/storage, on demand."""
+    def table(name, hash_key, attributes, indexes=(), **extra):
+        if indexes:
+            extra['GlobalSecondaryIndexes'] = [{
+                'IndexName': index_name,
+                'KeySchema': [{'AttributeName': hash_attr, 'KeyType': 'HASH'},
+                              {'AttributeName': range_attr, 'KeyType': 'RANGE'}],
+                'Projection': {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': list(projected)}
+            } for index_name, hash_attr, range_attr, projected in indexes]
+        dynamodb.create_table(
+            TableName=name,
+            KeySchema=[{'AttributeName': hash_key, 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': attr, 'AttributeType': kind} for attr, kind in attributes],
+            BillingMode='PAY_PER_REQUEST',
+            **extra
+        )
+
+    table(TABLES['HOTELS_TABLE'], 'hotel_id', [('hotel_id', 'S'), ('city_id', 'S'), ('popularity_score', 'N')],
+          [(HOTELS_CITY_INDEX, 'city_id', 'popularity_score', ('hotel_name', 'rating', 'price_band', 'tags'))])
+    table(TABLES['USER_INTERACTIONS_TABLE'], 'interaction_id', [('interaction_id', 'S'), ('user_id', 'S'), ('timestamp', 'S')],
+          [(USER_INTERACTIONS_USER_INDEX, 'user_id', 'timestamp', ('hotel_id', 'interaction_type', 'session_id'))],
+          StreamSpecification={'StreamEnabled': True, 'StreamViewType': 'NEW_IMAGE'})
+    for key in ('HOTEL_POPULARITY_TABLE', 'HOTEL_NEIGHBOURS_TABLE'):
+        table(TABLES[key], 'hotel_id', [('hotel_id', 'S')])
+    table(TABLES['EXPERIMENT_CONFIG_TABLE'], 'route', [('route', 'S')])
+    table(TABLES['CITIES_TABLE'], 'city_id', [('city_id', 'S')])
+
+
+def put_experiment(dynamodb, split):
+    """Split /recommendations as --experiment says, e.g. reco_v1=70,reco_v2=30."""
+    variants = dict(part.split('=') for part in split.split(','))
+    dynamodb.put_item(TableName=TABLES['EXPERIMENT_CONFIG_TABLE'], Item={
+        'route': {'S': '/recommendations'},
+        'variants': {'M': {name: {'N': weight} for name, weight in variants.items()}},
+        'salt': {'S': 'loadtest'}
+    })
+
+
+def load_handler(target):
+    """Import a target's handler.py under its own module name, its directory on sys.path."""
+    directory = os.path.join(ROOT, 'lambda', TARGETS[target])
+    if directory not in sys.path:
+        sys.path.append(directory)
+    spec = importlib.util.spec_from_file_location(f'loadtest_{target}', os.path.join(directory, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module.lambda_handler
+
+
+def read_csv(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+class Catalog:
+    """What the placeholders are filled from: the generated cities, hotels and users."""
+
+    def __init__(self, data_dir):
+        hotels = read_csv(os.path.join(data_dir, 'hotels.csv'))
+        interactions = read_csv(os.path.join(data_dir, 'user_interactions.csv'))
+        cities_with_hotels = {hotel['city_id'] for hotel in hotels}
+        self.cities = [(city['city_id'], city['city_name']) for city in read_csv(os.path.join(data_dir, 'cities.csv'))
+                       if city['city_id'] in cities_with_hotels]
+        self.hotel_ids = [hotel['hotel_id'] for hotel in hotels]
+        self.user_ids = sorted({row['user_id'] for row in interactions})
+        self.tags = generate_synthetic_data.HOTEL_TAGS
+        # Traffic favours the big cities: city n of cities.csv (in popularity order) gets weight 1/n
+        weights = np.cumsum([1 / rank for rank in range(1, len(self.cities) + 1)])
+        self.city_bounds = (weights / weights[-1]).tolist()
+
+    def city(self, rng):
+        return self.cities[min(bisect.bisect_left(self.city_bounds, rng.random()), len(self.cities) - 1)]
+
+    def value(self, name, rng):
+        if name == 'city_id':
+            return self.city(rng)[0]
+        if name == 'city_name':
+            return self.city(rng)[1]
+        if name == 'hotel_tags':
+            return ','.join(rng.sample(self.tags, rng.randint(1, 3)))
+        if name == 'user_id':
+            return rng.choice(self.user_ids)
+        if name == 'hotel_ids':
+            return ','.join(rng.sample(self.hotel_ids, min(3, len(self.hotel_ids))))
+        if name == 'batch_queries':
+            return [{'id': str(n), 'city_id': self.city(rng)[0], 'user_tags': self.value('hotel_tags', rng),
+                     'limit': 10} for n in range(BATCH_QUERIES)]
+        if name == 'interaction_records':
+            now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            return [{'eventName': 'INSERT', 'dynamodb': {'NewImage': {
+                'hotel_id': {'S': rng.choice(self.hotel_ids)},
+                'interaction_type': {'S': rng.choice(generate_synthetic_data.INTERACTION_TYPES)},
+                'timestamp': {'S': now}
+            }}} for _ in range(STREAM_RECORDS)]
+        raise KeyError(f'unknown placeholder {{{name}}}')
+
+    def fill(self, template, rng):
+        if isinstance(template, dict):
+            return {key: self.fill(value, rng) for key, value in template.items()}
+        if isinstance(template, list):
+            return [self.fill(value, rng) for value in template]
+        if isinstance(template, str):
+            whole = PLACEHOLDER.fullmatch(template)
+            if whole:
+                return self.value(whole.group(1), rng)
+            return PLACEHOLDER.sub(lambda m: str(self.value(m.group(1), rng)), template)
+        return template
+
+
+def read_mix(path):
+    with open(path) as f:
+        mix = [json.loads(line) for line in f if line.strip()]
+    for entry in mix:
+        if entry['target'] not in TARGETS:
+            raise ValueError(f"{entry['name']}: unknown target {entry['target']}")
+    return mix
+
+
+def plan_requests(mix, catalog, count, rng):
+    """count (mix entry, event) pairs drawn by weight."""
+    entries = rng.choices(mix, weights=[entry['weight'] for entry in mix], k=count)
+    return [(entry, catalog.fill(entry['event'], rng)) for entry in entries]
+
+
+def invoke(handlers, entry, event):
+    """Call the entry's handler; returns (seconds, failed). 5xx responses and exceptions are failures."""
+    context = LambdaContext(f"loadtest-{entry['target']}")
+    started = time.perf_counter()
+    try:
+        response = handlers[entry['target']](event, context)
+        failed = isinstance(response, dict) and response.get('statusCode', 200) >= 500
+    except Exception:
+        failed = True
+    return time.perf_counter() - started, failed
+
+
+def timed_pass(handlers, requests, concurrency):
+    samples = [None] * len(requests)
+
+    def run(position):
+        entry, event = requests[position]
+        samples[position] = invoke(handlers, entry, event)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, range(len(requests))))
+    return samples, time.perf_counter() - started
+
+
+def profiled_pass(handlers, requests, calls):
+    profiles = []
+    tracemalloc.start()
+    try:
+        for entry, event in requests:
+            before_calls = calls.snapshot()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            invoke(handlers, entry, event)
+            peak = tracemalloc.get_traced_memory()[1]
+            after_calls = calls.snapshot()
+            profiles.append(({op: n - before_calls.get(op, 0) for op, n in after_calls.items()
+                              if n != before_calls.get(op, 0)}, peak - baseline))
+    finally:
+        tracemalloc.stop()
+    return profiles
+
+
+def summarise(samples, wall_seconds, profiles):
+    latencies = np.array([seconds for seconds, _ in samples]) * 1000
+    summary = {
+        'requests': len(samples),
+        'errors': sum(failed for _, failed in samples),
+        'throughput_rps': round(len(samples) / wall_seconds, 1),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'max_ms': round(float(latencies.max()), 3)
+    }
+    if profiles:
+        operations = {}
+        for by_operation, _ in profiles:
+            for op, n in by_operation.items():
+                operations[op] = operations.get(op, 0) + n
+        peaks = np.array([peak for _, peak in profiles]) / 1024
+        summary.update({
+            'profiled': len(profiles),
+            'dynamodb_calls': round(sum(operations.values()) / len(profiles), 3),
+            'dynamodb_calls_by_operation': {op: round(n / len(profiles), 3) for op, n in sorted(operations.items())},
+            'peak_alloc_kb': round(float(peaks.mean()), 1),
+            'peak_alloc_kb_p95': round(float(np.percentile(peaks, 95)), 1)
+        })
+    return summary
+
+
+def group_positions(requests):
+    """Positions of the requests in the whole run, each target and each mix entry."""
+    groups = {'all': [], **{f'target:{target}': [] for target in TARGETS}}
+    for position, (entry, _) in enumerate(requests):
+        for group in ('all', f"target:{entry['target']}", entry['name']):
+            groups.setdefault(group, []).append(position)
+    return groups
+
+
+def report(requests, samples, wall_seconds, profiled, profiles):
+    profiled_groups = group_positions(profiled)
+    results = {}
+    for group, positions in group_positions(requests).items():
+        if not positions:
+            continue
+        # A group's throughput is its share of the pass, which ran every group at once
+        results[group] = summarise([samples[p] for p in positions], wall_seconds,
+                                   [profiles[p] for p in profiled_groups.get(group, [])])
+    return results
+
+
+def print_results(results):
+    print(f"{'':<30} {'reqs':>6} {'err':>4} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'ddb/req':>8} {'peak KB':>8}")
+    for group, s in results.items():
+        print(f"{group:<30} {s['requests']:>6} {s['errors']:>4} {s['throughput_rps']:>8.1f} {s['p50_ms']:>8.2f} "
+              f"{s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s.get('dynamodb_calls', float('nan')):>8.2f} "
+              f"{s.get('peak_alloc_kb', float('nan')):>8.1f}")
+
+
+def compare(old, new, threshold):
+    """Print metric changes between two result files; returns the regressions."""
+    if old.get('config') != new.get('config'):
+        print('warning: the runs used different settings; only like-for-like numbers are comparable')
+    regressions = []
+    print(f"{'':<30} {'metric':<15} {'old':>10} {'new':>10} {'change':>8}")
+    for group, new_summary in new['results'].items():
+        old_summary = old['results'].get(group)
+        if old_summary is None:
+            continue
+        for metric, floor in REGRESSION_FLOORS.items():
+            if metric not in old_summary or metric not in new_summary:
+                continue
+            samples = 'requests' if metric.endswith('_ms') else 'profiled'
+            if min(old_summary[samples], new_summary[samples]) < MIN_SAMPLES[metric]:
+                continue
+            before, after = old_summary[metric], new_summary[metric]
+            change = (after - before) / before if before else 0.0
+            regressed = after - before > floor and change > threshold
+            if regressed:
+                regressions.append((group, metric, before, after))
+            if regressed or abs(change) > threshold:
+                print(f"{group:<30} {metric:<15} {before:>10.3f} {after:>10.3f} {change:>+8.1%}"
+                      f"{'  REGRESSION' if regressed else ''}")
+    print(f"{old.get('commit')} -> {new.get('commit')}: {len(regressions)} regressions above {threshold:.0%}")
+    return regressions
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f'{commit}-dirty' if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def generate(args, data_dir):
+    generate_synthetic_data.generate_all(args.cities, args.hotels, args.users, args.interactions, data_dir, args.seed)
+
+
+def ingest(handlers, s3, data_dir):
+    """Load the CSVs through data-ingestion, as an S3 upload followed by an invocation per file."""
+    stats = {}
+    for file_name in ('cities.csv', 'hotels.csv', 'user_interactions.csv'):
+        s3.upload_file(os.path.join(data_dir, file_name), DATASETS_BUCKET, file_name)
+        started = time.perf_counter()
+        response = handlers['data_ingestion']({'file': file_name}, LambdaContext('loadtest-data_ingestion'))
+        seconds = time.perf_counter() - started
+        if response['statusCode'] != 200:
+            raise RuntimeError(f"Loading {file_name} failed: {response['body']}")
+        written = json.loads(response['body'])['stats']['written']
+        stats[file_name] = {'rows': written, 'seconds': round(seconds, 3), 'rows_per_second': round(written / seconds, 1)}
+    return stats
+
+
+def run(args):
+    data_dir = tempfile.mkdtemp(prefix='loadtest-')
+    # reco_v1 keeps downloaded snapshots in /tmp, named by generation; start like a fresh container
+    shutil.rmtree(os.path.join('/tmp', SNAPSHOT_PREFIX.strip('/')), ignore_errors=True)
+    os.environ.update(TABLES)
+    os.environ.update({
+        'HOTELS_CITY_INDEX': HOTELS_CITY_INDEX,
+        'USER_INTERACTIONS_USER_INDEX': USER_INTERACTIONS_USER_INDEX,
+        'DATASETS_BUCKET': DATASETS_BUCKET,
+        'ARTEFACTS_BUCKET': ARTEFACTS_BUCKET,
+        'CATALOG_SNAPSHOT_BUCKET': ARTEFACTS_BUCKET
+    })
+    # Handlers log every request at INFO and write EMF metrics to their own logger;
+    # format the lines as Lambda would, into nothing
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    devnull = logging.StreamHandler(open(os.devnull, 'w'))
+    root.addHandler(devnull)
+    logging.getLogger('metrics').handlers = [devnull]
+
+    with mock_aws():
+        import boto3
+        boto3.setup_default_session()
+        calls = DynamoDBCalls()
+        boto3.DEFAULT_SESSION.events.register('before-call.dynamodb', calls)
+        dynamodb, s3 = boto3.client('dynamodb'), boto3.client('s3')
+        for bucket in (DATASETS_BUCKET, ARTEFACTS_BUCKET):
+            s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={'LocationConstraint': os.environ['AWS_DEFAULT_REGION']})
+        create_tables(dynamodb)
+        put_experiment(dynamodb, args.experiment)
+
+        started = time.perf_counter()
+        generate(args, data_dir)
+        generate_seconds = time.perf_counter() - started
+        handlers = {target: load_handler(target) for target in TARGETS}
+        load = ingest(handlers, s3, data_dir)
+        load['generate_seconds'] = round(generate_seconds, 3)
+        print(f'generated in {generate_seconds:.1f} s, loaded {json.dumps(load)}')
+
+        catalog = Catalog(data_dir)
+        rng = random.Random(args.seed)
+        mix = read_mix(args.mix)
+        warmup = plan_requests(mix, catalog, args.warmup, rng)
+        requests = plan_requests(mix, catalog, args.requests, rng)
+        profiled = plan_requests(mix, catalog, args.profiled, rng)
+        timed_pass(handlers, warmup, args.concurrency)
+        samples, wall_seconds = timed_pass(handlers, requests, args.concurrency)
+        profiles = profiled_pass(handlers, profiled, calls)
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+    return {
+        'schema': 1,
+        'commit': git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': {'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {key: getattr(args, key) for key in ('cities', 'hotels', 'users', 'interactions', 'requests',
+                                                         'warmup', 'profiled', 'concurrency', 'experiment', 'seed')}
+                  | {'mix': os.path.basename(args.mix)},
+        'load': load,
+        'wall_seconds': round(wall_seconds, 3),
+        'results': report(requests, samples, wall_seconds, profiled, profiles)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cities', type=int, default=generate_synthetic_data.NUM_CITIES)
+    parser.add_argument('--hotels', type=int, default=generate_synthetic_data.NUM_HOTELS)
+    parser.add_argument('--users', type=int, default=generate_synthetic_data.NUM_USERS)
+    parser.add_argument('--interactions', type=int, default=generate_synthetic_data.NUM_INTERACTIONS)
+    parser.add_argument('--mix', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'requests.jsonl'))
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--profiled', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--experiment', default='reco_v1=70,reco_v2=30')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Result file (default: loadtest-<commit>.json)')
+    parser.add_argument('--baseline', help='Earlier result file to compare this run with')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two result files and exit')
+    parser.add_argument('--threshold', type=float, default=0.20, help='Relative growth that counts as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f_old, open(args.compare[1]) as f_new:
+            sys.exit(1 if compare(json.load(f_old), json.load(f_new), args.threshold) else 0)
+
+    result = run(args)
+    print_results(result['results'])
+    output = args.output or f"loadtest-{result['commit']}.json"
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f'wrote {output}')
+    if args.baseline:
+        with open(args.baseline) as f:
+            sys.exit(1 if compare(json.load(f), result, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,15 @@
-import csv
-import random
-from datetime import datetime, timedelta
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
 
 # Constants
 NUM_CITIES = 50
@@ -173,83 +182,340 @@ NUM_INTERACTIONS = 5000
 INTERACTION_TYPES = ["view", "click", "book", "favourite", "search"]
 INTERACTION_WEIGHTS = [40, 25, 15, 10, 10]
 
+# Interaction timestamps fall in this many days before --end-date
+INTERACTION_DAYS = 90
+
+# Rows are drawn and written in blocks of this size, each from its own seeded
+# stream, so the files depend only on the seed and end date, not on shards or workers
+BLOCK_ROWS = 1 << 16
+SHARD_ROWS = 1 << 20
+
+FORMATS = ("csv", "csv.gz", "jsonl")
+
+CITY_COLUMNS = ["city_id", "city_name", "country_code", "popularity_index", "tags"]
+HOTEL_COLUMNS = ["hotel_id", "city_id", "hotel_name", "rating", "price_band", "tags", "popularity_score"]
+INTERACTION_COLUMNS = ["interaction_id", "user_id", "hotel_id", "interaction_type", "timestamp", "session_id"]
+
+# Stream ids, so each table draws from its own sequence
+CITIES, HOTELS, INTERACTIONS = 0, 1, 2
+
 def calculate_zipf_popularity(rank, max_popularity=ZIPF_MAX_POPULARITY):
-    return int(max_popularity / rank)
-
-def generate_hotel_rating():
-    """Generate weighted random hotel rating."""
-    return random.choices(HOTEL_RATINGS, weights=HOTEL_RATING_WEIGHTS, k=1)[0]
-
-def generate_tags(tags_list, tag_range):
-    """Generate random tags string."""
-    num_tags = random.randint(*tag_range)
-    selected_tags = random.sample(tags_list, num_tags)
-    return ",".join(selected_tags)
-
-def generate_hotel_popularity():
-    """Generate hotel popularity with variance."""
-    base_popularity = calculate_zipf_popularity(random.randint(1, NUM_CITIES))
-    return base_popularity + random.randint(-POPULARITY_VARIANCE, POPULARITY_VARIANCE)
-
-def generate_cities():
-    # Create CSV file
-    with open('cities.csv', 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-
-        # Write header
-        writer.writerow(['city_id', 'city_name', 'country_code', 'popularity_index', 'tags'])
-
-        # Write data for each city
-        for rank, (city_name, country_code) in enumerate(CITY_COUNTRY_PAIRS, 1):
-            # 1. Create city_id (format: CITY_001, CITY_002, etc.)
-            city_id = f"CITY_{rank:03d}"
-            # 2. Calculate popularity using calculate_zipf_popularity(rank)
-            popularity = calculate_zipf_popularity(rank)
-            # 3. Generate tags
-            tags_string = generate_tags(CITY_TAGS, CITY_TAG_RANGE)
-            # 4. Write the row
-            writer.writerow([city_id, city_name, country_code, popularity, tags_string])
-
-def generate_hotels():
-    # Create CSV file
-    with open('hotels.csv', 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(['hotel_id', 'city_id', 'hotel_name', 'rating', 'price_band', 'tags', 'popularity_score'])
-
-        for i in range(NUM_HOTELS):
-            hotel_id = f"HOTEL_{i+1:03d}"
-            city_id = f"CITY_{random.randint(1, NUM_CITIES):03d}"
-            hotel_name = random.choice(HOTEL_NAMES)
-            rating = generate_hotel_rating()
-            price_band = random.choice(PRICE_BANDS)
-            tags_string = generate_tags(HOTEL_TAGS, HOTEL_TAG_RANGE)
-            popularity_score = generate_hotel_popularity()
-
-            writer.writerow([hotel_id, city_id, hotel_name, rating, price_band, tags_string, popularity_score])
-
-def generate_timestamp():
-    today = datetime.now()
-    ninety_days_ago = today - timedelta(days=90)
-    random_seconds = random.randint(0, 90 * 24 * 3600)
-    random_timestamp = ninety_days_ago + timedelta(seconds=random_seconds)
-    return random_timestamp.strftime("%Y-%m-%d %H:%M:%S")
-
-def generate_user_interactions():
-    with open('user_interactions.csv', 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(['interaction_id', 'user_id', 'hotel_id', 'interaction_type', 'timestamp', 'session_id'])
-
-        for r in range(NUM_INTERACTIONS):
-            interaction_id = f"INT_{r+1:05d}"
-            user_id = f"USER_{random.randint(1, NUM_USERS):03d}"
-            hotel_id = f"HOTEL_{random.randint(1, NUM_HOTELS):03d}"
-            interaction_type = random.choices(INTERACTION_TYPES, weights=INTERACTION_WEIGHTS, k=1)[0]
-            timestamp = generate_timestamp()
-            session_id = f"SESSION_{random.randint(1, NUM_INTERACTIONS//3):05d}"
-
-            writer.writerow([interaction_id, user_id, hotel_id, interaction_type, timestamp, session_id])
+    """Popularity of the rank-th most popular item; rank may be an array."""
+    return max_popularity // rank
+
+def block_rng(seed, table, block):
+    return np.random.default_rng([seed, table, block])
+
+def sample_tags(rng, count, vocabulary_size, tag_range):
+    """Return (picks, lengths): row i's tags are picks[i, :lengths[i]], distinct and in random order."""
+    low, high = tag_range
+    picks = rng.integers(0, vocabulary_size, (count, high))
+    while True:
+        ordered = np.sort(picks, axis=1)
+        repeated = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+        if not repeated.any():
+            return picks, rng.integers(low, high + 1, count)
+        picks[repeated] = rng.integers(0, vocabulary_size, (int(repeated.sum()), high))
+
+def city_country_pairs(num_cities):
+    """(city_name, country_code) for num_cities cities; past the real ones, names repeat with a number."""
+    for i in range(num_cities):
+        city_name, country_code = CITY_COUNTRY_PAIRS[i % len(CITY_COUNTRY_PAIRS)]
+        if i >= len(CITY_COUNTRY_PAIRS):
+            city_name = f"{city_name} {i // len(CITY_COUNTRY_PAIRS) + 1}"
+        yield city_name, country_code
+
+def hotel_block(seed, block, num_cities):
+    """Every column of one block of hotels; row i is hotel block * BLOCK_ROWS + i + 1."""
+    rng = block_rng(seed, HOTELS, block)
+    picks, lengths = sample_tags(rng, BLOCK_ROWS, len(HOTEL_TAGS), HOTEL_TAG_RANGE)
+    return {
+        "number": np.arange(block * BLOCK_ROWS + 1, (block + 1) * BLOCK_ROWS + 1),
+        "city": rng.integers(1, num_cities + 1, BLOCK_ROWS),
+        "name": rng.integers(0, len(HOTEL_NAMES), BLOCK_ROWS),
+        "rating": rng.choice(len(HOTEL_RATINGS), BLOCK_ROWS, p=np.array(HOTEL_RATING_WEIGHTS) / sum(HOTEL_RATING_WEIGHTS)),
+        "price_band": rng.integers(0, len(PRICE_BANDS), BLOCK_ROWS),
+        "tags": picks,
+        "tag_count": lengths,
+        "popularity": (calculate_zipf_popularity(rng.integers(1, num_cities + 1, BLOCK_ROWS))
+                       + rng.integers(-POPULARITY_VARIANCE, POPULARITY_VARIANCE + 1, BLOCK_ROWS))
+    }
+
+def interaction_block(seed, block, num_users, num_hotels, num_interactions):
+    rng = block_rng(seed, INTERACTIONS, block)
+    seconds = rng.integers(0, INTERACTION_DAYS * 86400 + 1, BLOCK_ROWS)
+    return {
+        "number": np.arange(block * BLOCK_ROWS + 1, (block + 1) * BLOCK_ROWS + 1),
+        "user": rng.integers(1, num_users + 1, BLOCK_ROWS),
+        "hotel": rng.integers(1, num_hotels + 1, BLOCK_ROWS),
+        "type": rng.choice(len(INTERACTION_TYPES), BLOCK_ROWS, p=np.array(INTERACTION_WEIGHTS) / sum(INTERACTION_WEIGHTS)),
+        "day": seconds // 86400,
+        "second": seconds % 86400,
+        "session": rng.integers(1, max(1, num_interactions // 3) + 1, BLOCK_ROWS)
+    }
+
+def blocks(start, end):
+    """(block, first, last): rows first..last-1 of each block that rows start..end-1 fall in."""
+    for block in range(start // BLOCK_ROWS, (end - 1) // BLOCK_ROWS + 1):
+        yield block, max(start - block * BLOCK_ROWS, 0), min(end - block * BLOCK_ROWS, BLOCK_ROWS)
+
+# Rows are assembled as bytes without a Python loop: every field is a
+# (rows, width) uint8 matrix plus a mask of the bytes it actually uses, and
+# the row is the masked bytes of its fields side by side.
+
+def vocabulary(values):
+    """Encode strings once for picking: (bytes matrix, lengths)."""
+    encoded = [value.encode("utf-8") for value in values]
+    width = max(1, max(len(value) for value in encoded))
+    matrix = np.zeros((len(encoded), width), dtype=np.uint8)
+    for i, value in enumerate(encoded):
+        matrix[i, :len(value)] = np.frombuffer(value, dtype=np.uint8)
+    return matrix, np.array([len(value) for value in encoded])
+
+def pick(words, index):
+    matrix, lengths = words
+    return matrix[index], np.arange(matrix.shape[1]) < lengths[index][:, None]
+
+def literal(text, rows):
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+    return np.broadcast_to(data, (rows, len(data))), np.ones((rows, len(data)), dtype=bool)
+
+# Four-digit groups, as bytes: row n is f"{n:04d}"
+DIGIT_GROUPS = np.array([list(f"{n:04d}".encode("ascii")) for n in range(10000)], dtype=np.uint8)
+
+def digits(numbers, min_width=1):
+    """Decimal text of integers, zero-padded to min_width like f"{n:0{min_width}d}" (a minus sign goes before the padding)."""
+    negative = numbers < 0
+    magnitude = np.abs(numbers)
+    width = max(min_width, len(str(int(magnitude.max(initial=0)))))
+    groups = (width + 3) // 4
+    matrix = np.hstack([DIGIT_GROUPS[magnitude // 10 ** (4 * (groups - 1 - g)) % 10000] for g in range(groups)])
+    powers = 10 ** np.arange(1, width, dtype=np.int64)
+    shown = np.maximum(min_width, 1 + (magnitude[:, None] >= powers).sum(axis=1))
+    mask = np.arange(width) >= width - shown[:, None]
+    sign = np.full((len(numbers), 1), ord("-"), dtype=np.uint8)
+    return np.hstack([sign, matrix[:, 4 * groups - width:]]), np.hstack([negative[:, None], mask])
+
+def tag_list(words, picks, counts):
+    """Comma-joined tags, picks[i, :counts[i]] of row i."""
+    comma = literal(",", len(counts))
+    fields = []
+    for slot in range(picks.shape[1]):
+        used = (counts > slot)[:, None]
+        matrix, mask = pick(words, picks[:, slot])
+        if slot:
+            fields.append((comma[0], comma[1] & used))
+        fields.append((matrix, mask & used))
+    return fields
+
+def assemble(fields):
+    """Concatenate each row's fields; fields are (matrix, mask) pairs or lists of them."""
+    flat = []
+    for field in fields:
+        flat.extend(field if isinstance(field, list) else [field])
+    matrix = np.hstack([matrix for matrix, _ in flat])
+    mask = np.hstack([mask for _, mask in flat])
+    return matrix[mask].tobytes()
+
+HOTEL_NAME_WORDS = vocabulary(HOTEL_NAMES)
+JSON_HOTEL_NAME_WORDS = vocabulary([json.dumps(name)[1:-1] for name in HOTEL_NAMES])
+HOTEL_TAG_WORDS = vocabulary(HOTEL_TAGS)
+JSON_HOTEL_TAG_WORDS = vocabulary([json.dumps(tag)[1:-1] for tag in HOTEL_TAGS])
+RATING_WORDS = vocabulary([str(rating) for rating in HOTEL_RATINGS])
+PRICE_BAND_WORDS = vocabulary(PRICE_BANDS)
+INTERACTION_TYPE_WORDS = vocabulary(INTERACTION_TYPES)
+TIME_WORDS = vocabulary([f"{h:02d}:{m:02d}:{s:02d}" for h in range(24) for m in range(60) for s in range(60)])
+
+def day_words(end_date):
+    first_day = end_date - timedelta(days=INTERACTION_DAYS)
+    return vocabulary([(first_day + timedelta(days=d)).isoformat() for d in range(INTERACTION_DAYS + 1)])
+
+def format_hotels(block, fmt):
+    rows = len(block["number"])
+    text = lambda value: literal(value, rows)
+    if fmt == "jsonl":
+        return assemble([
+            text('{"hotel_id": "HOTEL_'), digits(block["number"], 3),
+            text('", "city_id": "CITY_'), digits(block["city"], 3),
+            text('", "hotel_name": "'), pick(JSON_HOTEL_NAME_WORDS, block["name"]),
+            text('", "rating": '), pick(RATING_WORDS, block["rating"]),
+            text(', "price_band": "'), pick(PRICE_BAND_WORDS, block["price_band"]),
+            text('", "tags": "'), tag_list(JSON_HOTEL_TAG_WORDS, block["tags"], block["tag_count"]),
+            text('", "popularity_score": '), digits(block["popularity"]), text("}\n")
+        ])
+    # Tags always hold a comma, so csv would quote them; no name or tag contains a quote
+    return assemble([
+        text("HOTEL_"), digits(block["number"], 3), text(",CITY_"), digits(block["city"], 3), text(","),
+        pick(HOTEL_NAME_WORDS, block["name"]), text(","), pick(RATING_WORDS, block["rating"]), text(","),
+        pick(PRICE_BAND_WORDS, block["price_band"]), text(',"'),
+        tag_list(HOTEL_TAG_WORDS, block["tags"], block["tag_count"]), text('",'),
+        digits(block["popularity"]), text("\r\n")
+    ])
+
+def format_interactions(block, fmt, days):
+    rows = len(block["number"])
+    text = lambda value: literal(value, rows)
+    if fmt == "jsonl":
+        return assemble([
+            text('{"interaction_id": "INT_'), digits(block["number"], 5),
+            text('", "user_id": "USER_'), digits(block["user"], 3),
+            text('", "hotel_id": "HOTEL_'), digits(block["hotel"], 3),
+            text('", "interaction_type": "'), pick(INTERACTION_TYPE_WORDS, block["type"]),
+            text('", "timestamp": "'), pick(days, block["day"]), text(" "), pick(TIME_WORDS, block["second"]),
+            text('", "session_id": "SESSION_'), digits(block["session"], 5), text('"}\n')
+        ])
+    return assemble([
+        text("INT_"), digits(block["number"], 5), text(",USER_"), digits(block["user"], 3),
+        text(",HOTEL_"), digits(block["hotel"], 3), text(","), pick(INTERACTION_TYPE_WORDS, block["type"]),
+        text(","), pick(days, block["day"]), text(" "), pick(TIME_WORDS, block["second"]),
+        text(",SESSION_"), digits(block["session"], 5), text("\r\n")
+    ])
+
+def header(columns, fmt):
+    return (",".join(columns) + "\r\n").encode("utf-8") if fmt != "jsonl" else b""
+
+@contextmanager
+def open_output(path, fmt):
+    with open(path, "wb") as f:
+        if fmt != "csv.gz":
+            yield f
+            return
+        # Fast over small. No name or mtime in the header, so the bytes are reproducible; concatenated members are one valid file
+        with gzip.GzipFile(filename="", mode="wb", fileobj=f, compresslevel=1, mtime=0) as compressed:
+            yield compressed
+
+def write_shard(task):
+    """Write rows start..end-1 of a table to a part file; runs in a worker process."""
+    table, path, fmt, seed, start, end, sizes, end_date = task
+    days = day_words(end_date) if table == INTERACTIONS else None
+    with open_output(path, fmt) as f:
+        if start == 0:
+            f.write(header(HOTEL_COLUMNS if table == HOTELS else INTERACTION_COLUMNS, fmt))
+        for block, first, last in blocks(start, end):
+            if table == HOTELS:
+                columns = hotel_block(seed, block, sizes["cities"])
+            else:
+                columns = interaction_block(seed, block, sizes["users"], sizes["hotels"], sizes["interactions"])
+            # Every block draws all its rows, so a row's values do not depend on where a shard starts
+            columns = {name: values[first:last] for name, values in columns.items()}
+            f.write(format_hotels(columns, fmt) if table == HOTELS else format_interactions(columns, fmt, days))
+    return path
+
+def generate_cities(num_cities=NUM_CITIES, output_dir=".", seed=0, fmt="csv"):
+    rng = block_rng(seed, CITIES, 0)
+    picks, lengths = sample_tags(rng, num_cities, len(CITY_TAGS), CITY_TAG_RANGE)
+    rows = [
+        {"city_id": f"CITY_{rank:03d}", "city_name": city_name, "country_code": country_code,
+         "popularity_index": calculate_zipf_popularity(rank),
+         "tags": ",".join(CITY_TAGS[t] for t in picks[rank - 1, :lengths[rank - 1]])}
+        for rank, (city_name, country_code) in enumerate(city_country_pairs(num_cities), 1)
+    ]
+    if fmt == "jsonl":
+        text = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+    else:
+        text = "".join(f'{r["city_id"]},{r["city_name"]},{r["country_code"]},{r["popularity_index"]},"{r["tags"]}"\r\n'
+                       for r in rows)
+    with open_output(os.path.join(output_dir, f"cities.{fmt}"), fmt) as f:
+        f.write(header(CITY_COLUMNS, fmt) + text.encode("utf-8"))
+
+def generate_table(table, name, rows, output_dir, seed, fmt, sizes, end_date, pool, shard_rows=SHARD_ROWS):
+    """Write a table as shards, in pool when given, and join them into one file."""
+    shard_rows = max(BLOCK_ROWS, shard_rows // BLOCK_ROWS * BLOCK_ROWS)
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    tasks = [(table, f"{path}.part-{shard:05d}", fmt, seed, start, min(start + shard_rows, rows), sizes, end_date)
+             for shard, start in enumerate(range(0, rows, shard_rows))]
+    if not tasks:
+        with open_output(path, fmt) as f:
+            f.write(header(HOTEL_COLUMNS if table == HOTELS else INTERACTION_COLUMNS, fmt))
+        return
+    parts = list(pool.map(write_shard, tasks)) if pool else [write_shard(task) for task in tasks]
+    with open(path, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, 16 * 1024 * 1024)
+            os.remove(part)
+
+def generate_hotels(num_hotels=NUM_HOTELS, num_cities=NUM_CITIES, output_dir=".", seed=0, fmt="csv", pool=None,
+                    shard_rows=SHARD_ROWS):
+    generate_table(HOTELS, "hotels", num_hotels, output_dir, seed, fmt, {"cities": num_cities}, None, pool, shard_rows)
+
+def generate_user_interactions(num_interactions=NUM_INTERACTIONS, num_users=NUM_USERS, num_hotels=NUM_HOTELS,
+                               output_dir=".", seed=0, fmt="csv", end_date=None, pool=None, shard_rows=SHARD_ROWS):
+    sizes = {"users": num_users, "hotels": num_hotels, "interactions": num_interactions}
+    generate_table(INTERACTIONS, "user_interactions", num_interactions, output_dir, seed, fmt, sizes,
+                   end_date or datetime.now(timezone.utc).date(), pool, shard_rows)
+
+def generate_snapshots(num_hotels, num_cities, output_dir, seed, generation=1):
+    """Write hotels as the per-city catalog snapshots data-ingestion publishes, under output_dir.
+
+    The files sit at their snapshot keys, so output_dir works as reco_v1's
+    CATALOG_SNAPSHOT_DIR once the hotels table is at this generation.
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lambda", "shared", "python"))
+    from catalog_snapshot import build_snapshot, snapshot_key
+
+    cities = {}
+    for block, first, last in blocks(0, num_hotels):
+        columns = {name: values[first:last].tolist() for name, values in hotel_block(seed, block, num_cities).items()}
+        for n, c, h, r, b, tags, count, p in zip(*columns.values()):
+            city_id = f"CITY_{c:03d}"
+            cities.setdefault(city_id, []).append({
+                "hotel_id": f"HOTEL_{n:03d}", "city_id": city_id, "hotel_name": HOTEL_NAMES[h],
+                "rating": HOTEL_RATINGS[r], "price_band": PRICE_BANDS[b],
+                "tags": ",".join(HOTEL_TAGS[t] for t in tags[:count]), "popularity_score": p
+            })
+    for city_id, hotels in cities.items():
+        path = os.path.join(output_dir, snapshot_key(generation, city_id))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(build_snapshot(hotels, generation))
+    return len(cities)
+
+def generate_all(num_cities=NUM_CITIES, num_hotels=NUM_HOTELS, num_users=NUM_USERS, num_interactions=NUM_INTERACTIONS,
+                 output_dir=".", seed=0, fmt="csv", end_date=None, workers=1, shard_rows=SHARD_ROWS):
+    """Write cities, hotels and user_interactions; the same seed and end_date always give the same files."""
+    os.makedirs(output_dir, exist_ok=True)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        generate_cities(num_cities, output_dir, seed, fmt)
+        generate_hotels(num_hotels, num_cities, output_dir, seed, fmt, pool, shard_rows)
+        generate_user_interactions(num_interactions, num_users, num_hotels, output_dir, seed, fmt, end_date, pool,
+                                   shard_rows)
+    finally:
+        if pool:
+            pool.shutdown()
 
 if __name__ == "__main__":
-    generate_cities()
-    generate_hotels()
-    generate_user_interactions()
\ No newline at end of file
+    parser = argparse.ArgumentParser(
+        description="Write cities, hotels and user_interactions. The same --seed and --end-date give the same "
+                    "rows whatever --workers and --shard-rows are (csv.gz is compressed shard by shard).")
+    parser.add_argument("--cities", type=int, default=NUM_CITIES)
+    parser.add_argument("--hotels", type=int, default=NUM_HOTELS)
+    parser.add_argument("--users", type=int, default=NUM_USERS)
+    parser.add_argument("--interactions", type=int, default=NUM_INTERACTIONS)
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--seed", type=int, help="Default: a random seed, printed so the run can be repeated")
+    parser.add_argument("--end-date", type=date.fromisoformat,
+                        help="Last day of the interaction window, YYYY-MM-DD (default: today, UTC)")
+    parser.add_argument("--format", choices=FORMATS, default="csv",
+                        help="data-ingestion loads csv; csv.gz and jsonl are for other consumers")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes writing shards")
+    parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS,
+                        help=f"Rows per shard, rounded to a multiple of {BLOCK_ROWS}")
+    parser.add_argument("--snapshots", action="store_true",
+                        help="Also write hotels as per-city catalog snapshots (the binary format reco_v1 maps)")
+    parser.add_argument("--generation", type=int, default=1, help="Catalog generation of the snapshots")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else int(np.random.SeedSequence().entropy % 2**32)
+    end_date = args.end_date or datetime.now(timezone.utc).date()
+    started = time.perf_counter()
+    generate_all(args.cities, args.hotels, args.users, args.interactions, args.output_dir, seed, args.format,
+                 end_date, args.workers, args.shard_rows)
+    print(f"Wrote {args.cities} cities, {args.hotels} hotels and {args.interactions} interactions in "
+          f"{time.perf_counter() - started:.1f} s (--seed {seed} --end-date {end_date})")
+    if args.snapshots:
+        started = time.perf_counter()
+        cities = generate_snapshots(args.hotels, args.cities, args.output_dir, seed, args.generation)
+        print(f"Wrote catalog snapshots of {cities} cities for generation {args.generation} in "
+              f"{time.perf_counter() - started:.1f} s")